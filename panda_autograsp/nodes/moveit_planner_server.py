@@ -12,22 +12,42 @@ Services
     **General services:**
 
         - visualize_plan: Visualizes a given plan.
+        - get_planner_stats: Returns the planning statistics per planner and goal
+          region that are used to select the planner and planning time.
 
     **Main_move_group services:**
 
         - execute_plan: Executes the plan that has been computed by any of the other
           planner services.
+        - execute_plan_with_gripper: Executes the plan while moving the gripper
+          towards its joint targets.
+        - has_plan: Checks whether a plan handle still refers to a stored plan.
         - plan_to_point: Plans to a given pose.
+        - plan_to_poses: Plans to the first reachable pose of a set of candidate
+          poses.
+        - plan_to_grasp: Plans to the equivalent parallel-jaw grasp pose that
+          requires the least joint motion.
         - plan_to_joint: Plans to a sequence of joint angles.
+        - plan_composite: Plans a motion consisting of multiple joint, pose and
+          cartesian segments without stopping between them.
         - plan_to_path: Plans for a given path.
         - plan_random_pose: Computes a plan to a random pose.
         - plan_random_joint: Computes a plan to a random sequence of joint angles.
         - plan_random_path: Copmutes a plan to a random path.
 
+    The plan services return a plan handle that can be passed to the visualize and
+    execute services. Plans are kept in a bounded store so that multiple clients can
+    plan concurrently. A plan handle of 0 refers to the latest plan.
+
     **Gripper move group services:**
 
-        - open_gripper: Open the gripper. This service both plans and executes.
-        - close_gripper: Close the gripper. This both plans and executes.
+        - open_gripper: Open the gripper. Uses the gripper move action when
+          available and otherwise both plans and executes.
+        - close_gripper: Close the gripper. Uses the gripper grasp action when
+          available and otherwise both plans and executes. The finger joint
+          states are used to check whether an object was grasped.
+        - command_gripper: Move the fingers to a given width through the gripper
+          actions. Falls back to MoveIt when the actions are not available.
         - set_gripper_width: Set the gripper joint state targets to a certain width.
         - set_gripper_open: Set the gripper joint state targets to open.
         - set_gripper_closed: Set the gripper joint state targets to closed.
@@ -28,7 +28,10 @@ from panda_autograsp.srv import (
     SetGripperClosed,
     PlanGripper,
     ExecuteGripperPlan,
+    ExecutePlanWithGripper,
     CloseGripper,
+    OpenGripper,
+    PlanPlace,
     SetGripperWidth,
 )
 from panda_autograsp.functions import yes_or_no
@@ -154,7 +157,7 @@ class PandaAutograspCLI:
         rospy.logdebug("Connecting to 'plan_place' service...")
         rospy.wait_for_service("plan_place")
         try:
-            self._plan_place_srv = rospy.ServiceProxy("plan_place", CloseGripper)
+            self._plan_place_srv = rospy.ServiceProxy("plan_place", PlanPlace)
             rospy.logdebug("Connected to 'plan_place' service.")
         except rospy.ServiceException as e:
             rospy.logerr(
@@ -260,6 +263,33 @@ class PandaAutograspCLI:
             rospy.logerr(shutdown_msg)
             sys.exit(0)
 
+        # Initialize moveit_planner_server/execute_plan_with_gripper service
+        rospy.logdebug(
+            "Connecting to 'moveit_planner_server/execute_plan_with_gripper' "
+            "service..."
+        )
+        rospy.wait_for_service("moveit_planner_server/execute_plan_with_gripper")
+        try:
+            self._execute_plan_with_gripper_srv = rospy.ServiceProxy(
+                "moveit_planner_server/execute_plan_with_gripper",
+                ExecutePlanWithGripper,
+            )
+            rospy.logdebug(
+                "Connected to 'moveit_planner_server/execute_plan_with_gripper' "
+                "service."
+            )
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/execute_plan_with_gripper' "
+                "service initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._execute_plan_with_gripper_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
         # Initialize moveit_planner_server/close_gripper service
         rospy.logdebug("Connecting to 'moveit_planner_server/close_gripper' service...")
         rospy.wait_for_service("moveit_planner_server/close_gripper")
@@ -287,7 +317,7 @@ class PandaAutograspCLI:
         rospy.wait_for_service("moveit_planner_server/open_gripper")
         try:
             self._open_gripper_srv = rospy.ServiceProxy(
-                "moveit_planner_server/open_gripper", CloseGripper
+                "moveit_planner_server/open_gripper", OpenGripper
             )
             rospy.logdebug("Connected to 'moveit_planner_server/open_gripper' service.")
         except rospy.ServiceException as e:
@@ -500,25 +530,19 @@ class PandaAutograspCLI:
                 #################################
                 # Execute grasp #################
                 #################################
+                # NOTE: The gripper is opened while the arm moves towards the grasp.
                 print("Executing grasp...")
-                result1 = self._execute_gripper_plan_srv()
-                result2 = self._execute_grasp_srv()
+                result = self._execute_plan_with_gripper_srv(trigger_time=0.0)
 
                 # Check if execution was successfull
-                if (not result1.success) or (not result2.success):
+                if not result.success:
                     print("")
 
                     # Display execution fail message
-                    if not result1.success:
-                        response = yes_or_no(
-                            "Gripper plan execution failed. "
-                            "Do you want to compute another grasp?"
-                        )
-                    else:
-                        response = yes_or_no(
-                            "Arm plan execution failed. "
-                            "Do you want to compute another grasp?"
-                        )
+                    response = yes_or_no(
+                        "Grasp execution failed. "
+                        "Do you want to compute another grasp?"
+                    )
 
                     # Check user input
                     if not response:
@@ -541,8 +565,8 @@ class PandaAutograspCLI:
                 if not result.success:
                     print("")
                     response = yes_or_no(
-                        "Gripper close action failed. Do you want to compute another "
-                        "grasp?"
+                        "Gripper close action failed (grasp state: %s). Do you want "
+                        "to compute another grasp?" % result.grasp_state
                     )
                     if not response:
                         rospy.loginfo("Shutting down %s node." % rospy.get_name())
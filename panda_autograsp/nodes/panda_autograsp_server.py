@@ -13,6 +13,10 @@ set up by the ``panda_autograsp_server`` node are listed below:
     - gqcnn_grasp_planner: Computes a grasp pose out of RGB-D images
     - gqcnn_grasp_planner_bounding_box: Also computes the grasp but allows you to supply a bounding box.
     - gqcnn_grasp_planner_segmask: Also computes the grasp but allows you to supply a segmask.
+    - pick_and_place: Runs a full pick and place cycle and returns the outcome and
+      duration of each phase.
+    - pick_and_place/confirm: Confirms or aborts the pick and place phase that is
+      waiting for a confirmation.
 """
 
 # Make script both python2 and python3 compatible
@@ -30,6 +34,7 @@ import rospy
 
 # Panda_autograsp modules, msgs and srvs
 from panda_autograsp import PandaAutograspServer
+from panda_autograsp.panda_autograsp_server_ros import PIPELINE_ENABLED
 
 #################################################
 # Main script ###################################
@@ -53,12 +58,17 @@ if __name__ == "__main__":
         bounding_box_enabled = rospy.get_param("~use_bounding_box")
     except KeyError:
         bounding_box_enabled = False
+    try:  # Check if the next grasp should be computed while placing
+        pipelined = rospy.get_param("~pipelined")
+    except KeyError:
+        pipelined = PIPELINE_ENABLED
 
     # Create GraspPlannerClient object
     grasp_planner_client = PandaAutograspServer(
         pose_calib_method=pose_Calib_method,
         gazebo=gazebo,
         bounding_box_enabled=bounding_box_enabled,
+        pipelined=pipelined,
     )
 
     # Loop till the service is shutdown
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""This script can be used to benchmark the batch conversion functions of the
+:py:mod:`panda_autograsp.functions.conversions` module against their per message
+counterparts.
+
+.. note::
+
+    **Usage:**
+    The batch sizes and number of repetitions can be changed in the
+    script settings.
+
+Source code
+----------------------------
+.. literalinclude:: /../../panda_autograsp/scripts/benchmark_conversions.py
+   :language: python
+   :linenos:
+   :lines: 19-
+"""
+
+# Main python packages
+import timeit
+import numpy as np
+
+# ROS transformation packages
+import tf_conversions
+
+# ROS messages and services
+from geometry_msgs.msg import PoseStamped, TransformStamped
+
+# Panda_autograsp modules, msgs and srvs
+from panda_autograsp.functions.conversions import (
+    transform_stamped_2_matrix,
+    pose_msg_stamped_2_matrix,
+    quaternions_2_matrices,
+    matrices_2_quaternions,
+    pose_msgs_2_matrices,
+    matrices_2_pose_msgs_stamped,
+    transforms_stamped_2_matrices,
+    compose_matrices,
+    invert_matrices,
+)
+
+#################################################
+# Script settings ###############################
+#################################################
+BATCH_SIZES = [1, 100, 10000]
+REPEAT = 5  # Number of repetitions, the fastest is reported
+
+
+#################################################
+# Functions #####################################
+#################################################
+def random_msgs(n):
+    """Generate random stamped pose and transform msgs.
+
+    Parameters
+    ----------
+    n : :py:obj:`int`
+        Number of messages.
+
+    Returns
+    -------
+    :py:obj:`tuple`
+        Lists containing the :py:obj:`!geometry_msgs.msgs.PoseStamped` and
+        :py:obj:`!geometry_msgs.msgs.TransformStamped` messages.
+    """
+    positions = np.random.uniform(-1.0, 1.0, (n, 3))
+    quaternions = np.random.randn(n, 4)
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+    pose_msgs = []
+    transform_msgs = []
+    for (x, y, z), (q1, q2, q3, q4) in zip(positions, quaternions):
+        pose_msg = PoseStamped()
+        pose_msg.header.frame_id = "panda_link0"
+        pose_msg.pose.position.x, pose_msg.pose.position.y = x, y
+        pose_msg.pose.position.z = z
+        pose_msg.pose.orientation.x, pose_msg.pose.orientation.y = q1, q2
+        pose_msg.pose.orientation.z, pose_msg.pose.orientation.w = q3, q4
+        pose_msgs.append(pose_msg)
+        transform_msg = TransformStamped()
+        transform_msg.header.frame_id = "panda_link0"
+        transform_msg.transform.translation.x = x
+        transform_msg.transform.translation.y = y
+        transform_msg.transform.translation.z = z
+        transform_msg.transform.rotation.x, transform_msg.transform.rotation.y = q1, q2
+        transform_msg.transform.rotation.z, transform_msg.transform.rotation.w = q3, q4
+        transform_msgs.append(transform_msg)
+    return pose_msgs, transform_msgs
+
+
+def matrix_2_pose_msg_stamped(H, frame_id):
+    """Per message conversion of a homogeneous transformation matrix into a
+    stamped pose msg.
+
+    Parameters
+    ----------
+    H : :py:obj:`numpy.ndarray`
+        4x4 homogeneous transformation matrix.
+    frame_id : :py:obj:`str`
+        The frame the pose is expressed in.
+
+    Returns
+    -------
+    :py:obj:`!geometry_msgs.msg.PoseStamped`
+        The stamped pose msg.
+    """
+    q = tf_conversions.transformations.quaternion_from_matrix(H)
+    pose_msg = PoseStamped()
+    pose_msg.header.frame_id = frame_id
+    pose_msg.pose.position.x = H[0, 3]
+    pose_msg.pose.position.y = H[1, 3]
+    pose_msg.pose.position.z = H[2, 3]
+    pose_msg.pose.orientation.x = q[0]
+    pose_msg.pose.orientation.y = q[1]
+    pose_msg.pose.orientation.z = q[2]
+    pose_msg.pose.orientation.w = q[3]
+    return pose_msg
+
+
+def benchmark(func):
+    """Return the fastest execution time of a function.
+
+    Parameters
+    ----------
+    func : :py:obj:`function`
+        The function you want to benchmark.
+
+    Returns
+    -------
+    :py:obj:`float`
+        Execution time in seconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=REPEAT))
+
+
+#################################################
+# Main script ###################################
+#################################################
+if __name__ == "__main__":
+
+    # Welcome message
+    print(
+        "== Conversions benchmark ==\n"
+        "Comparing per message conversions with their batch counterparts.\n"
+    )
+
+    # Run benchmarks
+    for n in BATCH_SIZES:
+        pose_msgs, transform_msgs = random_msgs(n)
+        H = pose_msgs_2_matrices(pose_msgs)
+        quaternions = matrices_2_quaternions(H)
+        cases = [
+            (
+                "PoseStamped -> matrix",
+                lambda: [pose_msg_stamped_2_matrix(msg) for msg in pose_msgs],
+                lambda: pose_msgs_2_matrices(pose_msgs),
+            ),
+            (
+                "TransformStamped -> matrix",
+                lambda: [transform_stamped_2_matrix(msg) for msg in transform_msgs],
+                lambda: transforms_stamped_2_matrices(transform_msgs),
+            ),
+            (
+                "matrix -> PoseStamped",
+                lambda: [matrix_2_pose_msg_stamped(H_i, "panda_link0") for H_i in H],
+                lambda: matrices_2_pose_msgs_stamped(H, "panda_link0"),
+            ),
+            (
+                "quaternion -> matrix",
+                lambda: [
+                    tf_conversions.transformations.quaternion_matrix(q)
+                    for q in quaternions
+                ],
+                lambda: quaternions_2_matrices(quaternions),
+            ),
+            (
+                "matrix -> quaternion",
+                lambda: [
+                    tf_conversions.transformations.quaternion_from_matrix(H_i)
+                    for H_i in H
+                ],
+                lambda: matrices_2_quaternions(H),
+            ),
+            (
+                "compose",
+                lambda: [np.dot(H_i, H_i) for H_i in H],
+                lambda: compose_matrices(H, H),
+            ),
+            (
+                "invert",
+                lambda: [np.linalg.inv(H_i) for H_i in H],
+                lambda: invert_matrices(H),
+            ),
+        ]
+
+        # Print results
+        print("N = %i" % n)
+        for name, per_msg_func, batch_func in cases:
+            t_per_msg = benchmark(per_msg_func)
+            t_batch = benchmark(batch_func)
+            print(
+                "  %-28s per message: %10.6f s  batch: %10.6f s  speedup: %7.1fx"
+                % (name, t_per_msg, t_batch, t_per_msg / max(t_batch, 1e-12))
+            )
+        print("")
@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+"""This script can be used to benchmark the moveit planners that can be used by the
+:py:class:`MoveitPlannerServer`. It runs the same set of (seeded) random pose, joint
+and cartesian path queries for each planner, both with and without the collision
+objects of the :file:`../cfg/moveit_scene_constraints.yaml` file. The success rate,
+planning time percentiles, trajectory duration and joint space path length are
+printed and saved to a results file, which can be compared with the results of a
+previous run.
+
+.. note::
+
+    **Usage:**
+    Start moveit (for example using the ``panda_moveit_config.launch`` file) and run
+    this script. The planners, number of queries, seed, number of concurrent
+    clients and the results file to compare with can be changed in the script
+    settings.
+
+Source code
+----------------------------
+.. literalinclude:: /../../panda_autograsp/scripts/benchmark_planners.py
+   :language: python
+   :linenos:
+   :lines: 25-
+"""
+
+# Main python packages
+import os
+import sys
+import json
+import time
+from multiprocessing.pool import ThreadPool
+import numpy as np
+from autolab_core import YamlConfig
+
+# ROS python packages
+import rospy
+import moveit_commander
+
+# ROS messages and services
+from std_msgs.msg import Header
+from moveit_msgs.msg import (
+    RobotState,
+    MotionPlanRequest,
+    MoveItErrorCodes,
+    CollisionObject,
+    PlanningScene,
+)
+from moveit_msgs.srv import (
+    ApplyPlanningScene,
+    GetCartesianPath,
+    GetMotionPlan,
+    GetPositionFK,
+)
+
+# Panda_autograsp modules, msgs and srvs
+from panda_autograsp.functions.moveit import (
+    add_collision_objects,
+    get_plan_duration,
+    get_joint_path_length,
+    joint_goal_constraints,
+    pose_goal_constraints,
+)
+
+#################################################
+# Script settings ###############################
+#################################################
+PLANNERS = [
+    "TRRTkConfigDefault",
+    "RRTConnectkConfigDefault",
+    "RRTkConfigDefault",
+    "PRMkConfigDefault",
+    "BiTRRTkConfigDefault",
+    "ESTkConfigDefault",
+]
+QUERY_TYPES = ["pose", "joint", "path"]
+N_QUERIES = 20  # Number of queries per query type
+N_WAYPOINTS = 4  # Number of waypoints of the cartesian path queries
+SEED = 0  # Random seed used for generating the queries
+N_CLIENTS = 1  # Number of queries that are planned concurrently
+COMPARE_FILE = None  # Results file of a previous run you want to compare with
+MOVE_GROUP = "panda_arm"
+END_EFFECTOR_LINK = "panda_gripper_center"
+POSE_REFERENCE_FRAME = "panda_link0"
+PERCENTILES = [50, 90, 99]
+GOAL_JOINT_TOLERANCE = 1e-4  # [rad]
+GOAL_POSITION_TOLERANCE = 1e-4  # [m]
+GOAL_ORIENTATION_TOLERANCE = 1e-3  # [rad]
+
+# Read configuration files
+FILE_PATH = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
+MAIN_CFG = YamlConfig(os.path.join(FILE_PATH, "../cfg/main_config.yaml"))
+PLANNING_TIME = MAIN_CFG["planning"]["general"]["planning_time"]
+EEF_STEP = MAIN_CFG["planning"]["cartesian"]["eef_step"]
+JUMP_THRESHOLD = MAIN_CFG["planning"]["cartesian"]["jump_threshold"]
+COLLISION_OBJ_CFG = YamlConfig(
+    os.path.join(FILE_PATH, "../cfg/moveit_scene_constraints.yaml")
+)
+RESULTS_DIR = os.path.abspath(os.path.join(FILE_PATH, "../data/benchmarks"))
+
+
+#################################################
+# Functions #####################################
+#################################################
+def create_robot_state(joint_values):
+    """Create a robot state message for the given move group joint values.
+
+    Parameters
+    ----------
+    joint_values : :py:obj:`list`
+        The active joint values of the move group.
+
+    Returns
+    -------
+    :py:obj:`!moveit_msgs.msg.RobotState`
+        The robot state.
+    """
+    robot_state = RobotState()
+    robot_state.is_diff = True
+    robot_state.joint_state.name = joint_names
+    robot_state.joint_state.position = joint_values
+    return robot_state
+
+
+def compute_fk(joint_values):
+    """Compute the end effector pose of the given move group joint values.
+
+    Parameters
+    ----------
+    joint_values : :py:obj:`list`
+        The active joint values of the move group.
+
+    Returns
+    -------
+    :py:obj:`!geometry_msgs.msg.Pose`
+        The end effector pose. None if the forward kinematics failed.
+    """
+    resp = compute_fk_srv(
+        header=Header(frame_id=POSE_REFERENCE_FRAME),
+        fk_link_names=[END_EFFECTOR_LINK],
+        robot_state=create_robot_state(joint_values),
+    )
+    if resp.error_code.val != MoveItErrorCodes.SUCCESS:
+        return None
+    return resp.pose_stamped[0].pose
+
+
+def create_queries(random_state):
+    """Create the benchmark queries. The goal poses are computed from random joint
+    values such that they are reachable.
+
+    Parameters
+    ----------
+    random_state : :py:obj:`numpy.random.RandomState`
+        The random state used for generating the queries.
+
+    Returns
+    -------
+    :py:obj:`list`
+        List containing the query dictionaries.
+    """
+    queries = []
+    for query_type in QUERY_TYPES:
+        for i in range(N_QUERIES):
+            start = random_state.uniform(bounds[:, 0], bounds[:, 1]).tolist()
+            goals = [
+                random_state.uniform(bounds[:, 0], bounds[:, 1]).tolist()
+                for _ in range(N_WAYPOINTS if query_type == "path" else 1)
+            ]
+            queries.append(
+                {
+                    "id": "%s_%i" % (query_type, i),
+                    "type": query_type,
+                    "start": start,
+                    "goals": goals,
+                    "goal_poses": [compute_fk(goal) for goal in goals],
+                }
+            )
+    return queries
+
+
+def run_query(query, planner):
+    """Plan a benchmark query.
+
+    Parameters
+    ----------
+    query : :py:obj:`dict`
+        The query.
+    planner : :py:obj:`str`
+        The planner id. Not used for cartesian path queries.
+
+    Returns
+    -------
+    :py:obj:`dict`
+        The query result.
+    """
+
+    # Plan query
+    start_state = create_robot_state(query["start"])
+    start_time = time.time()
+    try:
+        if query["type"] == "path":
+            resp = compute_cartesian_path_srv(
+                header=Header(frame_id=POSE_REFERENCE_FRAME),
+                start_state=start_state,
+                group_name=MOVE_GROUP,
+                link_name=END_EFFECTOR_LINK,
+                waypoints=query["goal_poses"],
+                max_step=EEF_STEP,
+                jump_threshold=JUMP_THRESHOLD,
+                avoid_collisions=True,
+            )
+            planning_time = time.time() - start_time
+            success = (
+                resp.error_code.val == MoveItErrorCodes.SUCCESS and resp.fraction >= 1.0
+            )
+            plan = resp.solution
+        else:
+            motion_plan_req = MotionPlanRequest()
+            motion_plan_req.group_name = MOVE_GROUP
+            motion_plan_req.planner_id = planner
+            motion_plan_req.allowed_planning_time = PLANNING_TIME
+            motion_plan_req.num_planning_attempts = 1
+            motion_plan_req.start_state = start_state
+            if query["type"] == "joint":
+                motion_plan_req.goal_constraints.append(
+                    joint_goal_constraints(
+                        joint_names, query["goals"][0], GOAL_JOINT_TOLERANCE
+                    )
+                )
+            else:
+                motion_plan_req.goal_constraints.append(
+                    pose_goal_constraints(
+                        query["goal_poses"][0],
+                        POSE_REFERENCE_FRAME,
+                        END_EFFECTOR_LINK,
+                        GOAL_POSITION_TOLERANCE,
+                        GOAL_ORIENTATION_TOLERANCE,
+                    )
+                )
+            resp = plan_kinematic_path_srv(motion_plan_req).motion_plan_response
+            planning_time = time.time() - start_time
+            success = resp.error_code.val == MoveItErrorCodes.SUCCESS
+            plan = resp.trajectory
+    except rospy.ServiceException as e:
+        rospy.logwarn("Query %s failed: %s" % (query["id"], e))
+        planning_time = time.time() - start_time
+        success = False
+
+    # Return result
+    return {
+        "query": query["id"],
+        "type": query["type"],
+        "success": success,
+        "planning_time": planning_time,
+        "duration": get_plan_duration(plan) if success else None,
+        "path_length": get_joint_path_length(plan) if success else None,
+    }
+
+
+def set_scene_constraints(enabled):
+    """Add or remove the collision objects of the scene constraints file.
+
+    Parameters
+    ----------
+    enabled : :py:obj:`bool`
+        Whether the collision objects should be present.
+    """
+    if enabled:
+        add_collision_objects(apply_planning_scene_srv, COLLISION_OBJ_CFG)
+    else:
+        planning_scene = PlanningScene()
+        planning_scene.is_diff = True
+        for name in COLLISION_OBJ_CFG["constraints"].keys():
+            collision_object = CollisionObject()
+            collision_object.id = name
+            collision_object.header.frame_id = POSE_REFERENCE_FRAME
+            collision_object.operation = CollisionObject.REMOVE
+            planning_scene.world.collision_objects.append(collision_object)
+        apply_planning_scene_srv(scene=planning_scene)
+
+
+def summarize(results):
+    """Compute the benchmark statistics of a number of query results.
+
+    Parameters
+    ----------
+    results : :py:obj:`list`
+        List containing the query results.
+
+    Returns
+    -------
+    :py:obj:`dict`
+        The benchmark statistics.
+    """
+    planning_times = np.array([result["planning_time"] for result in results])
+    successful = [result for result in results if result["success"]]
+    summary = {
+        "n_queries": len(results),
+        "success_rate": len(successful) / max(len(results), 1),
+    }
+    for percentile in PERCENTILES:
+        summary["planning_time_p%i" % percentile] = (
+            float(np.percentile(planning_times, percentile))
+            if len(results) > 0
+            else None
+        )
+    summary["mean_duration"] = (
+        float(np.mean([result["duration"] for result in successful]))
+        if successful
+        else None
+    )
+    summary["mean_path_length"] = (
+        float(np.mean([result["path_length"] for result in successful]))
+        if successful
+        else None
+    )
+    return summary
+
+
+def print_summary(summaries, previous_summaries=None):
+    """Print the benchmark statistics.
+
+    Parameters
+    ----------
+    summaries : :py:obj:`dict`
+        The benchmark statistics of each benchmark case.
+    previous_summaries : :py:obj:`dict`, optional
+        The benchmark statistics of a previous run, by default None. When given
+        the differences with the previous run are printed.
+    """
+    keys = ["success_rate"] + ["planning_time_p%i" % p for p in PERCENTILES]
+    keys += ["mean_duration", "mean_path_length"]
+    print("%-48s" % "case" + "".join(["%20s" % key for key in keys]))
+    for case, summary in sorted(summaries.items()):
+        row = "%-48s" % case
+        for key in keys:
+            value = summary[key]
+            previous = (
+                previous_summaries.get(case, {}).get(key)
+                if previous_summaries is not None
+                else None
+            )
+            if value is None:
+                row += "%20s" % "-"
+            elif previous is not None:
+                row += "%20s" % ("%.3f (%+.3f)" % (value, value - previous))
+            else:
+                row += "%20.3f" % value
+        print(row)
+
+
+#################################################
+# Main script ###################################
+#################################################
+if __name__ == "__main__":
+
+    # Welcome message
+    print(
+        "== Planner benchmark script ==\n"
+        "Comparing the moveit planners using seeded random queries.\n"
+    )
+
+    # Initialize node and connect to the moveit services
+    rospy.init_node("benchmark_planners")
+    moveit_commander.roscpp_initialize(sys.argv)
+    for service in [
+        "apply_planning_scene",
+        "plan_kinematic_path",
+        "compute_cartesian_path",
+        "compute_fk",
+    ]:
+        rospy.loginfo("Connecting to moveit '%s' service..." % service)
+        rospy.wait_for_service(service)
+    apply_planning_scene_srv = rospy.ServiceProxy(
+        "apply_planning_scene", ApplyPlanningScene
+    )
+    plan_kinematic_path_srv = rospy.ServiceProxy("plan_kinematic_path", GetMotionPlan)
+    compute_cartesian_path_srv = rospy.ServiceProxy(
+        "compute_cartesian_path", GetCartesianPath
+    )
+    compute_fk_srv = rospy.ServiceProxy("compute_fk", GetPositionFK)
+
+    # Retrieve joint limits and create queries
+    robot = moveit_commander.RobotCommander()
+    joint_names = robot.get_group(MOVE_GROUP).get_active_joints()
+    bounds = np.array([robot.get_joint(joint).bounds() for joint in joint_names])
+    queries = create_queries(np.random.RandomState(SEED))
+
+    # Run benchmarks
+    pool = ThreadPool(N_CLIENTS)
+    results = {}
+    summaries = {}
+    for scene_constraints in [True, False]:
+        set_scene_constraints(scene_constraints)
+        for planner in PLANNERS:
+            for query_type in QUERY_TYPES:
+
+                # Cartesian path queries do not depend on the planner
+                if query_type == "path" and planner != PLANNERS[0]:
+                    continue
+                case = "%s/%s/%s" % (
+                    query_type,
+                    "cartesian" if query_type == "path" else planner,
+                    "scene" if scene_constraints else "no_scene",
+                )
+                print("Running %s..." % case)
+                case_queries = [q for q in queries if q["type"] == query_type]
+                results[case] = pool.map(
+                    lambda query: run_query(query, planner), case_queries
+                )
+                summaries[case] = summarize(results[case])
+                if rospy.is_shutdown():
+                    sys.exit(0)
+    set_scene_constraints(True)
+
+    # Load previous results
+    previous_summaries = None
+    if COMPARE_FILE is not None:
+        with open(COMPARE_FILE, "r") as compare_file:
+            previous_summaries = json.load(compare_file)["summaries"]
+
+    # Print and save results
+    print("")
+    print_summary(summaries, previous_summaries)
+    if not os.path.isdir(RESULTS_DIR):
+        os.makedirs(RESULTS_DIR)
+    results_file = os.path.join(
+        RESULTS_DIR, "planner_benchmark_%s.json" % time.strftime("%Y%m%d-%H%M%S")
+    )
+    with open(results_file, "w") as f:
+        json.dump(
+            {
+                "settings": {
+                    "planners": PLANNERS,
+                    "query_types": QUERY_TYPES,
+                    "n_queries": N_QUERIES,
+                    "seed": SEED,
+                    "n_clients": N_CLIENTS,
+                    "planning_time": PLANNING_TIME,
+                },
+                "summaries": summaries,
+                "results": results,
+            },
+            f,
+            indent=4,
+        )
+    print("\nResults saved to %s." % results_file)
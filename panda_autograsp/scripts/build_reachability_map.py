@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""This script can be used to precompute the reachability map that is used by the
+:py:class:`PandaAutograspServer` to discard unreachable grasps before any motion
+planning is done. For the center of each workspace voxel and each approach direction
+it computes the IK solutions of a number of end effector rotations around the
+approach direction. The reachability score is the fraction of rotations for which a
+collision-free IK solution was found. The map is only valid for the static
+collision objects that were present while it was built. It therefore has to be
+rebuilt after the :file:`../cfg/moveit_scene_constraints.yaml` file has been
+changed.
+
+.. note::
+
+    **Usage:**
+    Start moveit (for example using the ``panda_moveit_config.launch`` file) and run
+    this script. The reachability map settings can be changed in the
+    ``planning.reachability`` section of the :file:`../cfg/main_config.yaml` file.
+    Make sure the octomap is empty as the IK solutions are checked against the full
+    planning scene.
+
+Source code
+----------------------------
+.. literalinclude:: /../../panda_autograsp/scripts/build_reachability_map.py
+   :language: python
+   :linenos:
+   :lines: 28-
+"""
+
+# Main python packages
+import os
+import sys
+import time
+import numpy as np
+from autolab_core import YamlConfig
+
+# ROS python packages
+import rospy
+import moveit_commander
+
+# ROS messages and services
+from moveit_msgs.msg import MoveItErrorCodes, PositionIKRequest
+from moveit_msgs.srv import ApplyPlanningScene, GetPositionIK
+
+# Panda_autograsp modules, msgs and srvs
+from panda_autograsp.functions.moveit import add_collision_objects
+from panda_autograsp.functions.conversions import matrices_2_pose_msgs
+from panda_autograsp.planning import ReachabilityMap
+
+#################################################
+# Script settings ###############################
+#################################################
+MOVE_GROUP = "panda_arm"
+END_EFFECTOR_LINK = "panda_gripper_center"
+POSE_REFERENCE_FRAME = "panda_link0"
+
+# Read configuration files
+FILE_PATH = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
+MAIN_CFG = YamlConfig(os.path.join(FILE_PATH, "../cfg/main_config.yaml"))
+REACHABILITY_CFG = MAIN_CFG["planning"]["reachability"]
+REACHABILITY_DIR = os.path.abspath(
+    os.path.join(FILE_PATH, "..", REACHABILITY_CFG["dir"])
+)
+COLLISION_OBJ_CFG = YamlConfig(
+    os.path.join(FILE_PATH, "../cfg/moveit_scene_constraints.yaml")
+)
+
+
+#################################################
+# Functions #####################################
+#################################################
+def has_ik_solution(pose_msg):
+    """Check whether a collision-free IK solution exists for an end effector pose.
+
+    Parameters
+    ----------
+    pose_msg : :py:obj:`!geometry_msgs.msg.Pose`
+        The end effector pose.
+
+    Returns
+    -------
+    :py:obj:`bool`
+        Bool specifying whether an IK solution was found.
+    """
+    ik_req = PositionIKRequest()
+    ik_req.group_name = MOVE_GROUP
+    ik_req.robot_state.is_diff = True
+    ik_req.avoid_collisions = True
+    ik_req.ik_link_name = END_EFFECTOR_LINK
+    ik_req.pose_stamped.header.frame_id = POSE_REFERENCE_FRAME
+    ik_req.pose_stamped.pose = pose_msg
+    ik_req.timeout = rospy.Duration.from_sec(REACHABILITY_CFG["ik_timeout"])
+    return compute_ik_srv(ik_req).error_code.val == MoveItErrorCodes.SUCCESS
+
+
+#################################################
+# Main script ###################################
+#################################################
+if __name__ == "__main__":
+
+    # Welcome message
+    print(
+        "== Build reachability map script ==\n"
+        "This script precomputes the reachability map that is used by the "
+        "panda_autograsp_server.\n"
+    )
+
+    # Initialize node and connect to the moveit services
+    rospy.init_node("build_reachability_map")
+    moveit_commander.roscpp_initialize(sys.argv)
+    for service in ["apply_planning_scene", "compute_ik"]:
+        rospy.loginfo("Connecting to moveit '%s' service..." % service)
+        rospy.wait_for_service(service)
+    apply_planning_scene_srv = rospy.ServiceProxy(
+        "apply_planning_scene", ApplyPlanningScene
+    )
+    compute_ik_srv = rospy.ServiceProxy("compute_ik", GetPositionIK)
+
+    # Add the static collision objects
+    add_collision_objects(apply_planning_scene_srv, COLLISION_OBJ_CFG)
+
+    # Create empty reachability map
+    workspace = REACHABILITY_CFG["workspace"]
+    reachability_map = ReachabilityMap.create(
+        [workspace["min"][axis] for axis in ["x", "y", "z"]],
+        [workspace["max"][axis] for axis in ["x", "y", "z"]],
+        REACHABILITY_CFG["voxel_size"],
+        ReachabilityMap.approach_directions(
+            REACHABILITY_CFG["tilt_angles"], REACHABILITY_CFG["n_azimuths"]
+        ),
+        frame_id=POSE_REFERENCE_FRAME,
+    )
+
+    # Compute the reachability scores
+    # NOTE: The rotations only cover 180 degrees as a parallel-jaw grasp is
+    # symmetric around its approach direction.
+    start_time = time.time()
+    yaws = np.linspace(0.0, np.pi, REACHABILITY_CFG["n_yaws"], endpoint=False)
+    centers = reachability_map.voxel_centers()
+    n_voxels = int(np.prod(reachability_map.shape))
+    for k in range(len(reachability_map.directions)):
+        rotations = reachability_map.approach_frames(k, yaws)
+        for n, index in enumerate(np.ndindex(*reachability_map.shape)):
+            H = np.tile(np.eye(4), (len(yaws), 1, 1))
+            H[:, :3, :3] = rotations
+            H[:, :3, 3] = centers[index]
+            n_reachable = sum(
+                has_ik_solution(pose_msg) for pose_msg in matrices_2_pose_msgs(H)
+            )
+            reachability_map.scores[index + (k,)] = int(
+                round(255.0 * n_reachable / len(yaws))
+            )
+            if rospy.is_shutdown():
+                sys.exit(0)
+            if (n + 1) % 1000 == 0:
+                print(
+                    "Approach direction %d/%d: Checked %d/%d voxels."
+                    % (k + 1, len(reachability_map.directions), n + 1, n_voxels)
+                )
+
+    # Save the reachability map
+    reachability_map.save(REACHABILITY_DIR)
+    print(
+        "Reachability map with %d voxels and %d approach directions saved to %s "
+        "(%.1f s, %.1f%% reachable)."
+        % (
+            n_voxels,
+            len(reachability_map.directions),
+            REACHABILITY_DIR,
+            time.time() - start_time,
+            100.0 * np.mean(np.asarray(reachability_map.scores) > 0),
+        )
+    )
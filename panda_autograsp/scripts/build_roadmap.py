@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""This script can be used to precompute the joint space roadmap that is used by the
+:py:class:`MoveitPlannerServer` to speed up the motion planning. It samples
+collision-free configurations of the main move group for which the end effector lies
+inside the configured workspace and connects them to their nearest neighbours. The
+roadmap is only valid for the static collision objects that were present while it
+was built. It therefore has to be rebuilt after the
+:file:`../cfg/moveit_scene_constraints.yaml` file has been changed.
+
+.. note::
+
+    **Usage:**
+    Start moveit (for example using the ``panda_moveit_config.launch`` file) and run
+    this script. The roadmap settings can be changed in the ``planning.roadmap``
+    section of the :file:`../cfg/main_config.yaml` file. Make sure the octomap is
+    empty as the configurations are checked against the full planning scene.
+
+Source code
+----------------------------
+.. literalinclude:: /../../panda_autograsp/scripts/build_roadmap.py
+   :language: python
+   :linenos:
+   :lines: 25-
+"""
+
+# Main python packages
+import os
+import sys
+import time
+import numpy as np
+from autolab_core import YamlConfig
+
+# ROS python packages
+import rospy
+import moveit_commander
+
+# ROS messages and services
+from std_msgs.msg import Header
+from moveit_msgs.msg import RobotState, MoveItErrorCodes, PlanningSceneComponents
+from moveit_msgs.srv import (
+    ApplyPlanningScene,
+    GetPlanningScene,
+    GetPositionFK,
+    GetStateValidity,
+)
+
+# Panda_autograsp modules, msgs and srvs
+from panda_autograsp.functions.moveit import (
+    add_collision_objects,
+    collision_objects_hash,
+)
+from panda_autograsp.planning import Roadmap
+
+#################################################
+# Script settings ###############################
+#################################################
+MOVE_GROUP = "panda_arm"
+END_EFFECTOR_LINK = "panda_gripper_center"
+POSE_REFERENCE_FRAME = "panda_link0"
+BATCH_SIZE = 100  # Number of configurations that are sampled at once
+
+# Read configuration files
+FILE_PATH = os.path.abspath(os.path.dirname(os.path.realpath(__file__)))
+MAIN_CFG = YamlConfig(os.path.join(FILE_PATH, "../cfg/main_config.yaml"))
+ROADMAP_CFG = MAIN_CFG["planning"]["roadmap"]
+ROADMAP_DIR = os.path.abspath(os.path.join(FILE_PATH, "..", ROADMAP_CFG["dir"]))
+COLLISION_OBJ_CFG = YamlConfig(
+    os.path.join(FILE_PATH, "../cfg/moveit_scene_constraints.yaml")
+)
+
+
+#################################################
+# Functions #####################################
+#################################################
+def is_valid(joint_values):
+    """Check whether a joint configuration is collision free.
+
+    Parameters
+    ----------
+    joint_values : :py:obj:`list`
+        The active joint values of the move group.
+
+    Returns
+    -------
+    :py:obj:`bool`
+        Bool specifying whether the configuration is valid.
+    """
+    robot_state = RobotState()
+    robot_state.is_diff = True
+    robot_state.joint_state.name = joint_names
+    robot_state.joint_state.position = joint_values
+    return check_state_validity_srv(
+        robot_state=robot_state, group_name=MOVE_GROUP
+    ).valid
+
+
+def are_valid(states):
+    """Check whether multiple joint configurations are collision free.
+
+    Parameters
+    ----------
+    states : :py:obj:`numpy.ndarray`
+        (M, D) array containing the active joint values of the move group.
+
+    Returns
+    -------
+    :py:obj:`numpy.ndarray`
+        (M,) bool array specifying which configurations are valid.
+    """
+    return np.array([is_valid(q) for q in np.asarray(states).tolist()], dtype=bool)
+
+
+def in_workspace(joint_values):
+    """Check whether the end effector of a joint configuration lies inside the
+    configured workspace.
+
+    Parameters
+    ----------
+    joint_values : :py:obj:`list`
+        The active joint values of the move group.
+
+    Returns
+    -------
+    :py:obj:`bool`
+        Bool specifying whether the end effector lies inside the workspace.
+    """
+    robot_state = RobotState()
+    robot_state.is_diff = True
+    robot_state.joint_state.name = joint_names
+    robot_state.joint_state.position = joint_values
+    resp = compute_fk_srv(
+        fk_link_names=[END_EFFECTOR_LINK], robot_state=robot_state, header=header
+    )
+    if resp.error_code.val != MoveItErrorCodes.SUCCESS:
+        return False
+    position = resp.pose_stamped[0].pose.position
+    workspace = ROADMAP_CFG["workspace"]
+    return all(
+        workspace["min"][axis] <= getattr(position, axis) <= workspace["max"][axis]
+        for axis in ["x", "y", "z"]
+    )
+
+
+#################################################
+# Main script ###################################
+#################################################
+if __name__ == "__main__":
+
+    # Welcome message
+    print(
+        "== Build roadmap script ==\n"
+        "This script precomputes the roadmap that is used by the "
+        "moveit_planner_server.\n"
+    )
+
+    # Initialize node and connect to the moveit services
+    rospy.init_node("build_roadmap")
+    moveit_commander.roscpp_initialize(sys.argv)
+    for service in [
+        "apply_planning_scene",
+        "get_planning_scene",
+        "check_state_validity",
+        "compute_fk",
+    ]:
+        rospy.loginfo("Connecting to moveit '%s' service..." % service)
+        rospy.wait_for_service(service)
+    apply_planning_scene_srv = rospy.ServiceProxy(
+        "apply_planning_scene", ApplyPlanningScene
+    )
+    get_planning_scene_srv = rospy.ServiceProxy("get_planning_scene", GetPlanningScene)
+    check_state_validity_srv = rospy.ServiceProxy(
+        "check_state_validity", GetStateValidity
+    )
+    compute_fk_srv = rospy.ServiceProxy("compute_fk", GetPositionFK)
+
+    # Add the static collision objects and compute their hash
+    add_collision_objects(apply_planning_scene_srv, COLLISION_OBJ_CFG)
+    components = PlanningSceneComponents()
+    components.components = PlanningSceneComponents.WORLD_OBJECT_GEOMETRY
+    scene = get_planning_scene_srv(components).scene
+    scene_hash = collision_objects_hash(scene.world.collision_objects)
+
+    # Retrieve joint limits
+    robot = moveit_commander.RobotCommander()
+    move_group = robot.get_group(MOVE_GROUP)
+    joint_names = move_group.get_active_joints()
+    bounds = np.array([robot.get_joint(joint).bounds() for joint in joint_names])
+    header = Header(frame_id=POSE_REFERENCE_FRAME)
+
+    # Sample valid configurations
+    start_time = time.time()
+    nodes = []
+    n_sampled = 0
+    while len(nodes) < ROADMAP_CFG["n_samples"] and not rospy.is_shutdown():
+        samples = np.random.uniform(
+            bounds[:, 0], bounds[:, 1], (BATCH_SIZE, len(joint_names))
+        )
+        for q in samples.tolist():
+            if in_workspace(q) and is_valid(q):
+                nodes.append(q)
+        n_sampled += BATCH_SIZE
+        print(
+            "Sampled %d/%d valid configurations (%d tried)."
+            % (len(nodes), ROADMAP_CFG["n_samples"], n_sampled)
+        )
+    if rospy.is_shutdown():
+        sys.exit(0)
+
+    # Connect configurations and save the roadmap
+    print("Connecting configurations...")
+    roadmap = Roadmap.build(
+        np.array(nodes[: ROADMAP_CFG["n_samples"]]),
+        joint_names,
+        scene_hash,
+        are_valid,
+        n_neighbors=ROADMAP_CFG["n_neighbors"],
+        resolution=ROADMAP_CFG["resolution"],
+        batch_size=ROADMAP_CFG["batch_size"],
+    )
+    roadmap.save(ROADMAP_DIR)
+    print(
+        "Roadmap with %d nodes and %d edges saved to %s (%.1f s)."
+        % (len(roadmap), roadmap.n_edges, ROADMAP_DIR, time.time() - start_time)
+    )
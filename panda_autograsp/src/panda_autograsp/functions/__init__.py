@@ -9,12 +9,35 @@
    functions.yes_or_no
    functions.draw_axis
    moveit.get_trajectory_duration
+   moveit.get_plan_duration
+   moveit.get_joint_path_length
+   moveit.pose_goal_constraints
+   moveit.joint_goal_constraints
+   moveit.collision_objects_hash
    moveit.plan_exists
    moveit.at_joint_target
+   moveit.create_collision_objects
    moveit.add_collision_objects
-   moveit.wait_for_state_update
+   moveit.collision_object_2_msg
+   moveit.load_mesh
+   trajectories.get_spline_limit_ratios
+   trajectories.scale_trajectory_time
+   trajectories.states_are_valid
+   trajectories.get_coarse_to_fine_ranks
+   trajectories.add_gripper_motion
+   trajectories.join_trajectories
    conversions.transform_stamped_2_matrix
    conversions.pose_msg_stamped_2_matrix
+   conversions.quaternions_2_matrices
+   conversions.matrices_2_quaternions
+   conversions.pose_msgs_2_matrices
+   conversions.matrices_2_pose_msgs
+   conversions.transform_pose_msgs
+   conversions.transforms_stamped_2_matrices
+   conversions.matrices_2_pose_msgs_stamped
+   conversions.matrices_2_transforms_stamped
+   conversions.compose_matrices
+   conversions.invert_matrices
 """
 
 # Import functions
@@ -17,6 +17,9 @@ import numpy as np
 # ROS transformation packages
 import tf_conversions
 
+# ROS messages and services
+from geometry_msgs.msg import Pose, PoseStamped, TransformStamped
+
 
 #################################################
 # Functions #####################################
@@ -81,3 +84,354 @@ def pose_msg_stamped_2_matrix(pose_msg):
 
     # Return homogeneous transformation matrix
     return H
+
+
+def quaternions_2_matrices(quaternions):
+    """Generate 4x4 homogeneous rotation matrices from a batch of quaternions.
+
+    Parameters
+    ----------
+    quaternions : :py:obj:`numpy.array`
+        (N, 4) array of quaternions specified as (x, y, z, w).
+
+    Returns
+    -------
+    :py:obj:`numpy.array`
+        (N, 4, 4) array of homogeneous rotation matrices.
+    """
+
+    # Normalize quaternions
+    q = np.asarray(quaternions, dtype=np.float64).reshape(-1, 4)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    x, y, z, w = q.T
+
+    # Generate homogeneous rotation matrices
+    H = np.zeros((q.shape[0], 4, 4))
+    H[:, 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+    H[:, 0, 1] = 2.0 * (x * y - z * w)
+    H[:, 0, 2] = 2.0 * (x * z + y * w)
+    H[:, 1, 0] = 2.0 * (x * y + z * w)
+    H[:, 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+    H[:, 1, 2] = 2.0 * (y * z - x * w)
+    H[:, 2, 0] = 2.0 * (x * z - y * w)
+    H[:, 2, 1] = 2.0 * (y * z + x * w)
+    H[:, 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+    H[:, 3, 3] = 1.0
+
+    # Return homogeneous rotation matrices
+    return H
+
+
+def matrices_2_quaternions(matrices):
+    """Generate quaternions from a batch of rotation or homogeneous transformation
+    matrices.
+
+    Parameters
+    ----------
+    matrices : :py:obj:`numpy.array`
+        (N, 3, 3) or (N, 4, 4) array of rotation or homogeneous transformation
+        matrices.
+
+    Returns
+    -------
+    :py:obj:`numpy.array`
+        (N, 4) array of quaternions specified as (x, y, z, w) with w >= 0.
+    """
+
+    # Retrieve rotation matrix elements
+    M = np.asarray(matrices, dtype=np.float64)
+    R = M.reshape((-1,) + M.shape[-2:])[:, :3, :3]
+    m00, m01, m02 = R[:, 0, 0], R[:, 0, 1], R[:, 0, 2]
+    m10, m11, m12 = R[:, 1, 0], R[:, 1, 1], R[:, 1, 2]
+    m20, m21, m22 = R[:, 2, 0], R[:, 2, 1], R[:, 2, 2]
+    trace = m00 + m11 + m22
+
+    # Compute the candidate quaternions
+    # NOTE: Each candidate is numerically stable when its largest component is
+    # large. We therefore select the candidate based on the largest diagonal term.
+    candidates = np.stack(
+        [
+            np.stack([1.0 + m00 - m11 - m22, m01 + m10, m02 + m20, m21 - m12], -1),
+            np.stack([m01 + m10, 1.0 - m00 + m11 - m22, m12 + m21, m02 - m20], -1),
+            np.stack([m02 + m20, m12 + m21, 1.0 - m00 - m11 + m22, m10 - m01], -1),
+            np.stack([m21 - m12, m02 - m20, m10 - m01, 1.0 + trace], -1),
+        ],
+        axis=1,
+    )
+    idx = np.argmax(np.stack([m00, m11, m22, trace], -1), axis=1)
+    q = candidates[np.arange(R.shape[0]), idx]
+
+    # Normalize quaternions and make the w component positive
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    q[q[:, 3] < 0.0] *= -1.0
+
+    # Return quaternions
+    return q
+
+
+def pose_msgs_2_matrices(pose_msgs):
+    """Generate 4x4 homogeneous transformation matrices from a batch of pose msgs.
+
+    Parameters
+    ----------
+    pose_msgs : :py:obj:`list`
+        List containing :py:obj:`!geometry_msgs.msgs.Pose` or
+        :py:obj:`!geometry_msgs.msgs.PoseStamped` messages.
+
+    Returns
+    -------
+    :py:obj:`numpy.array`
+        (N, 4, 4) array of homogeneous transformation matrices.
+    """
+
+    # Unpack pose msgs
+    poses = [getattr(pose_msg, "pose", pose_msg) for pose_msg in pose_msgs]
+    pose_array = np.array(
+        [
+            [
+                pose.position.x,
+                pose.position.y,
+                pose.position.z,
+                pose.orientation.x,
+                pose.orientation.y,
+                pose.orientation.z,
+                pose.orientation.w,
+            ]
+            for pose in poses
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 7)
+
+    # Generate homogeneous transformation matrices
+    H = quaternions_2_matrices(pose_array[:, 3:])
+    H[:, :3, 3] = pose_array[:, :3]
+
+    # Return homogeneous transformation matrices
+    return H
+
+
+def matrices_2_pose_msgs(matrices):
+    """Generate pose msgs from a batch of 4x4 homogeneous transformation matrices.
+
+    Parameters
+    ----------
+    matrices : :py:obj:`numpy.array`
+        (N, 4, 4) array of homogeneous transformation matrices.
+
+    Returns
+    -------
+    :py:obj:`list`
+        List containing :py:obj:`!geometry_msgs.msgs.Pose` messages.
+    """
+
+    # Retrieve positions and orientations
+    H = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    pose_array = np.concatenate([H[:, :3, 3], matrices_2_quaternions(H)], axis=1)
+
+    # Create pose msgs
+    pose_msgs = []
+    for x, y, z, q1, q2, q3, q4 in pose_array.tolist():
+        pose_msg = Pose()
+        pose_msg.position.x = x
+        pose_msg.position.y = y
+        pose_msg.position.z = z
+        pose_msg.orientation.x = q1
+        pose_msg.orientation.y = q2
+        pose_msg.orientation.z = q3
+        pose_msg.orientation.w = q4
+        pose_msgs.append(pose_msg)
+
+    # Return pose msgs
+    return pose_msgs
+
+
+def transform_pose_msgs(transform, pose_msgs):
+    """Apply a homogeneous transformation to a batch of pose msgs.
+
+    Parameters
+    ----------
+    transform : :py:obj:`numpy.array`
+        Homogeneous 4x4 transformation matrix.
+    pose_msgs : :py:obj:`list`
+        List containing :py:obj:`!geometry_msgs.msgs.Pose` or
+        :py:obj:`!geometry_msgs.msgs.PoseStamped` messages.
+
+    Returns
+    -------
+    :py:obj:`list`
+        List containing the transformed :py:obj:`!geometry_msgs.msgs.Pose`
+        messages.
+    """
+
+    # Transform poses
+    return matrices_2_pose_msgs(np.matmul(transform, pose_msgs_2_matrices(pose_msgs)))
+
+
+def transforms_stamped_2_matrices(transforms_stamped):
+    """Generate 4x4 homogeneous transformation matrices from a batch of
+    transform_stamped msgs.
+
+    Parameters
+    ----------
+    transforms_stamped : :py:obj:`list`
+        List containing :py:obj:`!geometry_msgs.msgs.TransformStamped` messages.
+
+    Returns
+    -------
+    :py:obj:`numpy.array`
+        (N, 4, 4) array of homogeneous transformation matrices.
+    """
+
+    # Unpack transform stamped msgs
+    transform_array = np.array(
+        [
+            [
+                transform_stamped.transform.translation.x,
+                transform_stamped.transform.translation.y,
+                transform_stamped.transform.translation.z,
+                transform_stamped.transform.rotation.x,
+                transform_stamped.transform.rotation.y,
+                transform_stamped.transform.rotation.z,
+                transform_stamped.transform.rotation.w,
+            ]
+            for transform_stamped in transforms_stamped
+        ],
+        dtype=np.float64,
+    ).reshape(-1, 7)
+
+    # Generate homogeneous transformation matrices
+    H = quaternions_2_matrices(transform_array[:, 3:])
+    H[:, :3, 3] = transform_array[:, :3]
+
+    # Return homogeneous transformation matrices
+    return H
+
+
+def matrices_2_pose_msgs_stamped(matrices, frame_id, stamp=None):
+    """Generate stamped pose msgs from a batch of 4x4 homogeneous transformation
+    matrices.
+
+    Parameters
+    ----------
+    matrices : :py:obj:`numpy.array`
+        (N, 4, 4) array of homogeneous transformation matrices.
+    frame_id : :py:obj:`str`
+        The frame in which the poses are expressed.
+    stamp : :py:obj:`!rospy.Time`, optional
+        The header stamp of the poses, by default left empty.
+
+    Returns
+    -------
+    :py:obj:`list`
+        List containing :py:obj:`!geometry_msgs.msgs.PoseStamped` messages.
+    """
+
+    # Create stamped pose msgs
+    pose_msgs = []
+    for pose in matrices_2_pose_msgs(matrices):
+        pose_msg = PoseStamped()
+        pose_msg.header.frame_id = frame_id
+        if stamp is not None:
+            pose_msg.header.stamp = stamp
+        pose_msg.pose = pose
+        pose_msgs.append(pose_msg)
+
+    # Return stamped pose msgs
+    return pose_msgs
+
+
+def matrices_2_transforms_stamped(matrices, frame_id, child_frame_ids, stamp=None):
+    """Generate transform_stamped msgs from a batch of 4x4 homogeneous transformation
+    matrices.
+
+    Parameters
+    ----------
+    matrices : :py:obj:`numpy.array`
+        (N, 4, 4) array of homogeneous transformation matrices.
+    frame_id : :py:obj:`str`
+        The parent frame of the transforms.
+    child_frame_ids : :py:obj:`list`
+        List containing the child frame of each transform.
+    stamp : :py:obj:`!rospy.Time`, optional
+        The header stamp of the transforms, by default left empty.
+
+    Returns
+    -------
+    :py:obj:`list`
+        List containing :py:obj:`!geometry_msgs.msgs.TransformStamped` messages.
+    """
+
+    # Retrieve translations and rotations
+    H = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    transform_array = np.concatenate([H[:, :3, 3], matrices_2_quaternions(H)], axis=1)
+
+    # Create transform stamped msgs
+    transforms_stamped = []
+    for child_frame_id, (x, y, z, q1, q2, q3, q4) in zip(
+        child_frame_ids, transform_array.tolist()
+    ):
+        transform_stamped = TransformStamped()
+        transform_stamped.header.frame_id = frame_id
+        if stamp is not None:
+            transform_stamped.header.stamp = stamp
+        transform_stamped.child_frame_id = child_frame_id
+        transform_stamped.transform.translation.x = x
+        transform_stamped.transform.translation.y = y
+        transform_stamped.transform.translation.z = z
+        transform_stamped.transform.rotation.x = q1
+        transform_stamped.transform.rotation.y = q2
+        transform_stamped.transform.rotation.z = q3
+        transform_stamped.transform.rotation.w = q4
+        transforms_stamped.append(transform_stamped)
+
+    # Return transform stamped msgs
+    return transforms_stamped
+
+
+def compose_matrices(matrices_a, matrices_b):
+    """Compose two batches of 4x4 homogeneous transformation matrices (A * B).
+    Batches of size one are broadcasted against the other batch.
+
+    Parameters
+    ----------
+    matrices_a : :py:obj:`numpy.array`
+        (N, 4, 4) or (4, 4) array of homogeneous transformation matrices.
+    matrices_b : :py:obj:`numpy.array`
+        (N, 4, 4) or (4, 4) array of homogeneous transformation matrices.
+
+    Returns
+    -------
+    :py:obj:`numpy.array`
+        (N, 4, 4) array of composed homogeneous transformation matrices.
+    """
+    return np.matmul(
+        np.asarray(matrices_a, dtype=np.float64).reshape(-1, 4, 4),
+        np.asarray(matrices_b, dtype=np.float64).reshape(-1, 4, 4),
+    )
+
+
+def invert_matrices(matrices):
+    """Invert a batch of 4x4 homogeneous transformation matrices. Uses the
+    rigid body structure of the matrices instead of a general matrix inverse.
+
+    Parameters
+    ----------
+    matrices : :py:obj:`numpy.array`
+        (N, 4, 4) array of homogeneous transformation matrices.
+
+    Returns
+    -------
+    :py:obj:`numpy.array`
+        (N, 4, 4) array of inverted homogeneous transformation matrices.
+    """
+
+    # Compute inverse rotation and translation
+    H = np.asarray(matrices, dtype=np.float64).reshape(-1, 4, 4)
+    R_inv = np.transpose(H[:, :3, :3], (0, 2, 1))
+    H_inv = np.zeros_like(H)
+    H_inv[:, :3, :3] = R_inv
+    H_inv[:, :3, 3] = -np.einsum("nij,nj->ni", R_inv, H[:, :3, 3])
+    H_inv[:, 3, 3] = 1.0
+
+    # Return inverted matrices
+    return H_inv
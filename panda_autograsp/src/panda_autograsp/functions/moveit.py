@@ -11,12 +11,30 @@ try:
 except NameError:
     pass
 
+# Main python packages
+import copy
+import hashlib
+from io import BytesIO
+import numpy as np
+
 # ROS python packages
 import rospy
+import pyassimp
 from pyassimp.errors import AssimpError
 
 # ROS messages and services
-from moveit_msgs.msg import DisplayTrajectory
+from moveit_msgs.msg import (
+    DisplayTrajectory,
+    Constraints,
+    JointConstraint,
+    PositionConstraint,
+    OrientationConstraint,
+    CollisionObject,
+    PlanningScene,
+)
+from geometry_msgs.msg import Pose, Point
+from shape_msgs.msg import SolidPrimitive, MeshTriangle
+from shape_msgs.msg import Plane as PlaneMsg, Mesh as MeshMsg
 
 # Panda_autograsp modules, msgs and srvs
 from panda_autograsp.moveit_collision_objects import Box, Plane, Cylinder, Sphere, Mesh
@@ -68,6 +86,165 @@ def get_trajectory_duration(trajectory):
     return duration
 
 
+def get_plan_duration(plan):
+    """This function returns the duration of a given moveit plan.
+
+    Parameters
+    ----------
+    plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        The computed robot trajectory.
+
+    Returns
+    -------
+    :py:obj:`float`
+        Plan duration in seconds.
+    """
+
+    # Retrieve duration of the last trajectory point
+    if len(plan.joint_trajectory.points) >= 1:
+        return plan.joint_trajectory.points[-1].time_from_start.to_sec()
+    else:
+        return 0.0
+
+
+def get_joint_path_length(plan):
+    """This function returns the joint space path length of a given moveit plan.
+
+    Parameters
+    ----------
+    plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        The computed robot trajectory.
+
+    Returns
+    -------
+    :py:obj:`float`
+        The summed euclidean joint space distance between the trajectory points
+        in radians.
+    """
+
+    # Compute path length
+    if len(plan.joint_trajectory.points) < 2:
+        return 0.0
+    positions = np.array(
+        [point.positions for point in plan.joint_trajectory.points], dtype=np.float64
+    )
+    return float(np.sum(np.linalg.norm(np.diff(positions, axis=0), axis=1)))
+
+
+def pose_goal_constraints(
+    pose, frame_id, link_name, position_tolerance, orientation_tolerance
+):
+    """Create the moveit goal constraints for a given end effector pose. This is
+    the python equivalent of the moveit ``constructGoalConstraints`` function.
+
+    Parameters
+    ----------
+    pose : :py:obj:`!geometry_msgs.msg.Pose`
+        The end effector goal pose.
+    frame_id : :py:obj:`str`
+        The frame in which the pose is expressed.
+    link_name : :py:obj:`str`
+        The link that needs to reach the goal pose.
+    position_tolerance : :py:obj:`float`
+        The goal position tolerance in meters.
+    orientation_tolerance : :py:obj:`float`
+        The goal orientation tolerance in radians.
+
+    Returns
+    -------
+    :py:obj:`!moveit_msgs.msg.Constraints`
+        The goal constraints.
+    """
+
+    # Create position constraint
+    position_constraint = PositionConstraint()
+    position_constraint.header.frame_id = frame_id
+    position_constraint.link_name = link_name
+    region = SolidPrimitive()
+    region.type = SolidPrimitive.SPHERE
+    region.dimensions = [position_tolerance]
+    region_pose = Pose()
+    region_pose.position = pose.position
+    region_pose.orientation.w = 1.0
+    position_constraint.constraint_region.primitives.append(region)
+    position_constraint.constraint_region.primitive_poses.append(region_pose)
+    position_constraint.weight = 1.0
+
+    # Create orientation constraint
+    orientation_constraint = OrientationConstraint()
+    orientation_constraint.header.frame_id = frame_id
+    orientation_constraint.link_name = link_name
+    orientation_constraint.orientation = pose.orientation
+    orientation_constraint.absolute_x_axis_tolerance = orientation_tolerance
+    orientation_constraint.absolute_y_axis_tolerance = orientation_tolerance
+    orientation_constraint.absolute_z_axis_tolerance = orientation_tolerance
+    orientation_constraint.weight = 1.0
+
+    # Return goal constraints
+    constraints = Constraints()
+    constraints.position_constraints.append(position_constraint)
+    constraints.orientation_constraints.append(orientation_constraint)
+    return constraints
+
+
+def joint_goal_constraints(joint_names, joint_values, tolerance):
+    """Create the moveit goal constraints for a given joint goal.
+
+    Parameters
+    ----------
+    joint_names : :py:obj:`list`
+        The names of the joints.
+    joint_values : :py:obj:`list`
+        The joint goal values.
+    tolerance : :py:obj:`float`
+        The goal joint tolerance in radians.
+
+    Returns
+    -------
+    :py:obj:`!moveit_msgs.msg.Constraints`
+        The goal constraints.
+    """
+
+    # Create joint constraints
+    constraints = Constraints()
+    for joint_name, joint_value in zip(joint_names, joint_values):
+        joint_constraint = JointConstraint()
+        joint_constraint.joint_name = joint_name
+        joint_constraint.position = joint_value
+        joint_constraint.tolerance_above = tolerance
+        joint_constraint.tolerance_below = tolerance
+        joint_constraint.weight = 1.0
+        constraints.joint_constraints.append(joint_constraint)
+
+    # Return goal constraints
+    return constraints
+
+
+def collision_objects_hash(collision_objects):
+    """Compute a hash of a number of collision objects. The hash does not depend
+    on the order of the collision objects or their header stamps.
+
+    Parameters
+    ----------
+    collision_objects : :py:obj:`list`
+        List containing :py:obj:`!moveit_msgs.msg.CollisionObject` messages.
+
+    Returns
+    -------
+    :py:obj:`str`
+        The hash of the collision objects.
+    """
+    objects_hash = hashlib.md5()
+    for collision_object in sorted(collision_objects, key=lambda obj: obj.id):
+        collision_object = copy.deepcopy(collision_object)
+        collision_object.header.seq = 0
+        collision_object.header.stamp = rospy.Time()
+        buff = BytesIO()
+        collision_object.serialize(buff)
+        objects_hash.update(buff.getvalue())
+    return objects_hash.hexdigest()
+
+
 def plan_exists(plan):
     """This function can be used to check if a plan trajectory was computed.
 
@@ -120,37 +297,36 @@ def at_joint_target(current, desired, goal_tolerance):
         Bool specifying if move_group is already at the goal target.
     """
 
-    # Round to the goal tolerance
-    accuracy = str(goal_tolerance)[::-1].find(".")
-    current = [round(item, accuracy) for item in current]
-    desired = [round(item, accuracy) for item in desired]
-
-    # Check if move_group is at joint target
-    if current == desired:
-        return True  # Already at goal
-    else:
-        return False  # Not already at goal
+    # Check if all joints are within the goal tolerance
+    current = np.array(list(current), dtype=np.float64)
+    desired = np.array(list(desired), dtype=np.float64)
+    return bool(np.all(np.abs(current - desired) <= goal_tolerance))
 
 
-def add_collision_objects(scene_commander, collision_cfg):
-    """Add the collision objects that are specified in the
-    collision_cfg :py:obj:`collections.OrderedDict` to the
-    moveit planner scene. Supported constraint types are:
+def create_collision_objects(collision_cfg):
+    """Create the collision objects that are specified in the
+    collision_cfg :py:obj:`collections.OrderedDict`. Supported
+    constraint types are:
 
         * Box
-        * Cube
+        * Plane
         * Cylinder
+        * Sphere
         * Mesh
 
     For more information see http://bit.ly/32GuuMN.
 
     Parameters
     ----------
-    scene_commander : :py:obj:`!moveit_commander.PlanningSceneInterface`
-        The moveit scene commander object.
     collision_cfg : :py:obj:`collections.OrderedDict`
         The dictionary specifying all the moveit scene
         constraints.
+
+    Returns
+    -------
+    :py:obj:`list`
+        List containing the :py:mod:`panda_autograsp.moveit_collision_objects`
+        collision objects.
     """
 
     # Initialize collision lists
@@ -401,148 +577,170 @@ def add_collision_objects(scene_commander, collision_cfg):
                 "check your configuration dictionary and try again." % value["type"]
             )
 
-    # Add collision objects to scene
-    for collision_obj in collision_objects:
+    # Return collision objects
+    return collision_objects
 
-        # Add boxes
-        if collision_obj.type.lower() == "box":
-            scene_commander.add_box(
-                name=collision_obj.name,
-                pose=collision_obj.pose,
-                size=collision_obj.size,
-            )
-            result = wait_for_state_update(scene_commander, collision_obj)
-            if not result:
-                rospy.logwarn(
-                    "Adding collision object %s of type %s failed."
-                    % (collision_obj.name, collision_obj.type)
-                )
 
-        # Add planes
-        elif collision_obj.type.lower() == "plane":
-            scene_commander.add_plane(
-                name=collision_obj.name,
-                pose=collision_obj.pose,
-                normal=collision_obj.normal,
-                offset=collision_obj.offset,
-            )
-            result = wait_for_state_update(scene_commander, collision_obj)
-            if not result:
-                rospy.logwarn(
-                    "Adding collision object %s of type %s failed."
-                    % (collision_obj.name, collision_obj.type)
-                )
+def add_collision_objects(apply_planning_scene_srv, collision_cfg):
+    """Add the collision objects that are specified in the
+    collision_cfg :py:obj:`collections.OrderedDict` to the
+    moveit planner scene. All collision objects are added using a
+    single planning scene diff. Supported constraint types are:
 
-        # Add cylinders
-        elif collision_obj.type.lower() == "cylinder":
-            scene_commander.add_cylinder(
-                name=collision_obj.name,
-                pose=collision_obj.pose,
-                height=collision_obj.height,
-                radius=collision_obj.radius,
-            )
-            result = wait_for_state_update(scene_commander, collision_obj)
-            if not result:
-                rospy.logwarn(
-                    "Adding collision object %s of type %s failed."
-                    % (collision_obj.name, collision_obj.type)
-                )
+        * Box
+        * Plane
+        * Cylinder
+        * Sphere
+        * Mesh
 
-        # Add sphere
-        elif collision_obj.type.lower() == "sphere":
-            scene_commander.add_sphere(
-                name=collision_obj.name,
-                pose=collision_obj.pose,
-                radius=collision_obj.radius,
-            )
-            result = wait_for_state_update(scene_commander, collision_obj)
-            if not result:
-                rospy.logwarn(
-                    "Adding collision object %s of type %s failed."
-                    % (collision_obj.name, collision_obj.type)
-                )
+    For more information see http://bit.ly/32GuuMN.
 
-        # Add mesh
-        # FIXME: When a mesh is given it crashes the node
-        elif collision_obj.type.lower() == "mesh":
-            try:
-                scene_commander.add_mesh(
-                    name=collision_obj.name,
-                    pose=collision_obj.pose,
-                    filename=collision_obj.file_name,
-                )
-            except AssimpError as e:
-                rospy.logwarn(
-                    "Adding collision object %s of type %s failed "
-                    "because %s mesh could not be loaded. Please "
-                    "check the moveit_scene_constraints.yaml file "
-                    "and try again"
-                    % (collision_obj.name, collision_obj.type, collision_obj.file_name)
-                )
-                continue
-            result = wait_for_state_update(scene_commander, collision_obj)
-            if not result:
-                rospy.logwarn(
-                    "Adding collision object %s of type %s failed."
-                    % (collision_obj.name, collision_obj.type)
-                )
-        else:
+    Parameters
+    ----------
+    apply_planning_scene_srv : :py:obj:`!rospy.ServiceProxy`
+        The moveit ``apply_planning_scene`` service proxy.
+    collision_cfg : :py:obj:`collections.OrderedDict`
+        The dictionary specifying all the moveit scene
+        constraints.
+
+    Returns
+    -------
+    :py:obj:`bool`
+        Boolean specifying whether the scene update was successful.
+    """
+
+    # Create collision object messages
+    collision_object_msgs = []
+    for collision_obj in create_collision_objects(collision_cfg):
+        try:
+            collision_object_msgs.append(collision_object_2_msg(collision_obj))
+        except AssimpError:
             rospy.logwarn(
-                "Collision object type %s is not vallid. As a result the %s "
-                "collision object will be scripted"
-                % (collision_obj.type, collision_obj.name)
+                "Adding collision object %s of type %s failed "
+                "because %s mesh could not be loaded. Please "
+                "check the moveit_scene_constraints.yaml file "
+                "and try again"
+                % (collision_obj.name, collision_obj.type, collision_obj.file_name)
             )
-            continue  # Go to next value
 
+    # Add all collision objects to the scene using a single planning scene diff
+    planning_scene = PlanningScene()
+    planning_scene.is_diff = True
+    planning_scene.world.collision_objects = collision_object_msgs
+    try:
+        result = apply_planning_scene_srv(scene=planning_scene)
+    except rospy.ServiceException as e:
+        rospy.logwarn("Adding collision objects to the scene failed: %s" % e)
+        return False
+    if not result.success:
+        rospy.logwarn(
+            "Adding collision objects %s to the scene failed."
+            % [collision_obj.id for collision_obj in collision_object_msgs]
+        )
+        return False
+    return True
 
-def wait_for_state_update(
-    scene_commander, collision_obj, is_known=False, is_attached=False, timeout=4
-):
-    """Validate if collision object state change was successful.
+
+def collision_object_2_msg(collision_obj):
+    """Convert a :py:mod:`panda_autograsp.moveit_collision_objects` collision
+    object into a moveit collision object message.
 
     Parameters
     ----------
-    scene_commander : :py:obj:`!moveit_commander.PlanningSceneInterface`
-        The moveit scene commander object.
     collision_obj : :py:obj:`moveit_collision_objects`
         The moveit collision object.
-    is_known : bool, optional
-        Bool specifying whether an object is known, by default False
-    is_attached : bool, optional
-        Bool specifying whether an object is attached to something, by default False
-    timeout : int, optional
-        The validation timeout time, by default 4
 
     Returns
     -------
-    bool
-        Boolean specifying whether the scene update was successful.
+    :py:obj:`!moveit_msgs.msg.CollisionObject`
+        The collision object message.
 
-    .. note::
-        Note that attaching the box will remove it from known_objects.
+    Raises
+    ------
+    :py:obj:`ValueError`
+        If the collision object type is not supported.
     """
 
-    # Ensuring Collision Updates Are Received
-    start = rospy.get_time()
-    seconds = rospy.get_time()
-    while (seconds - start < timeout) and not rospy.is_shutdown():
+    # Create collision object message
+    collision_object_msg = CollisionObject()
+    collision_object_msg.header = collision_obj.pose.header
+    collision_object_msg.id = collision_obj.name
+    collision_object_msg.operation = CollisionObject.ADD
+
+    # Add collision object shape
+    collision_type = collision_obj.type.lower()
+    if collision_type == "plane":
+        plane = PlaneMsg()
+        plane.coef = list(collision_obj.normal) + [collision_obj.offset]
+        collision_object_msg.planes.append(plane)
+        collision_object_msg.plane_poses.append(collision_obj.pose.pose)
+    elif collision_type == "mesh":
+        collision_object_msg.meshes.append(load_mesh(collision_obj.file_name))
+        collision_object_msg.mesh_poses.append(collision_obj.pose.pose)
+    else:
+        primitive = SolidPrimitive()
+        if collision_type == "box":
+            primitive.type = SolidPrimitive.BOX
+            primitive.dimensions = list(collision_obj.size)
+        elif collision_type == "cylinder":
+            primitive.type = SolidPrimitive.CYLINDER
+            primitive.dimensions = [collision_obj.height, collision_obj.radius]
+        elif collision_type == "sphere":
+            primitive.type = SolidPrimitive.SPHERE
+            primitive.dimensions = [collision_obj.radius]
+        else:
+            raise ValueError(
+                "Collision object type %s is not valid." % collision_obj.type
+            )
+        collision_object_msg.primitives.append(primitive)
+        collision_object_msg.primitive_poses.append(collision_obj.pose.pose)
 
-        # Test if the box is in attached objects
-        attached_objects = scene_commander.get_attached_objects(
-            list(collision_obj.name)
-        )
-        is_attached = len(attached_objects.keys()) > 0
+    # Return collision object message
+    return collision_object_msg
+
+
+def load_mesh(file_name, scale=(1.0, 1.0, 1.0)):
+    """Load a mesh file into a mesh message.
 
-        # Test if the box is in the scene.
-        is_known = collision_obj.name in scene_commander.get_known_object_names()
+    Parameters
+    ----------
+    file_name : :py:obj:`str`
+        The location of the mesh file.
+    scale : :py:obj:`tuple`, optional
+        The mesh scale, by default (1.0, 1.0, 1.0).
 
-        # Test if we are in the expected state
-        if (is_attached == is_attached) and (is_known == is_known):
-            return True
+    Returns
+    -------
+    :py:obj:`!shape_msgs.msg.Mesh`
+        The mesh message.
 
-        # Sleep so that we give other threads time on the processor
-        rospy.sleep(0.1)
-        seconds = rospy.get_time()
+    Raises
+    ------
+    :py:obj:`!pyassimp.errors.AssimpError`
+        If the mesh file could not be loaded.
+    """
+
+    # Load mesh file
+    scene = pyassimp.load(file_name)
+    if not scene.meshes or len(scene.meshes) == 0:
+        pyassimp.release(scene)
+        raise AssimpError("There are no meshes in the file %s." % file_name)
+    if len(scene.meshes[0].faces) == 0:
+        pyassimp.release(scene)
+        raise AssimpError("There are no faces in the mesh %s." % file_name)
+
+    # Create mesh message
+    mesh = MeshMsg()
+    for face in scene.meshes[0].faces:
+        triangle = MeshTriangle()
+        indices = face.indices if hasattr(face, "indices") else face
+        triangle.vertex_indices = [int(index) for index in indices[:3]]
+        mesh.triangles.append(triangle)
+    for vertex in scene.meshes[0].vertices:
+        mesh.vertices.append(
+            Point(vertex[0] * scale[0], vertex[1] * scale[1], vertex[2] * scale[2])
+        )
+    pyassimp.release(scene)
 
-    # If we exited the while loop without returning then we timed out
-    return False
+    # Return mesh message
+    return mesh
@@ -0,0 +1,309 @@
+"""A number of functions that can be used to post-process moveit trajectories.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import copy
+import numpy as np
+
+# ROS python packages
+import rospy
+
+# ROS messages and services
+from trajectory_msgs.msg import JointTrajectoryPoint
+
+# Spline evaluation settings
+SPLINE_SAMPLES = 20  # Number of samples per trajectory segment
+
+
+#################################################
+# Functions #####################################
+#################################################
+def get_spline_limit_ratios(
+    trajectory, max_velocities, max_accelerations, n_samples=SPLINE_SAMPLES
+):
+    """Evaluate the quintic splines that the joint trajectory controller
+    interpolates between the trajectory points and compare their velocities and
+    accelerations with the joint limits. Points without accelerations use zero
+    accelerations. All segments and joints are evaluated at once.
+
+    Parameters
+    ----------
+    trajectory : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        The timed trajectory.
+    max_velocities : :py:obj:`list`
+        The maximum velocity of each joint in the trajectory [rad/s].
+    max_accelerations : :py:obj:`list`
+        The maximum acceleration of each joint in the trajectory [rad/s^2].
+    n_samples : :py:obj:`int`, optional
+        The number of samples per trajectory segment, by default 20.
+
+    Returns
+    -------
+    :py:obj:`float`
+        The largest ratio between the spline velocity and the velocity limit.
+    :py:obj:`float`
+        The largest ratio between the spline acceleration and the acceleration
+        limit.
+    """
+
+    # Retrieve trajectory points
+    points = trajectory.joint_trajectory.points
+    if len(points) < 2:
+        return 0.0, 0.0
+    n_joints = len(points[0].positions)
+    p = np.array([point.positions for point in points], dtype=np.float64)
+    v = np.array(
+        [point.velocities or [0.0] * n_joints for point in points], dtype=np.float64
+    )
+    a = np.array(
+        [point.accelerations or [0.0] * n_joints for point in points],
+        dtype=np.float64,
+    )
+    t = np.array([point.time_from_start.to_sec() for point in points])
+    T = np.maximum(np.diff(t), 1e-9)[:, None]
+
+    # Compute quintic spline coefficients of each segment
+    # NOTE: Same boundary conditions as the joint_trajectory_controller splines.
+    p0, p1, v0, v1, a0, a1 = p[:-1], p[1:], v[:-1], v[1:], a[:-1], a[1:]
+    c3 = (
+        -20.0 * p0
+        + 20.0 * p1
+        - 3.0 * a0 * T**2
+        + a1 * T**2
+        - 12.0 * v0 * T
+        - 8.0 * v1 * T
+    ) / (2.0 * T**3)
+    c4 = (
+        30.0 * p0
+        - 30.0 * p1
+        + 3.0 * a0 * T**2
+        - 2.0 * a1 * T**2
+        + 16.0 * v0 * T
+        + 14.0 * v1 * T
+    ) / (2.0 * T**4)
+    c5 = (
+        -12.0 * p0 + 12.0 * p1 - a0 * T**2 + a1 * T**2 - 6.0 * v0 * T - 6.0 * v1 * T
+    ) / (2.0 * T**5)
+
+    # Evaluate the spline velocities and accelerations
+    tau = np.linspace(0.0, 1.0, n_samples)[None, :, None] * T[:, None, :]
+    velocities = (
+        v0[:, None]
+        + a0[:, None] * tau
+        + 3.0 * c3[:, None] * tau**2
+        + 4.0 * c4[:, None] * tau**3
+        + 5.0 * c5[:, None] * tau**4
+    )
+    accelerations = (
+        a0[:, None]
+        + 6.0 * c3[:, None] * tau
+        + 12.0 * c4[:, None] * tau**2
+        + 20.0 * c5[:, None] * tau**3
+    )
+
+    # Return limit ratios
+    return (
+        float(np.max(np.abs(velocities) / np.asarray(max_velocities, float))),
+        float(np.max(np.abs(accelerations) / np.asarray(max_accelerations, float))),
+    )
+
+
+def scale_trajectory_time(trajectory, factor):
+    """Slow down a trajectory by a constant factor. The point velocities are
+    divided by the factor and the accelerations by its square, such that the
+    interpolated splines keep their shape.
+
+    Parameters
+    ----------
+    trajectory : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        The timed trajectory.
+    factor : :py:obj:`float`
+        The factor by which the trajectory duration is increased.
+
+    Returns
+    -------
+    :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        The slowed down trajectory.
+    """
+    scaled_trajectory = copy.deepcopy(trajectory)
+    for point in scaled_trajectory.joint_trajectory.points:
+        point.time_from_start = rospy.Duration.from_sec(
+            point.time_from_start.to_sec() * factor
+        )
+        point.velocities = [v / factor for v in point.velocities]
+        point.accelerations = [a / factor**2 for a in point.accelerations]
+    return scaled_trajectory
+
+
+def states_are_valid(states, is_valid, batch_size=10):
+    """Check whether a sequence of joint configurations is collision free. The
+    configurations are checked from coarse to fine (end points first, then
+    repeatedly bisected) in batches, and checking stops at the first batch that
+    contains an invalid configuration.
+
+    Parameters
+    ----------
+    states : :py:obj:`numpy.ndarray`
+        (M, D) array containing the joint configurations.
+    is_valid : :py:obj:`function`
+        Function that takes a (M, D) array of joint configurations and returns a
+        (M,) bool array specifying which configurations are collision free.
+    batch_size : :py:obj:`int`, optional
+        Number of configurations that are passed to ``is_valid`` at once, by
+        default 10.
+
+    Returns
+    -------
+    :py:obj:`bool`
+        Bool specifying whether all configurations are collision free.
+    """
+    states = np.asarray(states)
+    order = np.argsort(get_coarse_to_fine_ranks(len(states)), kind="stable")
+    for start in range(0, len(order), batch_size):
+        batch = order[start : start + batch_size]
+        if not np.all(is_valid(states[batch])):
+            return False
+    return True
+
+
+def get_coarse_to_fine_ranks(n):
+    """Returns the refinement level of each index of a sequence. The end points
+    have level 0 and indices that are checked earlier when the sequence is bisected
+    get a lower level.
+
+    Parameters
+    ----------
+    n : :py:obj:`int`
+        The length of the sequence.
+
+    Returns
+    -------
+    :py:obj:`numpy.ndarray`
+        (n,) array containing the refinement level of each index.
+    """
+    indices = np.arange(1, n + 1)
+    levels = np.full(n, -1)
+    levels[[0, -1] if n else []] = 0
+    step = 2 ** int(np.log2(max(n, 1)))
+    level = 1
+    while step >= 1:
+        levels[(indices % step == 0) & (levels < 0)] = level
+        level += 1
+        step //= 2
+    return levels
+
+
+def add_gripper_motion(
+    trajectory, joint_names, start_positions, goal_positions, start_time, duration
+):
+    """Add a linear gripper motion to an arm trajectory. This allows the arm and
+    gripper to be moved simultaneously using a single trajectory execution. When
+    the gripper motion ends after the arm motion, points are added in which the arm
+    holds its final position.
+
+    Parameters
+    ----------
+    trajectory : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        The arm trajectory.
+    joint_names : :py:obj:`list`
+        The gripper joint names.
+    start_positions : :py:obj:`list`
+        The gripper joint positions at the start of the gripper motion.
+    goal_positions : :py:obj:`list`
+        The gripper joint positions at the end of the gripper motion.
+    start_time : :py:obj:`float`
+        The time in seconds after the start of the arm motion at which the gripper
+        starts moving.
+    duration : :py:obj:`float`
+        The duration of the gripper motion in seconds.
+
+    Returns
+    -------
+    :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        Trajectory containing both the arm and gripper motion.
+    """
+
+    # Add a point after the arm motion if the gripper is still moving
+    combined_trajectory = copy.deepcopy(trajectory)
+    points = combined_trajectory.joint_trajectory.points
+    times = np.array([point.time_from_start.to_sec() for point in points])
+    end_time = start_time + duration
+    if end_time > times[-1]:
+        end_point = JointTrajectoryPoint()
+        end_point.positions = list(points[-1].positions)
+        if len(points[-1].velocities) > 0:
+            end_point.velocities = [0.0] * len(points[-1].velocities)
+        if len(points[-1].accelerations) > 0:
+            end_point.accelerations = [0.0] * len(points[-1].accelerations)
+        end_point.time_from_start = rospy.Duration.from_sec(end_time)
+        points.append(end_point)
+        times = np.append(times, end_time)
+
+    # Compute the gripper positions and velocities at each trajectory point
+    q_start = np.asarray(start_positions, dtype=np.float64)
+    q_goal = np.asarray(goal_positions, dtype=np.float64)
+    progress = np.clip((times - start_time) / max(duration, 1e-6), 0.0, 1.0)
+    positions = q_start[None, :] + progress[:, None] * (q_goal - q_start)[None, :]
+    moving = (times > start_time) & (times < end_time)
+    velocities = np.where(
+        moving[:, None], ((q_goal - q_start) / max(duration, 1e-6))[None, :], 0.0
+    )
+
+    # Add gripper joints to the trajectory
+    combined_trajectory.joint_trajectory.joint_names = list(
+        combined_trajectory.joint_trajectory.joint_names
+    ) + list(joint_names)
+    for point, q, v in zip(points, positions.tolist(), velocities.tolist()):
+        point.positions = list(point.positions) + q
+        if len(point.velocities) > 0:
+            point.velocities = list(point.velocities) + v
+        if len(point.accelerations) > 0:
+            point.accelerations = list(point.accelerations) + [0.0] * len(q)
+
+    # Return combined trajectory
+    return combined_trajectory
+
+
+def join_trajectories(trajectories):
+    """Join trajectories that each start at the end of the previous trajectory into
+    one trajectory. The first point of each subsequent trajectory is dropped as it
+    coincides with the last point of the previous trajectory.
+
+    Parameters
+    ----------
+    trajectories : :py:obj:`list`
+        List containing the :py:obj:`!moveit_msgs.msg.RobotTrajectory` trajectories
+        you want to join. All trajectories should contain the same joints.
+
+    Returns
+    -------
+    :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+        The joined trajectory.
+    :py:obj:`list`
+        List containing the index of the last point of each trajectory in the
+        joined trajectory.
+    """
+
+    # Join trajectory points
+    joined_trajectory = copy.deepcopy(trajectories[0])
+    points = joined_trajectory.joint_trajectory.points
+    end_indices = [len(points) - 1]
+    for trajectory in trajectories[1:]:
+        time_offset = points[-1].time_from_start
+        for point in copy.deepcopy(trajectory.joint_trajectory.points[1:]):
+            point.time_from_start += time_offset
+            points.append(point)
+        end_indices.append(len(points) - 1)
+
+    # Return joined trajectory
+    return joined_trajectory, end_indices
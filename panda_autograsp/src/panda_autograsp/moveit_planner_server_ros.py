@@ -17,40 +17,120 @@ import sys
 import os
 import copy
 import time
+import threading
+from multiprocessing.pool import ThreadPool
+import numpy as np
 from autolab_core import YamlConfig
 
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
 # ROS python packages
 import rospy
+import actionlib
 import moveit_commander
 from moveit_commander import MoveItCommanderException
 
 # ROS messages and services
-from moveit_msgs.msg import DisplayTrajectory, RobotTrajectory
-from moveit_msgs.srv import ApplyPlanningScene
+from moveit_msgs.msg import (
+    DisplayTrajectory,
+    RobotTrajectory,
+    RobotState,
+    MotionPlanRequest,
+    MoveItErrorCodes,
+    PlanningSceneComponents,
+    PositionIKRequest,
+)
+from moveit_msgs.srv import (
+    ApplyPlanningScene,
+    GetMotionPlan,
+    GetPlanningScene,
+    GetStateValidity,
+    GetPositionIK,
+)
+from sensor_msgs.msg import JointState
+from actionlib_msgs.msg import GoalStatus
+
+try:
+    from franka_gripper.msg import MoveAction, MoveGoal, GraspAction, GraspGoal
+except ImportError:
+    MoveAction = None  # The gripper is controlled through MoveIt
 
 # Panda_autograsp modules, msgs and srvs
 from panda_autograsp.functions.moveit import (
     get_trajectory_duration,
+    get_plan_duration,
+    get_joint_path_length,
+    pose_goal_constraints,
+    joint_goal_constraints,
+    collision_objects_hash,
     plan_exists,
     at_joint_target,
     add_collision_objects,
 )
+from panda_autograsp.functions.trajectories import (
+    get_spline_limit_ratios,
+    scale_trajectory_time,
+    states_are_valid,
+    add_gripper_motion,
+    join_trajectories,
+)
+from panda_autograsp.functions.conversions import (
+    pose_msgs_2_matrices,
+    matrices_2_pose_msgs,
+)
+from panda_autograsp.planning import (
+    Trajectory,
+    TrajectoryCache,
+    IKCache,
+    Roadmap,
+    PlanStore,
+    TrajectorySmoother,
+    PlannerSelector,
+    GraspMonitor,
+)
+from panda_autograsp.planning.grasp_monitor import HOLDING, SLIPPED
+from panda_autograsp.msg import PlanSegment
 from panda_autograsp.srv import (
     ExecutePlan,
+    ExecutePlanWithGripper,
+    ExecutePlanWithGripperResponse,
     PlanToJoint,
+    PlanToJointResponse,
     PlanToPoint,
+    PlanToPointResponse,
+    PlanToPoses,
+    PlanToPosesResponse,
+    PlanToGrasp,
+    PlanToGraspResponse,
+    PlanComposite,
+    PlanCompositeResponse,
     PlanToPath,
+    PlanToPathResponse,
     PlanToRandomPoint,
+    PlanToRandomPointResponse,
     PlanToRandomJoint,
+    PlanToRandomJointResponse,
     PlanToRandomPath,
+    PlanToRandomPathResponse,
     VisualizePlan,
     CloseGripper,
+    CloseGripperResponse,
+    CommandGripper,
+    CommandGripperResponse,
     OpenGripper,
     SetGripperWidth,
     SetGripperOpen,
     SetGripperClosed,
     PlanGripper,
+    PlanGripperResponse,
     ExecuteGripperPlan,
+    GetPlannerStats,
+    GetPlannerStatsResponse,
+    HasPlan,
+    HasPlanResponse,
 )
 
 #################################################
@@ -65,8 +145,29 @@ MAIN_CFG = YamlConfig(
     os.path.abspath(os.path.join(FILE_PATH, "../../cfg/main_config.yaml"))
 )
 POINT_N_STEP = MAIN_CFG["planning"]["point"]["point_n_step"]
+POINT_N_WORKERS = MAIN_CFG["planning"]["point"]["n_workers"]
+POINT_N_REQUESTS = MAIN_CFG["planning"]["point"]["n_requests"]
+POINT_QUALITY_THRESHOLD = MAIN_CFG["planning"]["point"]["quality_threshold"]
+POINT_PATH_LENGTH_WEIGHT = MAIN_CFG["planning"]["point"]["path_length_weight"]
+POSES_TIME_BUDGET = MAIN_CFG["planning"]["poses"]["time_budget"]
+GRASP_CFG = MAIN_CFG["planning"]["grasp"]
 EEF_STEP = MAIN_CFG["planning"]["cartesian"]["eef_step"]
 JUMP_THRESHOLD = MAIN_CFG["planning"]["cartesian"]["jump_threshold"]
+VISUALIZATION_MIN_INTERVAL = MAIN_CFG["planning"]["visualization"]["min_interval"]
+RETIMING_CFG = MAIN_CFG["planning"]["retiming"]
+CACHE_CFG = MAIN_CFG["planning"]["cache"]
+IK_CACHE_CFG = MAIN_CFG["planning"]["ik_cache"]
+PLAN_STORE_MAX_SIZE = MAIN_CFG["planning"]["plan_store"]["max_size"]
+SMOOTHING_CFG = MAIN_CFG["planning"]["smoothing"]
+ROADMAP_CFG = MAIN_CFG["planning"]["roadmap"]
+ADAPTIVE_CFG = MAIN_CFG["planning"]["adaptive"]
+GRASP_MONITOR_CFG = MAIN_CFG["main"]["grasp_monitor"]
+GRIPPER_COMMAND_CFG = MAIN_CFG["robot"]["gripper_command"]
+CACHE_FILE = os.path.abspath(os.path.join(FILE_PATH, "../..", CACHE_CFG["file"]))
+ROADMAP_DIR = os.path.abspath(os.path.join(FILE_PATH, "../..", ROADMAP_CFG["dir"]))
+PLANNER_STATS_FILE = os.path.abspath(
+    os.path.join(FILE_PATH, "../..", ADAPTIVE_CFG["file"])
+)
 
 # Read collision object configuration file
 COLLISION_OBJ_CFG = YamlConfig(
@@ -90,16 +191,22 @@ class MoveitPlannerServer:
             The gripper move group.
         scene : :py:obj:`!moveit_commander.PlanningSceneInterface`
             The moveit scene commander.
-        current_plan :
-            The last computed plan of the main move group.
-        current_plan_gripper :
-            The last computed plan of the gripper.
-        desired_pose : :py:obj:`list`
-            The main move group goal pose.
-        desired_joint_values: :py:obj:`list`
-            The main move group target joint values.
+        plan_store : :py:obj:`~panda_autograsp.planning.PlanStore`
+            Store containing the computed plans of the main move group and the
+            gripper keyed by the plan handle that is returned by the plan services.
         desired_gripper_joint_values : :py:obj:`list`
             The gripper target joint values.
+        executing_plan :
+            The plan that is currently being executed by the main move group.
+        trajectory_cache : :py:obj:`~panda_autograsp.planning.TrajectoryCache`
+            Cache containing the trajectories of previously planned motions. None
+            if the cache is disabled.
+        trajectory_smoother : :py:obj:`~panda_autograsp.planning.TrajectorySmoother`
+            Post-processor used to shortcut and smooth the plans of the sampling
+            based planners. None if smoothing is disabled.
+        grasp_monitor : :py:obj:`~panda_autograsp.planning.GraspMonitor`
+            Monitor that uses the finger joint states to detect empty grasps and
+            slip. None if the grasp monitor is disabled.
     """
 
     def __init__(
@@ -137,11 +244,14 @@ class MoveitPlannerServer:
         """
 
         # Initialize class attributes
-        self.current_plan = RobotTrajectory()  # Empty plan
-        self.current_plan_gripper = RobotTrajectory()  # Empty plan
-        self.desired_pose = []
-        self.desired_joint_values = []
+        self.plan_store = PlanStore(max_size=PLAN_STORE_MAX_SIZE)
         self.desired_gripper_joint_values = {}
+        self.executing_plan = None
+        self.trajectory_cache = None
+        self.trajectory_smoother = None
+        self.planner_selector = None
+        self.ik_cache = None
+        self.roadmap = None
 
         # initialize moveit_commander and robot commander
         moveit_commander.roscpp_initialize(args)
@@ -166,6 +276,95 @@ class MoveitPlannerServer:
             )
             rospy.logerr(shutdown_msg)
             sys.exit(0)
+        rospy.loginfo("Connecting moveit default moveit 'plan_kinematic_path' service.")
+        rospy.wait_for_service("plan_kinematic_path")
+        try:
+            self._moveit_plan_kinematic_path_srv = rospy.ServiceProxy(
+                "plan_kinematic_path", GetMotionPlan
+            )
+            rospy.loginfo("Moveit 'plan_kinematic_path' service found!")
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Moveit 'plan_kinematic_path' service initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (
+                    rospy.get_name(),
+                    self._moveit_plan_kinematic_path_srv.resolved_name,
+                )
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
+        # Connect to the moveit services used by the caches and the roadmap
+        if (
+            CACHE_CFG["enabled"]
+            or IK_CACHE_CFG["enabled"]
+            or ROADMAP_CFG["enabled"]
+            or SMOOTHING_CFG["enabled"]
+        ):
+            rospy.loginfo(
+                "Connecting moveit default moveit 'get_planning_scene' and "
+                "'check_state_validity' services."
+            )
+            rospy.wait_for_service("get_planning_scene")
+            rospy.wait_for_service("check_state_validity")
+            self._moveit_get_planning_scene_srv = rospy.ServiceProxy(
+                "get_planning_scene", GetPlanningScene
+            )
+            self._moveit_check_state_validity_srv = rospy.ServiceProxy(
+                "check_state_validity", GetStateValidity
+            )
+            rospy.loginfo("Moveit cache services found!")
+        rospy.on_shutdown(self.shutdown_hook)
+
+        if ROADMAP_CFG["enabled"] or GRASP_CFG["symmetry"]:
+            rospy.loginfo("Connecting moveit default moveit 'compute_ik' service.")
+            rospy.wait_for_service("compute_ik")
+            self._moveit_compute_ik_srv = rospy.ServiceProxy(
+                "compute_ik", GetPositionIK
+            )
+            rospy.loginfo("Moveit 'compute_ik' service found!")
+
+        # Create trajectory cache
+        if CACHE_CFG["enabled"]:
+            self.trajectory_cache = TrajectoryCache(
+                max_size=CACHE_CFG["max_size"],
+                cache_file=CACHE_FILE,
+                joint_resolution=CACHE_CFG["joint_resolution"],
+                pose_resolution=CACHE_CFG["pose_resolution"],
+            )
+            rospy.loginfo(
+                "Trajectory cache loaded with %d trajectories."
+                % len(self.trajectory_cache)
+            )
+
+        # Create IK cache
+        if IK_CACHE_CFG["enabled"]:
+            self.ik_cache = IKCache(
+                max_size=IK_CACHE_CFG["max_size"],
+                max_solutions=IK_CACHE_CFG["max_solutions"],
+                pose_resolution=IK_CACHE_CFG["pose_resolution"],
+                seed_resolution=IK_CACHE_CFG["seed_resolution"],
+            )
+
+        # Create trajectory smoother
+        if SMOOTHING_CFG["enabled"]:
+            self.trajectory_smoother = TrajectorySmoother(
+                resolution=SMOOTHING_CFG["resolution"],
+                max_iterations=SMOOTHING_CFG["max_iterations"],
+                time_budget=SMOOTHING_CFG["time_budget"],
+                batch_size=SMOOTHING_CFG["batch_size"],
+                smoothing_iterations=SMOOTHING_CFG["smoothing_iterations"],
+            )
+
+        # Create planning worker pool
+        # NOTE: Used to send the plan_to_poses, IK and state validity requests
+        # concurrently. Whether move_group also serves them concurrently depends on
+        # its spinner. The stock move_group node uses a single-threaded spinner for
+        # these services, in which case they are handled one after another.
+        self._planning_pool = ThreadPool(POINT_N_WORKERS)
 
         # Create robot commander
         # Used to get information about the robot and control it.
@@ -191,6 +390,11 @@ class MoveitPlannerServer:
                 move_group_end_effector_link in self.robot.get_link_names()
             ):  # Try to set end to user specified link (Keep default if fails).k
                 self.move_group.set_end_effector_link(move_group_end_effector_link)
+
+            # Retrieve joint limits (Used for the retiming)
+            self._max_joint_velocities, self._max_joint_accelerations = (
+                self._get_joint_limits(robot_description)
+            )
         except MoveItCommanderException:
             self.move_group = None
             shutdown_msg = (
@@ -201,12 +405,20 @@ class MoveitPlannerServer:
             sys.exit(0)
 
         # Create gripper move_group
+        self._gripper_group_name = move_group_gripper
         try:
             self.move_group_gripper = self.robot.get_group(move_group_gripper)
             self.move_group_gripper.set_planning_time(
                 MAIN_CFG["planning"]["general"]["planning_time"]
             )
             # self.move_group_gripper.set_planner_id(planner)
+
+            # Retrieve finger velocity limit
+            self._max_finger_velocity = rospy.get_param(
+                "%s_planning/joint_limits/%s/max_velocity"
+                % (robot_description, self.move_group_gripper.get_active_joints()[0]),
+                MAIN_CFG["robot"]["max_finger_velocity"],
+            )
         except MoveItCommanderException:
             self.move_group_gripper = None
             rospy.logwarn(
@@ -214,6 +426,83 @@ class MoveitPlannerServer:
                 % move_group
             )
 
+        # Create grasp monitor
+        # NOTE: The finger width is computed from the joints of the 'open' named
+        # target.
+        self.grasp_monitor = None
+        self._finger_joints = []
+        if self.move_group_gripper is not None and GRASP_MONITOR_CFG["enabled"]:
+            try:
+                self._finger_joints = list(
+                    self.move_group_gripper.get_named_target_values("open").keys()
+                )
+            except MoveItCommanderException as e:
+                rospy.logwarn("Grasp monitor could not be created: %s" % e)
+        if self._finger_joints:
+            self.grasp_monitor = GraspMonitor(
+                min_width=GRASP_MONITOR_CFG["min_width"],
+                slip_tolerance=GRASP_MONITOR_CFG["slip_tolerance"],
+                min_effort=GRASP_MONITOR_CFG["min_effort"],
+                settle_time=GRASP_MONITOR_CFG["settle_time"],
+                settle_tolerance=GRASP_MONITOR_CFG["settle_tolerance"],
+                on_slip=self._grasp_slip_callback,
+            )
+            rospy.Subscriber(
+                GRASP_MONITOR_CFG["joint_states_topic"],
+                JointState,
+                self._joint_states_callback,
+                queue_size=1,
+            )
+
+        # Connect to the gripper actions
+        # NOTE: Used to open and close the gripper without planning a MoveIt
+        # trajectory for the fingers.
+        self._gripper_move_client = None
+        self._gripper_grasp_client = None
+        if GRIPPER_COMMAND_CFG["enabled"] and MoveAction is None:
+            rospy.logwarn(
+                "The franka_gripper package could not be imported. As a result the "
+                "gripper is controlled through MoveIt."
+            )
+        elif GRIPPER_COMMAND_CFG["enabled"]:
+            action_ns = GRIPPER_COMMAND_CFG["action_ns"].rstrip("/")
+            move_client = actionlib.SimpleActionClient(action_ns + "/move", MoveAction)
+            grasp_client = actionlib.SimpleActionClient(
+                action_ns + "/grasp", GraspAction
+            )
+            connect_timeout = rospy.Duration.from_sec(
+                GRIPPER_COMMAND_CFG["connect_timeout"]
+            )
+            if all(
+                client.wait_for_server(connect_timeout)
+                for client in [move_client, grasp_client]
+            ):
+                self._gripper_move_client = move_client
+                self._gripper_grasp_client = grasp_client
+                rospy.loginfo("Connected to the '%s' gripper actions." % action_ns)
+            else:
+                rospy.loginfo(
+                    "Gripper actions '%s' not available. The gripper is controlled "
+                    "through MoveIt." % action_ns
+                )
+
+        # Create adaptive planner selector
+        # NOTE: Uses the main move group planner and planning time as defaults.
+        if ADAPTIVE_CFG["enabled"]:
+            self.planner_selector = PlannerSelector(
+                planners=ADAPTIVE_CFG["planners"],
+                default_planner=self.move_group.get_planner_id(),
+                default_planning_time=self.move_group.get_planning_time(),
+                stats_file=PLANNER_STATS_FILE,
+                exploration=ADAPTIVE_CFG["exploration"],
+                min_samples=ADAPTIVE_CFG["min_samples"],
+                region_size=ADAPTIVE_CFG["region_size"],
+                joint_region_size=ADAPTIVE_CFG["joint_region_size"],
+                time_factor=ADAPTIVE_CFG["time_factor"],
+                min_planning_time=ADAPTIVE_CFG["min_planning_time"],
+                window_size=ADAPTIVE_CFG["window_size"],
+            )
+
         # Create scene commanders
         # Used to get information about the world and update the robot
         # its understanding of the world.
@@ -223,6 +512,17 @@ class MoveitPlannerServer:
         self._display_trajectory_publisher = rospy.Publisher(
             "/move_group/display_planned_path", DisplayTrajectory, queue_size=20
         )
+        self._last_visualization_time = 0.0
+        self._pending_display_trajectory = None
+        self._visualization_lock = threading.Lock()
+
+        # Create move group locks
+        # NOTE: The move group commanders are shared by all service calls. The
+        # planning locks guard the commander planning calls (and start state) while
+        # the execution lock makes sure only one arm plan is executed at a time.
+        self._planning_lock = threading.RLock()
+        self._gripper_lock = threading.RLock()
+        self._execution_lock = threading.Lock()
 
         # Print some information about the planner configuration
         rospy.loginfo("Using planner: %s", planner)
@@ -237,6 +537,21 @@ class MoveitPlannerServer:
             PlanToPoint,
             self.plan_to_point_service,
         )
+        rospy.Service(
+            "%s/plan_to_poses" % rospy.get_name()[1:],
+            PlanToPoses,
+            self.plan_to_poses_service,
+        )
+        rospy.Service(
+            "%s/plan_to_grasp" % rospy.get_name()[1:],
+            PlanToGrasp,
+            self.plan_to_grasp_service,
+        )
+        rospy.Service(
+            "%s/plan_composite" % rospy.get_name()[1:],
+            PlanComposite,
+            self.plan_composite_service,
+        )
         rospy.Service(
             "%s/plan_to_joint" % rospy.get_name()[1:],
             PlanToJoint,
@@ -287,6 +602,11 @@ class MoveitPlannerServer:
             CloseGripper,
             self.close_gripper_service,
         )
+        rospy.Service(
+            "%s/command_gripper" % rospy.get_name()[1:],
+            CommandGripper,
+            self.command_gripper_service,
+        )
         rospy.Service(
             "%s/set_gripper_width" % rospy.get_name()[1:],
             SetGripperWidth,
@@ -307,6 +627,19 @@ class MoveitPlannerServer:
             ExecuteGripperPlan,
             self.execute_gripper_plan_service,
         )
+        rospy.Service(
+            "%s/execute_plan_with_gripper" % rospy.get_name()[1:],
+            ExecutePlanWithGripper,
+            self.execute_plan_with_gripper_service,
+        )
+        rospy.Service(
+            "%s/get_planner_stats" % rospy.get_name()[1:],
+            GetPlannerStats,
+            self.get_planner_stats_service,
+        )
+        rospy.Service(
+            "%s/has_plan" % rospy.get_name()[1:], HasPlan, self.has_plan_service
+        )
 
         # Display service initiation success message
         rospy.loginfo(
@@ -321,8 +654,14 @@ class MoveitPlannerServer:
         if add_scene_collision_objects:
             self._collision_obj_cfg = COLLISION_OBJ_CFG
             rospy.loginfo("Adding collision objects to the planning scene...")
-            add_collision_objects(self.scene, self._collision_obj_cfg)
-            rospy.loginfo("Collision objects added to the planning scene.")
+            if add_collision_objects(
+                self._moveit_apply_planning_srv, self._collision_obj_cfg
+            ):
+                rospy.loginfo("Collision objects added to the planning scene.")
+
+        # Load the precomputed roadmap
+        if ROADMAP_CFG["enabled"]:
+            self.roadmap = self._load_roadmap()
 
     def plan_to_joint_service(self, req):
         """Plan to a given joint position.
@@ -335,25 +674,33 @@ class MoveitPlannerServer:
 
         Returns
         -------
-        Bool
-            Boolean specifying whether the planning was successful.
+        :py:obj:`panda_autograsp.msg.PlanToJointResponse`
+            The success bool and the handle of the computed plan.
         """
 
         # Set joint targets and plan trajectory
         rospy.loginfo("Planning to: \n %s", req.target)
-        self.current_plan = self.move_group.plan(joints=list(req.target))
-        self.desired_joint_values = req.target
+        start_joint_values = self.move_group.get_current_joint_values()
+        cache_key = self._get_cache_key(start_joint_values, list(req.target))
+        plan = self._get_cached_plan(cache_key, start_joint_values)
+        if plan is None:
+            planning_start_time = time.time()
+            plan = self._plan_with_roadmap(start_joint_values, list(req.target))
+            if plan is None:
+                with self._planning_lock:
+                    plan = self.move_group.plan(joints=list(req.target))
+                plan = self._smooth_plan(plan)
+            self._cache_plan(cache_key, plan, time.time() - planning_start_time)
+        plan_handle = self._store_plan(plan, self.move_group, goal=list(req.target))
 
         # Validate whether planning was successful
-        rospy.logdebug(
-            "Plan points: %d" % len(self.current_plan.joint_trajectory.points)
-        )
-        if plan_exists(self.current_plan):
+        rospy.logdebug("Plan points: %d" % len(plan.joint_trajectory.points))
+        if plan_handle:
             rospy.loginfo("Plan to joint path planning successful.")
-            return True
+            return PlanToJointResponse(success=True, plan_handle=plan_handle)
         else:
             rospy.logwarn("Plan to joint path planning failed.")
-            return False
+            return PlanToJointResponse(success=False)
 
     def plan_to_point_service(self, req):
         """Plan to a given pose.
@@ -365,41 +712,341 @@ class MoveitPlannerServer:
 
         Returns
         -------
-        bool
-            Boolean specifying whether the planning was successful.
+        :py:obj:`panda_autograsp.msg.PlanToPointResponse`
+            The success bool and the handle of the computed plan.
         """
 
-        # Initialize local variables
-        plans = []
-        points = []
-
         # Set the target position
         rospy.loginfo("Planning to: \n %s", req.target)
-        self.move_group.set_pose_target(req.target)
-        self.desired_pose = req.target
 
-        # Perform planning
-        # Perform multiple time to get the best path.
-        for i in range(POINT_N_STEP):
-            plans.append(self.move_group.plan())
-            points.append(len(plans[i].joint_trajectory.points))
-            rospy.logdebug("Found plan %d with %d points" % (i, points[i]))
-
-        # Find shortest path
-        self.current_plan = plans[points.index(min(points))]
-        rospy.logdebug(
-            "Points of chosen plan: %d" % len(self.current_plan.joint_trajectory.points)
+        # Plan from the end of the plan that is being executed if requested
+        start_state, start_joint_values = self._get_start_state(req.start_at_plan_end)
+
+        # Plan to the target pose
+        plan = self._plan_to_pose(req.target, start_state, start_joint_values)
+        plan_handle = self._store_plan(
+            plan, self.move_group, req.motion_type, goal=req.target
         )
 
         # Validate whether planning was successful
-        if plan_exists(self.current_plan):
+        if plan_handle:
             rospy.loginfo("Plan to point planning successful.")
-            self.move_group.clear_pose_targets()  # Clear pose targets
-            return True
+            return PlanToPointResponse(success=True, plan_handle=plan_handle)
         else:
             rospy.logwarn("Plan to point planning failed.")
-            self.move_group.clear_pose_targets()  # Clear pose targets
-            return False
+            return PlanToPointResponse(success=False)
+
+    def plan_to_poses_service(self, req):
+        """Plan to the first reachable pose of a set of candidate poses. The
+        planning requests of the candidate poses are sent concurrently, sharing a
+        single planning time budget. The plan to the goal with the highest score is
+        returned. With the stock (single-threaded) move_group the requests are
+        served one after another, in order of decreasing score.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.PlanToPoses`
+            The service request message containing the candidate poses and their
+            scores.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.PlanToPosesResponse`
+            The service response containing the plan handle, the index of the goal
+            that was planned to and the reason why the other goals were rejected.
+        """
+
+        # Validate request
+        n_goals = len(req.targets)
+        if n_goals == 0:
+            rospy.logwarn("Plan to poses planning failed: No target poses were given.")
+            return PlanToPosesResponse(success=False, goal_index=-1)
+        if req.scores and len(req.scores) != n_goals:
+            rospy.logwarn(
+                "Plan to poses planning failed: Got %d scores for %d target poses."
+                % (len(req.scores), n_goals)
+            )
+            return PlanToPosesResponse(success=False, goal_index=-1)
+
+        # Rank goals by decreasing score
+        scores = np.asarray(req.scores) if req.scores else np.zeros(n_goals)
+        order = np.argsort(-scores, kind="stable").tolist()
+        ranks = {goal: rank for rank, goal in enumerate(order)}
+        time_budget = req.time_budget if req.time_budget > 0.0 else POSES_TIME_BUDGET
+        deadline = time.time() + time_budget
+        rospy.loginfo(
+            "Planning to %d candidate poses (time budget %.1f s)."
+            % (n_goals, time_budget)
+        )
+
+        # Plan from the end of the plan that is being executed if requested
+        start_state, _ = self._get_start_state(req.start_at_plan_end)
+
+        # Start planning to all goals
+        # NOTE: Goals are submitted in order of their rank so that the most
+        # promising goals are planned first when there are more goals than workers.
+        results = queue.Queue()
+        stop_event = threading.Event()
+        for goal in order:
+            motion_plan_req = self._create_motion_plan_request(
+                req.targets[goal], start_state
+            )
+            motion_plan_req.allowed_planning_time = min(
+                motion_plan_req.allowed_planning_time, time_budget
+            )
+            self._planning_pool.apply_async(
+                self._plan_attempt, (goal, motion_plan_req, stop_event, results)
+            )
+
+        # Collect results until the best goal that can still succeed has a plan
+        plans = {}
+        failure_reasons = ["TIME_BUDGET_EXCEEDED"] * n_goals
+        pending = set(range(n_goals))
+        while pending:
+            try:
+                goal, plan, error_code = results.get(
+                    timeout=max(deadline - time.time(), 0.0)
+                )
+            except queue.Empty:
+                rospy.logwarn(
+                    "Plan to poses time budget exceeded with %d goals pending."
+                    % len(pending)
+                )
+                break
+            pending.discard(goal)
+            if plan is not None:
+                plans[goal] = plan
+                failure_reasons[goal] = ""
+            else:
+                failure_reasons[goal] = self._error_code_name(error_code)
+                rospy.logdebug(
+                    "Planning to goal %d failed: %s" % (goal, failure_reasons[goal])
+                )
+            candidates = pending.union(plans)
+            if candidates and min(candidates, key=ranks.get) in plans:
+                break
+        stop_event.set()
+
+        # Select the plan to the goal with the highest score
+        goal_index = min(plans, key=ranks.get) if plans else -1
+        for goal in plans:
+            if goal != goal_index:
+                failure_reasons[goal] = "LOWER_SCORE"
+        for goal in pending:
+            if goal_index >= 0 and ranks[goal] > ranks[goal_index]:
+                failure_reasons[goal] = "LOWER_SCORE"
+        plan_handle = self._store_plan(
+            self._smooth_plan(plans.get(goal_index)),
+            self.move_group,
+            req.motion_type,
+            goal=req.targets[goal_index] if plans else None,
+        )
+
+        # Validate whether planning was successful
+        if plan_handle:
+            rospy.loginfo(
+                "Plan to poses planning successful. Planned to goal %d." % goal_index
+            )
+            return PlanToPosesResponse(
+                success=True,
+                goal_index=goal_index,
+                score=float(scores[goal_index]),
+                failure_reasons=failure_reasons,
+                plan_handle=plan_handle,
+            )
+        else:
+            rospy.logwarn("Plan to poses planning failed.")
+            return PlanToPosesResponse(
+                success=False, goal_index=-1, failure_reasons=failure_reasons
+            )
+
+    def plan_to_grasp_service(self, req):
+        """Plan to a parallel-jaw grasp pose. As a parallel-jaw grasp is symmetric
+        around its approach axis, the grasp pose rotated by 180 degrees around this
+        axis results in the same grasp. The joint solutions of both equivalent poses
+        are computed and the one that is reached with the least joint motion and
+        lies within the joint position limits is planned to.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.PlanToGrasp`
+            The service request message containing the grasp pose.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.PlanToGraspResponse`
+            The success bool, the index of the equivalent grasp pose that was
+            planned to, its estimated motion cost and the plan handle.
+        """
+
+        # Plan from the end of the plan that is being executed if requested
+        start_state, start_joint_values = self._get_start_state(req.start_at_plan_end)
+
+        # Compute the joint solutions of the equivalent grasp poses
+        # NOTE: The IK solutions are seeded with the start state so that they lie
+        # close to it.
+        if GRASP_CFG["symmetry"]:
+            poses = self._get_symmetric_grasp_poses(req.target)
+            joint_goals = self._planning_pool.map(
+                lambda pose: self._compute_ik(
+                    pose, start_joint_values, timeout=GRASP_CFG["ik_timeout"]
+                ),
+                poses,
+            )
+        else:
+            poses, joint_goals = [req.target], []
+
+        # Rank the reachable grasp poses by their motion cost
+        candidates = []
+        for i, joint_goal in enumerate(joint_goals):
+            if joint_goal is None:
+                rospy.logdebug("No IK solution found for grasp pose %d." % i)
+                continue
+            if not self._within_joint_position_limits(
+                joint_goal, GRASP_CFG["joint_limit_margin"]
+            ):
+                rospy.logdebug(
+                    "IK solution of grasp pose %d is too close to the joint limits." % i
+                )
+                continue
+            cost = self._get_motion_cost(start_joint_values, joint_goal)
+            rospy.logdebug("Grasp pose %d has a motion cost of %.3f s." % (i, cost))
+            candidates.append((cost, i, joint_goal))
+        candidates.sort()
+
+        # Plan to the cheapest grasp pose that can be planned to
+        plan, symmetry_index, motion_cost = None, -1, 0.0
+        for cost, i, joint_goal in candidates:
+            plan = self._plan_to_joint(joint_goal, start_state, start_joint_values)
+            if plan is not None:
+                symmetry_index, motion_cost = i, cost
+                break
+
+        # Fall back to planning to the original grasp pose
+        if plan is None:
+            plan = self._plan_to_pose(req.target, start_state, start_joint_values)
+            symmetry_index = 0 if plan is not None else -1
+        plan_handle = self._store_plan(
+            plan,
+            self.move_group,
+            req.motion_type,
+            goal=poses[symmetry_index] if plan is not None else None,
+        )
+
+        # Validate whether planning was successful
+        if plan_handle:
+            rospy.loginfo(
+                "Plan to grasp planning successful. Planned to grasp pose %d."
+                % symmetry_index
+            )
+            return PlanToGraspResponse(
+                success=True,
+                symmetry_index=symmetry_index,
+                motion_cost=motion_cost,
+                plan_handle=plan_handle,
+            )
+        else:
+            rospy.logwarn("Plan to grasp planning failed.")
+            return PlanToGraspResponse(success=False, symmetry_index=-1)
+
+    def plan_composite_service(self, req):
+        """Plan a motion that consists of multiple segments. Each segment is planned
+        from the end state of the previous segment after which the segments are
+        joined into one trajectory. When executed this trajectory is retimed as a
+        whole so that the arm does not stop between the segments.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.PlanComposite`
+            The service request message containing the segments you want to plan.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.PlanCompositeResponse`
+            The success bool, the handle of the computed plan and the index of the
+            segment that could not be planned.
+        """
+
+        # Validate request
+        if not req.segments:
+            rospy.logwarn("Composite planning failed: No segments were given.")
+            return PlanCompositeResponse(success=False, failed_segment=-1)
+
+        # Plan from the end of the plan that is being executed if requested
+        start_state, start_joint_values = self._get_start_state(req.start_at_plan_end)
+
+        # Plan each segment from the end state of the previous segment
+        plans = []
+        segment_motion_types = []
+        for i, segment in enumerate(req.segments):
+            rospy.loginfo("Planning composite segment %d." % i)
+            plan = None
+            if segment.type == PlanSegment.JOINT:
+                plan = self._plan_to_joint(
+                    list(segment.joint_target), start_state, start_joint_values
+                )
+                motion_types = [(-1, segment.motion_type)]
+            elif segment.type == PlanSegment.POSE and len(segment.poses) == 1:
+                plan = self._plan_to_pose(
+                    segment.poses[0], start_state, start_joint_values
+                )
+                motion_types = [(-1, segment.motion_type)]
+            elif segment.type == PlanSegment.CARTESIAN and segment.poses:
+                with self._planning_lock:
+                    plan, fraction, motion_types = self._plan_cartesian_segments(
+                        segment.poses,
+                        [segment.motion_type] * len(segment.poses),
+                        start_state,
+                    )
+                if fraction < 1.0 - 1e-6:
+                    rospy.logwarn(
+                        "Only %s %% of the cartesian path of segment %d can be "
+                        "executed." % (str(fraction * 100), i)
+                    )
+                    plan = None
+            else:
+                rospy.logwarn(
+                    "Composite segment %d is invalid. Please check the segment type "
+                    "and goals." % i
+                )
+            if plan is None or not plan_exists(plan):
+                rospy.logwarn("Composite planning failed at segment %d." % i)
+                self._store_plan(None, self.move_group)
+                return PlanCompositeResponse(success=False, failed_segment=i)
+            plans.append(plan)
+            segment_motion_types.append(motion_types)
+
+            # Plan the next segment from the end of this segment
+            start_state = self._get_plan_end_state(plan)
+            start_joint_values = list(plan.joint_trajectory.points[-1].positions)
+
+        # Join segments
+        # NOTE: The first point of each segment is dropped while joining. The motion
+        # type end indices are therefore shifted by the end index of the previous
+        # segment.
+        plan, end_indices = join_trajectories(plans)
+        motion_types = []
+        for i, (plan_motion_types, segment_plan) in enumerate(
+            zip(segment_motion_types, plans)
+        ):
+            offset = end_indices[i - 1] if i > 0 else 0
+            n_points = len(segment_plan.joint_trajectory.points)
+            for end_index, motion_type in plan_motion_types:
+                end_index = end_index if end_index >= 0 else n_points - 1
+                motion_types.append((offset + end_index, motion_type))
+        plan_handle = self._store_plan(plan, self.move_group, motion_types)
+
+        # Validate whether planning was successful
+        if plan_handle:
+            rospy.loginfo(
+                "Composite planning successful. Planned %d segments." % len(plans)
+            )
+            return PlanCompositeResponse(
+                success=True, plan_handle=plan_handle, failed_segment=-1
+            )
+        else:
+            rospy.logwarn("Composite planning failed.")
+            return PlanCompositeResponse(success=False, failed_segment=-1)
 
     def plan_cartesian_path_service(self, req):
         """Plan to a given cartesian path.
@@ -411,24 +1058,36 @@ class MoveitPlannerServer:
 
         Returns
         -------
-        bool
-            Boolean specifying whether the planning was successful.
+        :py:obj:`panda_autograsp.msg.PlanToPathResponse`
+            The success bool and the handle of the computed plan.
         """
 
         # Plan cartesian path
-        (self.current_plan, fraction) = self.move_group.compute_cartesian_path(
-            req.waypoints, EEF_STEP, JUMP_THRESHOLD  # waypoints to follow  # eef_step
-        )  # jump_threshold
-        self.desired_pose = req.waypoints[-1]
+        # NOTE: When a motion type is given for each waypoint the path is planned
+        # per waypoint so that we know which trajectory points belong to which
+        # motion.
+        with self._planning_lock:
+            if req.motion_types and len(req.motion_types) == len(req.waypoints):
+                plan, fraction, motion_types = self._plan_cartesian_segments(
+                    req.waypoints, req.motion_types
+                )
+            else:
+                plan, fraction = self.move_group.compute_cartesian_path(
+                    req.waypoints, EEF_STEP, JUMP_THRESHOLD  # waypoints to follow
+                )  # eef_step, jump_threshold
+                motion_types = []
+        plan_handle = self._store_plan(
+            plan, self.move_group, motion_types, goal=req.waypoints[-1]
+        )
 
         # Validate whether planning was successful
-        if plan_exists(self.current_plan):
+        if plan_handle:
             rospy.loginfo("Cartesian path planning successful.")
             rospy.loginfo("%s %% of the path can be executed.", str(fraction * 100))
-            return True
+            return PlanToPathResponse(success=True, plan_handle=plan_handle)
         else:
             rospy.logwarn("Cartesian path planning failed.")
-            return False
+            return PlanToPathResponse(success=False)
 
     def plan_random_pose_service(self, req):
         """Plan to a random pose goal.
@@ -440,8 +1099,8 @@ class MoveitPlannerServer:
 
         Returns
         -------
-        bool
-            Returns a bool to specify whether the plan was executed successfully.
+        :py:obj:`panda_autograsp.msg.PlanToRandomPointResponse`
+            The success bool and the handle of the computed plan.
         """
 
         # Create random pose
@@ -453,18 +1112,21 @@ class MoveitPlannerServer:
             None  # Create dummy request function object
 
         req.target = rand_pose  # set random pose as a property
+        req.start_at_plan_end = False
+        req.motion_type = ""
         result = self.plan_to_point_service(req)
 
         # Remove req dummy function
         del req
 
         # Check whether path planning was successful
-        if result:
+        if result.success:
             rospy.loginfo("Random pose path planning successful.")
-            return True
         else:
             rospy.logwarn("Random pose path planning failed.")
-            return False
+        return PlanToRandomPointResponse(
+            success=result.success, plan_handle=result.plan_handle
+        )
 
     def plan_random_joint_service(self, req):
         """Plan to a random joint goal.
@@ -476,8 +1138,8 @@ class MoveitPlannerServer:
 
         Returns
         -------
-        bool
-            Returns a bool to specify whether the plan was executed successfully.
+        :py:obj:`panda_autograsp.msg.PlanToRandomJointResponse`
+            The success bool and the handle of the computed plan.
         """
 
         # Create random pose
@@ -495,12 +1157,13 @@ class MoveitPlannerServer:
         del req
 
         # Check whether path planning was successful
-        if result:
+        if result.success:
             rospy.loginfo("Random cartesian path planning successful.")
-            return True
         else:
             rospy.logwarn("Random cartesian path planning failed.")
-            return False
+        return PlanToRandomJointResponse(
+            success=result.success, plan_handle=result.plan_handle
+        )
 
     def plan_random_cartesian_path_service(self, req):
         """Plan to a random cartesian path.
@@ -512,8 +1175,8 @@ class MoveitPlannerServer:
 
         Returns
         -------
-        bool
-            Returns a bool to specify whether the plan was executed successfully.
+        :py:obj:`panda_autograsp.msg.PlanToRandomPathResponse`
+            The success bool and the handle of the computed plan.
         """
 
         # Create local variables
@@ -535,18 +1198,20 @@ class MoveitPlannerServer:
             None  # Create dummy request function object
 
         req.waypoints = waypoints  # set random pose as a property
+        req.motion_types = []
         result = self.plan_cartesian_path_service(req)
 
         # Remove req dummy function
         del req
 
         # Check whether path planning was successful
-        if result:
+        if result.success:
             rospy.loginfo("Random cartesian path planning successful.")
-            return True
         else:
             rospy.logwarn("Random cartesian path planning failed.")
-            return False
+        return PlanToRandomPathResponse(
+            success=result.success, plan_handle=result.plan_handle
+        )
 
     def visualize_plan_service(self, req):
         """Visualize the plan that has been computed by the other plan services.
@@ -554,7 +1219,9 @@ class MoveitPlannerServer:
         Parameters
         ----------
         req : :py:obj:`panda_autograsp.msg.VisualizePlan`
-            Empty service request.
+            The service request message containing the handles of the plans you
+            want to visualize and specifying whether to wait till the plan has been
+            displayed.
 
         Returns
         -------
@@ -562,23 +1229,33 @@ class MoveitPlannerServer:
             Returns a bool to specify whether the plan was executed successfully.
         """
 
+        # Retrieve the arm and gripper plans
+        plans = [
+            entry["plan"]
+            for entry in [
+                self.plan_store.get(req.gripper_plan_handle, self._gripper_group_name),
+                self.plan_store.get(req.plan_handle, self.move_group.get_name()),
+            ]
+            if entry is not None
+        ]
+
         # Generate moveit_msgs
-        if plan_exists(self.current_plan_gripper) or plan_exists(self.current_plan):
+        if plans:
 
             # Display trajectory
             display_trajectory = DisplayTrajectory()
             display_trajectory.trajectory_start = self.robot.get_current_state()
-            display_trajectory.trajectory.append(self.current_plan_gripper)
-            display_trajectory.trajectory.append(self.current_plan)
+            display_trajectory.trajectory.extend(plans)
 
             # Get visualization duration
             duration = get_trajectory_duration(display_trajectory)
 
             # Publish plan
-            self._display_trajectory_publisher.publish(display_trajectory)
+            display_delay = self._publish_display_trajectory(display_trajectory)
 
-            # Sleep till trajectory is visualized
-            time.sleep(duration)
+            # Sleep till trajectory is visualized if requested
+            if req.wait:
+                time.sleep(display_delay + duration)
 
             # Return success bool
             rospy.loginfo("Movement plan visualization successful.")
@@ -594,7 +1271,8 @@ class MoveitPlannerServer:
         Parameters
         ----------
         req : :py:obj:`panda_autograsp.msg.ExecutePlan`
-            Empty service request.
+            The service request message containing the handle of the plan you
+            want to execute.
 
         Returns
         -------
@@ -602,14 +1280,36 @@ class MoveitPlannerServer:
             Returns a bool to specify whether the plan was executed successfully.
         """
 
-        # Check if gripper plan is set
-        if plan_exists(self.current_plan):
+        # Check if the plan exists
+        entry = self.plan_store.get(req.plan_handle, self.move_group.get_name())
+        if entry is not None:
 
             # Execute plan
-            result = self.move_group.execute(plan_msg=self.current_plan, wait=True)
-            self.current_plan = (
-                RobotTrajectory()
-            )  # Empty plan (Needed for visualization).
+            # NOTE: The plan is removed from the store after execution as it starts
+            # from a robot state that no longer exists.
+            holding = (
+                self.grasp_monitor is not None and self.grasp_monitor.state == HOLDING
+            )
+            with self._execution_lock:
+                if RETIMING_CFG["enabled"]:
+                    self.executing_plan = self._retime_plan(
+                        entry["plan"], entry["motion_types"]
+                    )
+                else:
+                    self.executing_plan = entry["plan"]
+                result = self.move_group.execute(
+                    plan_msg=self.executing_plan, wait=True
+                )
+                self.executing_plan = None
+            self.plan_store.remove(entry["handle"], entry["group"])
+
+            # Check if the object was lost during the execution
+            if holding and self.grasp_monitor.state == SLIPPED:
+                rospy.logwarn(
+                    "Plan execution was unsuccessful because the object slipped out "
+                    "of the gripper."
+                )
+                return False
 
             # Check if execution was successful
             if result:
@@ -627,6 +1327,115 @@ class MoveitPlannerServer:
             rospy.logwarn("No movement plan available for the execution.")
             return False
 
+    def execute_plan_with_gripper_service(self, req):
+        """Execute the plan that has been computed for the main move group while
+        moving the gripper towards its joint targets. The arm and gripper motion
+        are combined into one trajectory so that both controllers are executed
+        simultaneously. The gripper starts moving at the requested time along the
+        arm trajectory.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.ExecutePlanWithGripper`
+            The service request message containing the handle of the arm plan and
+            the time at which the gripper should start moving.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.ExecutePlanWithGripperResponse`
+            The execution result together with the achieved arm and gripper
+            overlap.
+        """
+
+        # Check if gripper controller, plan and gripper targets exist
+        response = ExecutePlanWithGripperResponse()
+        if self.move_group_gripper is None:
+            rospy.logwarn(
+                "Gripper move group appears to be missing. As a result the gripper "
+                "can not be controlled."
+            )
+            return response
+        entry = self.plan_store.get(req.plan_handle, self.move_group.get_name())
+        if entry is None:
+            rospy.logwarn("No movement plan available for the execution.")
+            return response
+        gripper_joints = [
+            joint
+            for joint in self.move_group_gripper.get_active_joints()
+            if joint in self.desired_gripper_joint_values
+        ]
+        if not gripper_joints:
+            rospy.logwarn("No gripper joint targets available for the execution.")
+            return response
+
+        # Retime arm plan
+        if RETIMING_CFG["enabled"]:
+            arm_plan = self._retime_plan(entry["plan"], entry["motion_types"])
+        else:
+            arm_plan = entry["plan"]
+        response.arm_duration = get_plan_duration(arm_plan)
+
+        # Add gripper motion to the arm plan
+        current_gripper_values = dict(
+            zip(
+                self.move_group_gripper.get_active_joints(),
+                self.move_group_gripper.get_current_joint_values(),
+            )
+        )
+        start_positions = [current_gripper_values[joint] for joint in gripper_joints]
+        goal_positions = [
+            self.desired_gripper_joint_values[joint] for joint in gripper_joints
+        ]
+        response.gripper_duration = (
+            max(
+                abs(goal - start)
+                for start, goal in zip(start_positions, goal_positions)
+            )
+            / self._max_finger_velocity
+        )
+        if req.trigger_time >= 0.0:
+            trigger_time = min(req.trigger_time, response.arm_duration)
+        else:
+            trigger_time = max(response.arm_duration + req.trigger_time, 0.0)
+        combined_plan = add_gripper_motion(
+            arm_plan,
+            gripper_joints,
+            start_positions,
+            goal_positions,
+            trigger_time,
+            response.gripper_duration,
+        )
+        response.overlap = max(
+            min(response.arm_duration, trigger_time + response.gripper_duration)
+            - trigger_time,
+            0.0,
+        )
+
+        # Stop monitoring the grasp as the gripper will be moved
+        if self.grasp_monitor is not None:
+            self.grasp_monitor.stop()
+
+        # Execute combined plan
+        with self._execution_lock:
+            self.executing_plan = combined_plan
+            execution_start_time = time.time()
+            result = self.move_group.execute(plan_msg=combined_plan, wait=True)
+            response.execution_time = time.time() - execution_start_time
+            self.executing_plan = None
+        self.plan_store.remove(entry["handle"], entry["group"])
+
+        # Check if execution was successful
+        if result:
+            rospy.loginfo(
+                "Plan execution with gripper was successful (arm: %.2f s, gripper: "
+                "%.2f s, overlap: %.2f s)."
+                % (response.arm_duration, response.gripper_duration, response.overlap)
+            )
+            response.success = True
+        else:
+            rospy.logwarn("Plan execution with gripper was unsuccessful.")
+        return response
+
     def plan_gripper_service(self, req):
         """Compute plan for the currently set gripper target joint values.
 
@@ -637,8 +1446,9 @@ class MoveitPlannerServer:
 
         Returns
         -------
-        bool
-            Returns a bool to specify whether the plan was executed successfully.
+        :py:obj:`panda_autograsp.msg.PlanGripperResponse`
+            The success bool and the handle of the computed plan. The handle is 0
+            when the gripper is already at its joint targets.
         """
 
         # Check if gripper controller exists
@@ -647,27 +1457,30 @@ class MoveitPlannerServer:
                 "Gripper move group appears to be missing. As a result the gripper can "
                 "not be controlled."
             )
-            return False
+            return PlanGripperResponse(success=False)
 
         # Plan for gripper command
-        self.current_plan_gripper = self.move_group_gripper.plan(
-            joints=self.desired_gripper_joint_values
+        desired_gripper_joint_values = self.desired_gripper_joint_values
+        with self._gripper_lock:
+            plan = self.move_group_gripper.plan(joints=desired_gripper_joint_values)
+        plan_handle = self._store_plan(
+            plan, self.move_group_gripper, goal=desired_gripper_joint_values
         )
 
         # Validate whether planning was successful
-        if plan_exists(self.current_plan_gripper):
+        if plan_handle:
             rospy.loginfo("Gripper plan found.")
-            return True  # Return success bool
+            return PlanGripperResponse(success=True, plan_handle=plan_handle)
         elif at_joint_target(
             self.move_group_gripper.get_current_joint_values(),
-            self.desired_gripper_joint_values.values(),
+            desired_gripper_joint_values.values(),
             self.move_group_gripper.get_goal_joint_tolerance(),
         ):  # Plan empty because already at goal
             rospy.loginfo("Gripper already at desired location.")
-            return True
+            return PlanGripperResponse(success=True)
         else:  # Plan empty
             rospy.logwarn("No gripper plan found.")
-            return False
+            return PlanGripperResponse(success=False)
 
     def execute_gripper_plan_service(self, req):
         """Execute previously planned gripper plan.
@@ -675,7 +1488,8 @@ class MoveitPlannerServer:
         Parameters
         ----------
         req : :py:obj:`panda_autograsp.msg.ExecuteGripperPlan.`
-            Empty service request.
+            The service request message containing the handle of the gripper plan
+            you want to execute.
 
         Returns
         -------
@@ -691,31 +1505,44 @@ class MoveitPlannerServer:
             )
             return False
 
+        # Retrieve gripper plan
+        entry = self.plan_store.get(req.plan_handle, self._gripper_group_name)
+        desired_gripper_joint_values = (
+            entry["goal"] if entry is not None else self.desired_gripper_joint_values
+        )
+
         # Check if gripper is already at desired location
         if at_joint_target(
             self.move_group_gripper.get_current_joint_values(),
-            self.desired_gripper_joint_values.values(),
+            desired_gripper_joint_values.values(),
             self.move_group_gripper.get_goal_joint_tolerance(),
         ):  # Plan empty because already at goal
             rospy.loginfo("Gripper already at desired location.")
-            self.current_plan_gripper = RobotTrajectory()  # Reset plan
+            if entry is not None:
+                self.plan_store.remove(entry["handle"], entry["group"])  # Reset plan
             return True
+        elif entry is None:
+            rospy.logwarn("No gripper plan available for the execution.")
+            return False
         else:
 
+            # Stop monitoring the grasp as the gripper will be moved
+            if self.grasp_monitor is not None:
+                self.grasp_monitor.stop()
+
             # Execute gripper plan
-            result = self.move_group_gripper.execute(
-                self.current_plan_gripper, wait=True
-            )
+            with self._gripper_lock:
+                result = self.move_group_gripper.execute(entry["plan"], wait=True)
+            self.plan_store.remove(entry["handle"], entry["group"])  # Reset plan
             if not result:
                 rospy.logwarn("Gripper plan could not be executed.")
-                self.current_plan_gripper = RobotTrajectory()  # Reset plan
                 return False
             else:
-                self.current_plan_gripper = RobotTrajectory()  # Reset plan
                 return True
 
     def open_gripper_service(self, req):
-        """Open the gripper.
+        """Open the gripper. The gripper move action is used when available.
+        Otherwise the gripper is opened through MoveIt.
 
         Parameters
         ----------
@@ -728,6 +1555,14 @@ class MoveitPlannerServer:
             Returns a bool to specify whether the plan was executed successfully.
         """
 
+        # Stop monitoring the grasp
+        if self.grasp_monitor is not None:
+            self.grasp_monitor.stop()
+
+        # Open the gripper directly
+        if self._command_gripper_directly(MAIN_CFG["robot"]["gripper_width"]):
+            return True
+
         # Check if gripper controller exists
         if self.move_group_gripper is None:
             rospy.logwarn(
@@ -744,49 +1579,146 @@ class MoveitPlannerServer:
 
         # Plan and execute
         # Note: I used execute instead of go since it failed in some cases.
-        plan = self.move_group_gripper.plan(joints=desired_values)
-        result = self.move_group_gripper.execute(plan, wait=True)
+        with self._gripper_lock:
+            plan = self.move_group_gripper.plan(joints=desired_values)
+            result = self.move_group_gripper.execute(plan, wait=True)
         if not result:
             return False
         else:
             return True  # Return success bool
 
     def close_gripper_service(self, req):
-        """Close the gripper.
+        """Close the gripper. The gripper grasp action is used when available.
+        Otherwise the gripper is closed through MoveIt. When the grasp monitor is
+        enabled the finger joint states are checked as soon as the gripper has
+        settled to detect empty grasps. If an object is held the monitor keeps
+        checking for slip until the gripper is opened again.
 
         Parameters
         ----------
         req :  :py:obj:`panda_autograsp.msg.CloseGripper.`
             Empty service request.
+
         Returns
         -------
-        bool
-            Returns a bool to specify whether the plan was executed successfully.
+        :py:obj:`panda_autograsp.msg.CloseGripperResponse`
+            Whether an object was grasped together with the grasp state and the
+            measured finger width.
+        """
+
+        # Close the gripper directly
+        response = CloseGripperResponse()
+        result = self._command_gripper_directly(0.0, grasp=True)
+        if not result:
+
+            # Check if gripper controller exists
+            if self.move_group_gripper is None:
+                rospy.logwarn(
+                    "Gripper move group appears to be missing. As a result the "
+                    "gripper can not be controlled."
+                )
+                return response
+
+            # Get named target
+            try:
+                desired_values = self.move_group_gripper.get_named_target_values(
+                    "close"
+                )
+            except MoveItCommanderException as e:
+                rospy.logwarn(e)
+                return response
+
+            # Plan and execute
+            # Note: I used execute instead of go since it failed in some cases.
+            with self._gripper_lock:
+                plan = self.move_group_gripper.plan(joints=desired_values)
+                result = self.move_group_gripper.execute(plan, wait=True)
+
+        # Return execution result if the grasp is not monitored
+        if self.grasp_monitor is None:
+            response.success = bool(result)
+            return response
+
+        # Check the grasp
+        # NOTE: The gripper execution may report a failure when the fingers are
+        # blocked by the object. The grasp state is therefore leading.
+        response.grasp_state = self.grasp_monitor.check(
+            timeout=GRASP_MONITOR_CFG["settle_timeout"]
+        )
+        response.finger_width = self.grasp_monitor.width or 0.0
+        if response.grasp_state == HOLDING:
+            rospy.loginfo(
+                "Object grasped (finger width: %.3f m)." % response.finger_width
+            )
+            response.success = True
+        elif self.grasp_monitor.width is None:
+            rospy.logwarn(
+                "No finger joint states received on %s. Grasp could not be checked."
+                % GRASP_MONITOR_CFG["joint_states_topic"]
+            )
+            response.success = bool(result)
+        else:
+            rospy.logwarn(
+                "Grasp failed (state: %s, finger width: %.3f m)."
+                % (response.grasp_state, response.finger_width)
+            )
+        return response
+
+    def command_gripper_service(self, req):
+        """Move the fingers to a given width. The command is sent directly to the
+        gripper move or grasp action and waits on its result. When the actions are
+        not available the fingers are moved through a MoveIt plan, in which case the
+        requested speed and the grasp force are not used.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.CommandGripper`
+            The service request message containing the target width, speed and
+            whether the object should be grasped.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.CommandGripperResponse`
+            The execution result and whether the direct path was used.
         """
 
+        # Stop monitoring the grasp as the gripper will be moved
+        if self.grasp_monitor is not None:
+            self.grasp_monitor.stop()
+
+        # Move the gripper directly
+        response = CommandGripperResponse()
+        start_time = time.time()
+        response.direct = self._command_gripper_directly(
+            req.width, req.speed, req.grasp
+        )
+        if response.direct:
+            response.success = True
+            response.execution_time = time.time() - start_time
+            return response
+
         # Check if gripper controller exists
         if self.move_group_gripper is None:
             rospy.logwarn(
                 "Gripper move group appears to be missing. As a result the gripper "
                 "can not be controlled."
             )
-            return False
+            return response
 
-        # Get named target
+        # Get finger joint names
         try:
-            desired_values = self.move_group_gripper.get_named_target_values("close")
+            dict_keys = self.move_group_gripper.get_named_target_values("open").keys()
         except MoveItCommanderException as e:
             rospy.logwarn(e)
-            return False
+            return response
 
-        # Plan and execute
-        # Note: I used execute instead of go since it failed in some cases.
-        plan = self.move_group_gripper.plan(joints=desired_values)
-        result = self.move_group_gripper.execute(plan, wait=True)
-        if not result:
-            return False
-        else:
-            return True  # Return success bool
+        # Plan and execute through MoveIt
+        desired_values = dict(zip(dict_keys, [req.width / 2.0] * 2))
+        with self._gripper_lock:
+            plan = self.move_group_gripper.plan(joints=desired_values)
+            response.success = bool(self.move_group_gripper.execute(plan, wait=True))
+        response.execution_time = time.time() - start_time
+        return response
 
     def set_gripper_open_service(self, req):
         """Set gripper joint targets values to open.
@@ -898,3 +1830,1430 @@ class MoveitPlannerServer:
         except MoveItCommanderException as e:
             rospy.logwarn(e)
             return False
+
+    def get_planner_stats_service(self, req):
+        """Retrieve the planning statistics of the adaptive planner selector.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.GetPlannerStats`
+            Empty service request message.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.GetPlannerStatsResponse`
+            The number of attempts, successes and the median planning time of each
+            planner in each goal region and the median planning latency.
+        """
+
+        # Check if the planner selector is enabled
+        if self.planner_selector is None:
+            rospy.logwarn(
+                "Planner statistics are not available as adaptive planner selection "
+                "is disabled."
+            )
+            return GetPlannerStatsResponse()
+
+        # Return planner statistics
+        summary = self.planner_selector.summary()
+        return GetPlannerStatsResponse(
+            regions=[stats[0] for stats in summary],
+            planner_ids=[stats[1] for stats in summary],
+            attempts=[stats[2] for stats in summary],
+            successes=[stats[3] for stats in summary],
+            median_planning_times=[stats[4] for stats in summary],
+            median_latency=self.planner_selector.median_latency,
+        )
+
+    def has_plan_service(self, req):
+        """Check whether a plan of the main move group is still in the plan store.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.HasPlan`
+            The service request message containing the plan handle.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.HasPlanResponse`
+            Bool specifying whether the plan is still stored.
+        """
+        return HasPlanResponse(
+            exists=self.plan_store.get(req.plan_handle, self.move_group.get_name())
+            is not None
+        )
+
+    def _joint_states_callback(self, msg):
+        """Pass the finger width and effort to the grasp monitor.
+
+        Parameters
+        ----------
+        msg : :py:obj:`!sensor_msgs.msg.JointState`
+            The joint state message.
+        """
+
+        # Retrieve finger joint states
+        finger_indices = [
+            msg.name.index(joint) for joint in self._finger_joints if joint in msg.name
+        ]
+        if not finger_indices:
+            return
+
+        # Compute finger width and effort
+        # NOTE: Each finger joint position is the distance of a finger to the
+        # gripper center.
+        width = sum(msg.position[i] for i in finger_indices)
+        if len(finger_indices) == 1:
+            width *= 2.0
+        effort = (
+            sum(abs(msg.effort[i]) for i in finger_indices)
+            if len(msg.effort) == len(msg.name)
+            else None
+        )
+        self.grasp_monitor.update(
+            width, effort, msg.header.stamp.to_sec() or rospy.get_time()
+        )
+
+    def _grasp_slip_callback(self, width):
+        """Stop the arm when the object slipped out of the gripper.
+
+        Parameters
+        ----------
+        width : :py:obj:`float`
+            The finger width at which the slip was detected [m].
+        """
+        rospy.logwarn(
+            "Object slipped out of the gripper (finger width: %.3f m)." % width
+        )
+        if GRASP_MONITOR_CFG["stop_on_slip"] and self.executing_plan is not None:
+            self.move_group.stop()
+
+    def _command_gripper_directly(self, width, speed=0.0, grasp=False):
+        """Move the fingers through the gripper move or grasp action.
+
+        Parameters
+        ----------
+        width : :py:obj:`float`
+            The target distance between the fingers [m].
+        speed : :py:obj:`float`, optional
+            The finger speed [m/s], by default 0.0 (Use the configured speed).
+        grasp : :py:obj:`bool`, optional
+            Whether to grasp with the configured force instead of moving to the
+            width, by default False.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the command was executed successfully. False
+            when the gripper actions are not available.
+        """
+
+        # Check if the gripper actions are available
+        if self._gripper_move_client is None:
+            return False
+
+        # Create goal
+        speed = speed if speed > 0.0 else GRIPPER_COMMAND_CFG["speed"]
+        if grasp:
+            client = self._gripper_grasp_client
+            goal = GraspGoal(
+                width=width, speed=speed, force=GRIPPER_COMMAND_CFG["force"]
+            )
+            goal.epsilon.inner = GRIPPER_COMMAND_CFG["epsilon"]
+            goal.epsilon.outer = GRIPPER_COMMAND_CFG["epsilon"]
+        else:
+            client = self._gripper_move_client
+            goal = MoveGoal(width=width, speed=speed)
+
+        # Send goal and wait for the result
+        with self._gripper_lock:
+            state = client.send_goal_and_wait(
+                goal,
+                execute_timeout=rospy.Duration.from_sec(
+                    GRIPPER_COMMAND_CFG["result_timeout"]
+                ),
+            )
+        result = client.get_result()
+        if state == GoalStatus.SUCCEEDED and result is not None and result.success:
+            return True
+        rospy.logwarn(
+            "Direct gripper command failed (state: %d, error: '%s'). Falling back to "
+            "MoveIt." % (state, result.error if result is not None else "")
+        )
+        return False
+
+    def _get_plan_end_state(self, plan):
+        """Get the robot state the robot will be in after a plan has been executed.
+
+        Parameters
+        ----------
+        plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The robot trajectory.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotState`
+            The robot state at the end of the trajectory.
+        """
+
+        # Overwrite the current joint positions with the final trajectory positions
+        robot_state = self.robot.get_current_state()
+        joint_positions = list(robot_state.joint_state.position)
+        end_point = plan.joint_trajectory.points[-1]
+        for name, position in zip(
+            plan.joint_trajectory.joint_names, end_point.positions
+        ):
+            if name in robot_state.joint_state.name:
+                joint_positions[robot_state.joint_state.name.index(name)] = position
+        robot_state.joint_state.position = joint_positions
+
+        # Return end state
+        return robot_state
+
+    def _create_motion_plan_request(self, target, start_state):
+        """Create a motion plan request for planning the main move group to a
+        given pose or joint goal.
+
+        Parameters
+        ----------
+        target : :py:obj:`!geometry_msgs.msg.Pose` or :py:obj:`list`
+            The end effector goal pose or the goal values of the active joints.
+        start_state : :py:obj:`!moveit_msgs.msg.RobotState`
+            The state from which the planning should start.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.MotionPlanRequest`
+            The motion plan request.
+        """
+
+        # Create motion plan request
+        # NOTE: Uses the same settings as the main move group.
+        motion_plan_req = MotionPlanRequest()
+        motion_plan_req.group_name = self.move_group.get_name()
+        motion_plan_req.planner_id = self.move_group.get_planner_id()
+        motion_plan_req.allowed_planning_time = self.move_group.get_planning_time()
+        motion_plan_req.num_planning_attempts = 1
+        motion_plan_req.start_state = start_state
+        motion_plan_req.workspace_parameters.header.frame_id = (
+            self.move_group.get_planning_frame()
+        )
+        motion_plan_req.workspace_parameters.min_corner.x = -1.0
+        motion_plan_req.workspace_parameters.min_corner.y = -1.0
+        motion_plan_req.workspace_parameters.min_corner.z = -1.0
+        motion_plan_req.workspace_parameters.max_corner.x = 1.0
+        motion_plan_req.workspace_parameters.max_corner.y = 1.0
+        motion_plan_req.workspace_parameters.max_corner.z = 1.0
+        if isinstance(target, list):
+            motion_plan_req.goal_constraints.append(
+                joint_goal_constraints(
+                    self.move_group.get_active_joints(),
+                    target,
+                    self.move_group.get_goal_joint_tolerance(),
+                )
+            )
+        else:
+            motion_plan_req.goal_constraints.append(
+                pose_goal_constraints(
+                    target,
+                    self.move_group.get_pose_reference_frame(),
+                    self.move_group.get_end_effector_link(),
+                    self.move_group.get_goal_position_tolerance(),
+                    self.move_group.get_goal_orientation_tolerance(),
+                )
+            )
+
+        # Select planner and planning time based on previous similar queries
+        if self.planner_selector is not None:
+            (
+                motion_plan_req.planner_id,
+                motion_plan_req.allowed_planning_time,
+            ) = self.planner_selector.select(self._get_goal_region(motion_plan_req))
+
+        # Return motion plan request
+        return motion_plan_req
+
+    def _get_goal_region(self, motion_plan_req):
+        """Returns the planner selector region key of the goal of a motion plan
+        request.
+
+        Parameters
+        ----------
+        motion_plan_req : :py:obj:`!moveit_msgs.msg.MotionPlanRequest`
+            The motion plan request.
+
+        Returns
+        -------
+        :py:obj:`str`
+            The goal region key.
+        """
+        constraints = motion_plan_req.goal_constraints[0]
+        if constraints.position_constraints:
+            position = (
+                constraints.position_constraints[0]
+                .constraint_region.primitive_poses[0]
+                .position
+            )
+            return self.planner_selector.make_region(
+                "pose", [position.x, position.y, position.z]
+            )
+        return self.planner_selector.make_region(
+            "joint",
+            [constraint.position for constraint in constraints.joint_constraints],
+        )
+
+    def _plan_best_of_attempts(self, motion_plan_req):
+        """Plan multiple times and return the plan with the lowest cost. Each
+        ``plan_kinematic_path`` request lets MoveIt run ``point_n_step`` planning
+        attempts in parallel (using at most the OMPL ``max_planning_threads``
+        threads of move_group), after which MoveIt returns the shortest of its
+        solutions. Up to ``n_requests`` such requests are sent one after another.
+        The cost of a returned plan is its (retimed) duration plus its weighted
+        joint space path length. No further requests are sent once a plan with a
+        cost below the quality threshold is found.
+
+        Parameters
+        ----------
+        motion_plan_req : :py:obj:`!moveit_msgs.msg.MotionPlanRequest`
+            The motion plan request.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The best plan. None if no plan was found.
+        """
+
+        # Perform planning requests
+        motion_plan_req = copy.deepcopy(motion_plan_req)
+        motion_plan_req.num_planning_attempts = POINT_N_STEP
+        best_plan = None
+        best_cost = float("inf")
+        for i in range(POINT_N_REQUESTS):
+            plan, error_code = self._plan_kinematic_path(motion_plan_req)
+            if plan is None:
+                rospy.logdebug(
+                    "Planning request %d failed: %s"
+                    % (i, self._error_code_name(error_code))
+                )
+                continue
+
+            # Compute plan cost
+            # NOTE: The duration is computed after retiming as that is how the plan
+            # is executed.
+            duration = get_plan_duration(
+                self._retime_plan(plan, []) if RETIMING_CFG["enabled"] else plan
+            )
+            path_length = get_joint_path_length(plan)
+            cost = duration + POINT_PATH_LENGTH_WEIGHT * path_length
+            rospy.logdebug(
+                "Found plan %d with duration %.3f s, path length %.3f rad and cost "
+                "%.3f." % (i, duration, path_length, cost)
+            )
+            if cost < best_cost:
+                best_plan = plan
+                best_cost = cost
+
+            # Stop early if the plan is good enough
+            if POINT_QUALITY_THRESHOLD > 0.0 and cost <= POINT_QUALITY_THRESHOLD:
+                rospy.logdebug(
+                    "Plan %d meets the quality threshold. Stopping planning." % i
+                )
+                break
+
+        # Retry with the default planner and planning time if the selected planner
+        # failed
+        if best_plan is None and self.planner_selector is not None:
+            default_planner = self.planner_selector.default_planner
+            default_planning_time = self.planner_selector.default_planning_time
+            if (
+                motion_plan_req.planner_id != default_planner
+                or motion_plan_req.allowed_planning_time < default_planning_time
+            ):
+                rospy.logdebug(
+                    "Planner %s failed. Retrying with the default planner %s."
+                    % (motion_plan_req.planner_id, default_planner)
+                )
+                motion_plan_req.planner_id = default_planner
+                motion_plan_req.allowed_planning_time = default_planning_time
+                return self._plan_best_of_attempts(motion_plan_req)
+
+        # Return best plan
+        if best_plan is not None:
+            rospy.logdebug("Cost of chosen plan: %.3f" % best_cost)
+        return best_plan
+
+    def _plan_kinematic_path(self, motion_plan_req):
+        """Plan using the moveit ``plan_kinematic_path`` service and record the
+        outcome in the planner statistics.
+
+        Parameters
+        ----------
+        motion_plan_req : :py:obj:`!moveit_msgs.msg.MotionPlanRequest`
+            The motion plan request.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan. None if planning failed.
+        :py:obj:`int`
+            The moveit error code. None if no moveit error code was received.
+        """
+
+        # Perform planning
+        try:
+            resp = self._moveit_plan_kinematic_path_srv(motion_plan_req)
+        except rospy.ServiceException as e:
+            rospy.logwarn("Planning request failed: %s" % e)
+            return None, None
+        error_code = resp.motion_plan_response.error_code.val
+        plan = (
+            resp.motion_plan_response.trajectory
+            if error_code == MoveItErrorCodes.SUCCESS
+            else None
+        )
+
+        # Record planning outcome
+        if self.planner_selector is not None:
+            self.planner_selector.record(
+                self._get_goal_region(motion_plan_req),
+                motion_plan_req.planner_id,
+                plan is not None,
+                resp.motion_plan_response.planning_time,
+            )
+        return plan, error_code
+
+    def _plan_attempt(self, attempt, motion_plan_req, stop_event, results):
+        """Perform a single planning attempt using the moveit ``plan_kinematic_path``
+        service. The resulting plan is put on the results queue.
+
+        Parameters
+        ----------
+        attempt : :py:obj:`int`
+            The planning attempt number.
+        motion_plan_req : :py:obj:`!moveit_msgs.msg.MotionPlanRequest`
+            The motion plan request.
+        stop_event : :py:obj:`threading.Event`
+            Event that is set when planning should be stopped. Only attempts that
+            did not start yet are skipped, running requests are not cancelled.
+        results : :py:obj:`queue.Queue`
+            Queue on which the ``(attempt, plan, error_code)`` result is put. The
+            plan is None if the attempt failed or was skipped. The error code is
+            None if no moveit error code was received.
+        """
+        plan, error_code = None, None
+        try:
+            if not stop_event.is_set():
+                plan, error_code = self._plan_kinematic_path(motion_plan_req)
+        finally:
+            results.put((attempt, plan, error_code))
+
+    def _get_symmetric_grasp_poses(self, pose):
+        """Returns the poses that result in the same parallel-jaw grasp. These are
+        the grasp pose and the grasp pose rotated by 180 degrees around the approach
+        (z) axis of the end effector.
+
+        Parameters
+        ----------
+        pose : :py:obj:`!geometry_msgs.msg.Pose`
+            The grasp pose.
+
+        Returns
+        -------
+        :py:obj:`list`
+            The equivalent grasp poses (the first pose is the original grasp pose).
+        """
+        H = pose_msgs_2_matrices([pose])[0]
+        H_flipped = H.copy()
+        H_flipped[:3, :2] = -H[:3, :2]  # Rotate 180 degrees around the z axis
+        return [pose, matrices_2_pose_msgs([H_flipped])[0]]
+
+    def _get_motion_cost(self, start_joint_values, joint_goal):
+        """Estimate the cost of moving between two joint configurations. The cost
+        is the minimum time needed by the slowest joint when every joint moves at
+        its maximum velocity.
+
+        Parameters
+        ----------
+        start_joint_values : :py:obj:`list`
+            The start joint values.
+        joint_goal : :py:obj:`list`
+            The goal joint values.
+
+        Returns
+        -------
+        :py:obj:`float`
+            The motion cost [s].
+        """
+        max_velocities = np.array(
+            [
+                self._max_joint_velocities[joint]
+                for joint in self.move_group.get_active_joints()
+            ]
+        )
+        return float(
+            np.max(
+                np.abs(np.asarray(joint_goal) - np.asarray(start_joint_values))
+                / max_velocities
+            )
+        )
+
+    def _within_joint_position_limits(self, joint_values, margin=0.0):
+        """Check whether joint values lie within the joint position limits of the
+        main move group.
+
+        Parameters
+        ----------
+        joint_values : :py:obj:`list`
+            The values of the active joints.
+        margin : :py:obj:`float`, optional
+            The minimum distance to the joint limits [rad], by default 0.0.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the joint values lie within the limits.
+        """
+        for joint, value in zip(self.move_group.get_active_joints(), joint_values):
+            lower, upper = self.robot.get_joint(joint).bounds()
+            if value < lower + margin or value > upper - margin:
+                return False
+        return True
+
+    def _error_code_name(self, error_code):
+        """Returns the name of a moveit error code.
+
+        Parameters
+        ----------
+        error_code : :py:obj:`int`
+            The moveit error code value. None if no error code was received.
+
+        Returns
+        -------
+        :py:obj:`str`
+            The name of the error code.
+        """
+        if error_code is None:
+            return "NO_RESPONSE"
+        for name, value in vars(MoveItErrorCodes).items():
+            if name.isupper() and value == error_code:
+                return name
+        return "UNKNOWN_ERROR_CODE_%d" % error_code
+
+    def _plan_to_pose(self, target, start_state, start_joint_values):
+        """Plan the main move group to a pose. A cached plan is used when available.
+        Otherwise the pose is planned to through a (cached) IK solution, the roadmap
+        or the best of multiple planning requests.
+
+        Parameters
+        ----------
+        target : :py:obj:`!geometry_msgs.msg.Pose`
+            The goal pose.
+        start_state : :py:obj:`!moveit_msgs.msg.RobotState`
+            The state the plan starts from.
+        start_joint_values : :py:obj:`list`
+            The joint values of the start state.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan. None if no plan was found.
+        """
+
+        # Try to reuse a cached plan
+        cache_key = self._get_cache_key(start_joint_values, target)
+        plan = self._get_cached_plan(cache_key, start_joint_values)
+        if plan is not None:
+            return plan
+
+        # Perform planning
+        # NOTE: Plans to a cached IK solution if available. Uses the roadmap if
+        # available and otherwise plans multiple times to get the best path.
+        planning_start_time = time.time()
+        ik_cache_key = self._get_ik_cache_key(target, start_joint_values)
+        joint_goal = self._get_cached_ik_solution(ik_cache_key, start_joint_values)
+        if self.roadmap is not None:
+            if joint_goal is None:
+                joint_goal = self._compute_ik(target, start_joint_values)
+            if joint_goal is not None:
+                plan = self._plan_with_roadmap(start_joint_values, joint_goal)
+        if plan is None and joint_goal is not None:
+            plan = self._smooth_plan(
+                self._plan_best_of_attempts(
+                    self._create_motion_plan_request(joint_goal, start_state)
+                )
+            )
+        if plan is None:
+            plan = self._smooth_plan(
+                self._plan_best_of_attempts(
+                    self._create_motion_plan_request(target, start_state)
+                )
+            )
+        if plan is not None:
+            self._cache_plan(cache_key, plan, time.time() - planning_start_time)
+            self._cache_ik_solution(ik_cache_key, plan)
+
+        # Return plan
+        return plan
+
+    def _plan_to_joint(self, joint_goal, start_state, start_joint_values):
+        """Plan the main move group to a joint goal from a given start state. A
+        cached plan is used when available. Otherwise the roadmap or the best of
+        multiple planning requests is used.
+
+        Parameters
+        ----------
+        joint_goal : :py:obj:`list`
+            The goal joint values.
+        start_state : :py:obj:`!moveit_msgs.msg.RobotState`
+            The state the plan starts from.
+        start_joint_values : :py:obj:`list`
+            The joint values of the start state.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan. None if no plan was found.
+        """
+
+        # Try to reuse a cached plan
+        cache_key = self._get_cache_key(start_joint_values, joint_goal)
+        plan = self._get_cached_plan(cache_key, start_joint_values)
+        if plan is not None:
+            return plan
+
+        # Perform planning
+        planning_start_time = time.time()
+        plan = self._plan_with_roadmap(start_joint_values, joint_goal)
+        if plan is None:
+            plan = self._smooth_plan(
+                self._plan_best_of_attempts(
+                    self._create_motion_plan_request(joint_goal, start_state)
+                )
+            )
+        if plan is not None:
+            self._cache_plan(cache_key, plan, time.time() - planning_start_time)
+
+        # Return plan
+        return plan
+
+    def _store_plan(self, plan, move_group, motion_types=None, goal=None):
+        """Add a plan to the plan store. When the plan is empty the latest plan of
+        the move group is reset instead so that an old plan can not be executed by
+        accident.
+
+        Parameters
+        ----------
+        plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan. None if planning failed.
+        move_group : :py:obj:`!moveit_commander.MoveGroupCommander`
+            The move group the plan was computed for.
+        motion_types : :py:obj:`list` or :py:obj:`str`, optional
+            List containing the ``(end_index, motion_type)`` of each motion in the
+            plan or the motion type of the whole plan, by default None.
+        goal : :py:obj:`!geometry_msgs.msg.Pose` or :py:obj:`list`, optional
+            The goal (pose, joint values or gripper joint target dictionary) the
+            plan was computed for, by default None.
+
+        Returns
+        -------
+        :py:obj:`int`
+            The plan handle. 0 if the plan is empty.
+        """
+        if plan is None or not plan_exists(plan):
+            self.plan_store.reset_latest(move_group.get_name())
+            return 0
+        if isinstance(motion_types, str):
+            motion_types = [(len(plan.joint_trajectory.points) - 1, motion_types)]
+        return self.plan_store.add(plan, move_group.get_name(), motion_types, goal)
+
+    def _get_start_state(self, start_at_plan_end):
+        """Returns the state from which a new plan should start.
+
+        Parameters
+        ----------
+        start_at_plan_end : :py:obj:`bool`
+            Whether planning should start from the end state of the plan that is
+            being executed.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotState`
+            The start state (a diff state when planning from the current state).
+        :py:obj:`list`
+            The joint values of the start state.
+        """
+        if start_at_plan_end and self.executing_plan is not None:
+            rospy.loginfo("Planning from the end state of the executing plan.")
+            return (
+                self._get_plan_end_state(self.executing_plan),
+                list(self.executing_plan.joint_trajectory.points[-1].positions),
+            )
+        start_state = RobotState()
+        start_state.is_diff = True  # Use the current robot state
+        return start_state, self.move_group.get_current_joint_values()
+
+    def _get_cache_key(self, start_joint_values, goal):
+        """Create the trajectory cache key of a planning request.
+
+        Parameters
+        ----------
+        start_joint_values : :py:obj:`list`
+            The joint values from which the planning starts.
+        goal : :py:obj:`!geometry_msgs.msg.Pose` or :py:obj:`list`
+            The goal pose or goal joint values.
+
+        Returns
+        -------
+        :py:obj:`tuple`
+            The cache key. None if the cache is disabled or the planning scene
+            could not be retrieved.
+        """
+
+        # Check if cache is enabled
+        if self.trajectory_cache is None:
+            return None
+
+        # Compute planning scene hash
+        scene_hash = self._get_planning_scene_hash()
+        if scene_hash is None:
+            return None
+
+        # Return cache key
+        return self.trajectory_cache.make_key(
+            start_joint_values, goal, self.move_group.get_planner_id(), scene_hash
+        )
+
+    def _get_cached_plan(self, cache_key, start_joint_values):
+        """Retrieve a plan from the trajectory cache. The plan is checked for
+        collisions against the current planning scene before it is returned.
+
+        Parameters
+        ----------
+        cache_key : :py:obj:`tuple`
+            The cache key.
+        start_joint_values : :py:obj:`list`
+            The joint values from which the plan should start.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The cached plan. None if no valid plan was found.
+        """
+
+        # Check if cache is enabled
+        if cache_key is None:
+            return None
+
+        # Retrieve plan
+        trajectory = self.trajectory_cache.get(
+            cache_key, is_valid=self._trajectory_is_valid
+        )
+        rospy.loginfo(
+            "Trajectory cache %s (hit rate: %.1f%%, saved planning time: %.2f s)."
+            % (
+                "hit" if trajectory is not None else "miss",
+                100.0 * self.trajectory_cache.hit_rate,
+                self.trajectory_cache.saved_planning_time,
+            )
+        )
+
+        # Start the plan at the exact start state
+        # NOTE: The cached plan starts at the discretized start state.
+        if trajectory is None:
+            return None
+        trajectory.positions[0] = start_joint_values
+        return trajectory.to_msg()
+
+    def _cache_plan(self, cache_key, plan, planning_time):
+        """Add a plan to the trajectory cache.
+
+        Parameters
+        ----------
+        cache_key : :py:obj:`tuple`
+            The cache key.
+        plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan.
+        planning_time : :py:obj:`float`
+            The time in seconds it took to compute the plan.
+        """
+        if cache_key is not None and plan_exists(plan):
+            self.trajectory_cache.put(cache_key, plan, planning_time)
+
+    def _get_planning_scene_hash(self, include_attached=True):
+        """Compute a hash of the collision objects in the planning scene. The
+        octomap is not included as it changes continuously. Cached plans are
+        instead checked for collisions before they are reused.
+
+        Parameters
+        ----------
+        include_attached : :py:obj:`bool`, optional
+            Whether the collision objects that are attached to the robot are
+            included, by default True.
+
+        Returns
+        -------
+        :py:obj:`str`
+            The planning scene hash. None if the planning scene could not be
+            retrieved.
+        """
+
+        # Retrieve planning scene collision objects
+        components = PlanningSceneComponents()
+        components.components = (
+            PlanningSceneComponents.WORLD_OBJECT_GEOMETRY
+            | PlanningSceneComponents.ROBOT_STATE_ATTACHED_OBJECTS
+        )
+        try:
+            scene = self._moveit_get_planning_scene_srv(components).scene
+        except rospy.ServiceException as e:
+            rospy.logwarn("Planning scene could not be retrieved: %s" % e)
+            return None
+
+        # Compute hash
+        collision_objects = list(scene.world.collision_objects)
+        if include_attached:
+            collision_objects += [
+                attached_object.object
+                for attached_object in scene.robot_state.attached_collision_objects
+            ]
+        return collision_objects_hash(collision_objects)
+
+    def _trajectory_is_valid(self, trajectory):
+        """Check whether all the states of a trajectory are collision free in the
+        current planning scene. The states are checked from coarse to fine in
+        batches using the planning worker pool.
+
+        Parameters
+        ----------
+        trajectory : :py:obj:`panda_autograsp.planning.Trajectory`
+            The trajectory.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the trajectory is valid.
+        """
+
+        # Check the trajectory states from coarse to fine in batches
+        # NOTE: Stops at the first batch that contains a state in collision.
+        if not states_are_valid(
+            trajectory.positions,
+            lambda states: self._joint_values_are_valid_batch(
+                states, joint_names=trajectory.joint_names
+            ),
+            batch_size=POINT_N_WORKERS,
+        ):
+            rospy.logdebug("Cached plan is in collision and will be discarded.")
+            return False
+        return True
+
+    def _get_ik_cache_key(self, pose, seed_joint_values):
+        """Create the IK cache key of an end effector pose.
+
+        Parameters
+        ----------
+        pose : :py:obj:`!geometry_msgs.msg.Pose`
+            The end effector pose.
+        seed_joint_values : :py:obj:`list`
+            The joint values from which the planning starts.
+
+        Returns
+        -------
+        :py:obj:`tuple`
+            The cache key. None if the IK cache is disabled.
+        """
+        if self.ik_cache is None:
+            return None
+        return self.ik_cache.make_key(
+            pose, self.move_group.get_pose_reference_frame(), seed_joint_values
+        )
+
+    def _get_cached_ik_solution(self, ik_cache_key, joint_values):
+        """Retrieve the cached IK solution that is closest to the given joint
+        values. The solution is checked for collisions against the current planning
+        scene before it is returned.
+
+        Parameters
+        ----------
+        ik_cache_key : :py:obj:`tuple`
+            The IK cache key.
+        joint_values : :py:obj:`list`
+            The joint values from which the planning starts.
+
+        Returns
+        -------
+        :py:obj:`list`
+            The goal values of the active joints. None if no valid solution was
+            found.
+        """
+
+        # Check if cache is enabled
+        if ik_cache_key is None:
+            return None
+
+        # Retrieve solution
+        solution = self.ik_cache.get(
+            ik_cache_key, joint_values, is_valid=self._joint_values_are_valid
+        )
+        rospy.loginfo(
+            "IK cache %s (hit rate: %.1f%%)."
+            % (
+                "hit" if solution is not None else "miss",
+                100.0 * self.ik_cache.hit_rate,
+            )
+        )
+        return solution
+
+    def _cache_ik_solution(self, ik_cache_key, plan):
+        """Add the end state of a plan to the IK cache.
+
+        Parameters
+        ----------
+        ik_cache_key : :py:obj:`tuple`
+            The IK cache key.
+        plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan.
+        """
+
+        # Check if cache is enabled
+        if ik_cache_key is None or not plan_exists(plan):
+            return
+
+        # Store the active joint values of the final plan state
+        trajectory = Trajectory.from_msg(plan)
+        try:
+            joint_indices = [
+                trajectory.joint_names.index(joint_name)
+                for joint_name in self.move_group.get_active_joints()
+            ]
+        except ValueError:
+            return
+        self.ik_cache.put(ik_cache_key, trajectory.positions[-1, joint_indices])
+
+    def _joint_values_are_valid(self, joint_values, joint_names=None):
+        """Check whether the active joint values of the main move group are
+        collision free in the current planning scene.
+
+        Parameters
+        ----------
+        joint_values : :py:obj:`list`
+            The active joint values.
+        joint_names : :py:obj:`list`, optional
+            The names of the joints, by default the active joints of the main move
+            group.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the joint values are valid.
+        """
+        robot_state = RobotState()
+        robot_state.is_diff = True
+        robot_state.joint_state.name = (
+            self.move_group.get_active_joints() if joint_names is None else joint_names
+        )
+        robot_state.joint_state.position = joint_values
+        try:
+            result = self._moveit_check_state_validity_srv(
+                robot_state=robot_state, group_name=self.move_group.get_name()
+            )
+        except rospy.ServiceException as e:
+            rospy.logwarn("Joint values could not be validated: %s" % e)
+            return False
+        return result.valid
+
+    def _joint_values_are_valid_batch(self, joint_values, joint_names=None):
+        """Check whether multiple sets of active joint values of the main move group
+        are collision free. The sets are checked concurrently using the planning
+        worker pool.
+
+        Parameters
+        ----------
+        joint_values : :py:obj:`numpy.ndarray`
+            (M, D) array containing the active joint values.
+        joint_names : :py:obj:`list`, optional
+            The names of the joints, by default the active joints of the main move
+            group.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (M,) bool array specifying which joint values are valid.
+        """
+        return np.array(
+            self._planning_pool.map(
+                lambda values: self._joint_values_are_valid(values, joint_names),
+                np.asarray(joint_values).tolist(),
+            ),
+            dtype=bool,
+        )
+
+    def _smooth_plan(self, plan):
+        """Shortcut and smooth a plan using the trajectory smoother. The smoothed
+        plan is retimed using the default retiming scaling factors.
+
+        Parameters
+        ----------
+        plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan. None if planning failed.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The smoothed plan. The retimed input plan if smoothing did not reduce
+            the plan duration and the input plan if smoothing is disabled or the
+            plan is empty.
+        """
+
+        # Check if the plan can be smoothed
+        if self.trajectory_smoother is None or plan is None or not plan_exists(plan):
+            return plan
+        trajectory = Trajectory.from_msg(plan)
+        if trajectory.joint_names != self.move_group.get_active_joints():
+            return plan
+
+        # Smooth and retime plan
+        start_time = time.time()
+        smoothed_trajectory = self.trajectory_smoother.process(
+            trajectory, self._joint_values_are_valid_batch
+        )
+        smoothed_plan = self._retime_plan(smoothed_trajectory.to_msg(), [])
+
+        # Keep the original plan if smoothing did not make it faster
+        # NOTE: The original plan is retimed with the same time parameterization
+        # so that the durations can be compared. It is returned when it is faster.
+        retimed_plan = self._retime_plan(plan, [])
+        original_duration = get_plan_duration(retimed_plan)
+        smoothed_duration = get_plan_duration(smoothed_plan)
+        if smoothed_duration >= original_duration:
+            rospy.logdebug(
+                "Plan smoothing did not reduce the duration (%.2f -> %.2f s). Using "
+                "the original plan." % (original_duration, smoothed_duration)
+            )
+            return retimed_plan
+
+        # Log savings
+        rospy.loginfo(
+            "Plan smoothing saved %.3f rad path length (%.3f -> %.3f rad) and %.2f s "
+            "duration (%.2f -> %.2f s) in %.1f ms."
+            % (
+                trajectory.path_length - smoothed_trajectory.path_length,
+                trajectory.path_length,
+                smoothed_trajectory.path_length,
+                original_duration - smoothed_duration,
+                original_duration,
+                smoothed_duration,
+                1000.0 * (time.time() - start_time),
+            )
+        )
+        return smoothed_plan
+
+    def _load_roadmap(self):
+        """Load the precomputed roadmap. The roadmap is only used when it was built
+        for the current static collision objects and the main move group joints.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.planning.Roadmap`
+            The roadmap. None if no valid roadmap was found.
+        """
+
+        # Load roadmap
+        try:
+            roadmap = Roadmap.load(ROADMAP_DIR, batch_size=ROADMAP_CFG["batch_size"])
+        except (IOError, OSError, ValueError, KeyError) as e:
+            rospy.logwarn(
+                "Roadmap could not be loaded from %s: %s. Please run the "
+                "'build_roadmap.py' script to create it." % (ROADMAP_DIR, e)
+            )
+            return None
+
+        # Check if the roadmap is still valid
+        if roadmap.joint_names != self.move_group.get_active_joints():
+            rospy.logwarn(
+                "Roadmap was built for joints %s instead of %s and will not be used."
+                % (roadmap.joint_names, self.move_group.get_active_joints())
+            )
+            return None
+        if roadmap.scene_hash != self._get_planning_scene_hash(include_attached=False):
+            rospy.logwarn(
+                "The static collision objects changed since the roadmap was built. "
+                "Please run the 'build_roadmap.py' script to rebuild it."
+            )
+            return None
+        rospy.loginfo(
+            "Roadmap loaded with %d nodes and %d edges."
+            % (len(roadmap), roadmap.n_edges)
+        )
+        return roadmap
+
+    def _compute_ik(self, pose, seed_joint_values, timeout=None):
+        """Compute a collision-free joint solution for an end effector pose using
+        the moveit ``compute_ik`` service.
+
+        Parameters
+        ----------
+        pose : :py:obj:`!geometry_msgs.msg.Pose`
+            The end effector pose.
+        seed_joint_values : :py:obj:`list`
+            The joint values used as the IK seed.
+        timeout : :py:obj:`float`, optional
+            The IK timeout [s], by default None (the roadmap IK timeout).
+
+        Returns
+        -------
+        :py:obj:`list`
+            The goal values of the active joints. None if no solution was found.
+        """
+
+        # Create IK request
+        ik_req = PositionIKRequest()
+        ik_req.group_name = self.move_group.get_name()
+        ik_req.robot_state.is_diff = True
+        ik_req.robot_state.joint_state.name = self.move_group.get_active_joints()
+        ik_req.robot_state.joint_state.position = seed_joint_values
+        ik_req.avoid_collisions = True
+        ik_req.ik_link_name = self.move_group.get_end_effector_link()
+        ik_req.pose_stamped.header.frame_id = self.move_group.get_pose_reference_frame()
+        ik_req.pose_stamped.pose = pose
+        ik_req.timeout = rospy.Duration.from_sec(
+            timeout if timeout is not None else ROADMAP_CFG["ik_timeout"]
+        )
+
+        # Compute IK solution
+        try:
+            resp = self._moveit_compute_ik_srv(ik_req)
+        except rospy.ServiceException as e:
+            rospy.logwarn("IK solution could not be computed: %s" % e)
+            return None
+        if resp.error_code.val != MoveItErrorCodes.SUCCESS:
+            rospy.logdebug("No IK solution found.")
+            return None
+        positions = dict(
+            zip(resp.solution.joint_state.name, resp.solution.joint_state.position)
+        )
+        return [positions[joint] for joint in self.move_group.get_active_joints()]
+
+    def _plan_with_roadmap(self, start_joint_values, joint_goal):
+        """Plan a path by connecting the start and goal to the roadmap. The path is
+        shortcut, interpolated at the roadmap resolution and retimed.
+
+        Parameters
+        ----------
+        start_joint_values : :py:obj:`list`
+            The joint values from which the planning starts.
+        joint_goal : :py:obj:`list`
+            The goal values of the active joints.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan. None if the roadmap is disabled or the query failed.
+        """
+
+        # Check if roadmap is enabled
+        if self.roadmap is None:
+            return None
+
+        # Query roadmap
+        planning_start_time = time.time()
+        path = self.roadmap.query(
+            start_joint_values,
+            joint_goal,
+            self._joint_values_are_valid_batch,
+            n_neighbors=ROADMAP_CFG["query_neighbors"],
+        )
+        if path is None:
+            rospy.loginfo("Roadmap query failed. Falling back to moveit planning.")
+            return None
+        path = self.roadmap.shortcut(path, self._joint_values_are_valid_batch)
+
+        # Create plan
+        positions = [path[:1]] + [
+            self.roadmap.interpolate(q1, q2) for q1, q2 in zip(path[:-1], path[1:])
+        ]
+        plan = Trajectory(
+            self.move_group.get_active_joints(), np.vstack(positions)
+        ).to_msg()
+        plan = self._retime_plan(plan, [])
+        rospy.loginfo(
+            "Roadmap planning successful (%.1f ms)."
+            % (1000.0 * (time.time() - planning_start_time))
+        )
+        return plan
+
+    def shutdown_hook(self):
+        """This functions gets called when the node is shutdown. It saves the
+        trajectory cache and planner statistics to disk and reports the cache
+        statistics.
+        """
+
+        # Save planner statistics
+        if self.planner_selector is not None:
+            rospy.loginfo("Saving planner statistics...")
+            self.planner_selector.save()
+
+        # Report IK cache statistics
+        if self.ik_cache is not None:
+            rospy.loginfo(
+                "IK cache: %d hits, %d misses (%d rejected), hit rate %.1f%%."
+                % (
+                    self.ik_cache.hits,
+                    self.ik_cache.misses,
+                    self.ik_cache.rejections,
+                    100.0 * self.ik_cache.hit_rate,
+                )
+            )
+
+        # Report trajectory cache statistics and save cache
+        if self.trajectory_cache is None:
+            return
+        rospy.loginfo(
+            "Trajectory cache: %d hits, %d misses (%d rejected), hit rate %.1f%%, "
+            "saved planning time %.2f s."
+            % (
+                self.trajectory_cache.hits,
+                self.trajectory_cache.misses,
+                self.trajectory_cache.rejections,
+                100.0 * self.trajectory_cache.hit_rate,
+                self.trajectory_cache.saved_planning_time,
+            )
+        )
+        rospy.loginfo("Saving trajectory cache...")
+        self.trajectory_cache.save()
+
+    def _get_joint_limits(self, robot_description):
+        """Retrieve the velocity and acceleration limits of the main move group
+        joints from the moveit joint limits on the parameter server. Falls back to
+        the limits in the ``main_config.yaml`` file when no limit is found.
+
+        Parameters
+        ----------
+        robot_description : :py:obj:`str`
+            The robot description parameter name.
+
+        Returns
+        -------
+        :py:obj:`tuple`
+            Two dictionaries containing the velocity and acceleration limits of each
+            joint.
+        """
+
+        # Retrieve joint limits
+        max_velocities = {}
+        max_accelerations = {}
+        limits_ns = "%s_planning/joint_limits" % robot_description
+        for i, joint in enumerate(self.move_group.get_active_joints()):
+            max_velocity = rospy.get_param("%s/%s/max_velocity" % (limits_ns, joint), 0)
+            max_acceleration = rospy.get_param(
+                "%s/%s/max_acceleration" % (limits_ns, joint), 0
+            )
+            max_velocities[joint] = (
+                max_velocity
+                if max_velocity > 0
+                else MAIN_CFG["robot"]["max_joint_velocities"][i]
+            )
+            max_accelerations[joint] = (
+                max_acceleration
+                if max_acceleration > 0
+                else MAIN_CFG["robot"]["max_joint_accelerations"][i]
+            )
+
+        # Return joint limits
+        return max_velocities, max_accelerations
+
+    def _retime_plan(self, plan, motion_types):
+        """Retime a plan such that it is executed as fast as the joint limits and
+        the motion type scaling factors allow. The plan is retimed as one
+        continuous motion with the MoveIt time-optimal trajectory generation (TOTG)
+        algorithm, so that the arm does not stop between its motions. The most
+        restrictive scaling factors of the motion types in the plan are used.
+        Afterwards the splines the controller interpolates are checked against the
+        (scaled) joint limits and the plan is slowed down if they are exceeded.
+
+        Parameters
+        ----------
+        plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan you want to retime.
+        motion_types : :py:obj:`list`
+            List containing the ``(end_index, motion_type)`` of each motion in the
+            plan. Segments without motion type use the default scaling factors.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The retimed plan.
+        """
+
+        # Retrieve the motion types that are present in the plan
+        n_points = len(plan.joint_trajectory.points)
+        if n_points < 2:
+            return plan
+        plan_motion_types, start_index = [], 0
+        for end_index, motion_type in motion_types:
+            if end_index > start_index:
+                plan_motion_types.append(motion_type)
+                start_index = end_index
+        if start_index < n_points - 1:
+            plan_motion_types.append(None)
+
+        # Use the most restrictive scaling factors of these motion types
+        scaling_cfg = RETIMING_CFG["scaling"]
+        for motion_type in set(plan_motion_types):
+            if motion_type and motion_type not in scaling_cfg:
+                rospy.logwarn(
+                    "Motion type '%s' has no retiming scaling factors. Using the "
+                    "default scaling factors." % motion_type
+                )
+        motion_scalings = [
+            scaling_cfg.get(motion_type, scaling_cfg["default"])
+            for motion_type in plan_motion_types
+        ]
+        velocity_scaling = min(scaling["velocity"] for scaling in motion_scalings)
+        acceleration_scaling = min(
+            scaling["acceleration"] for scaling in motion_scalings
+        )
+
+        # Retime plan using TOTG
+        retimed_plan = self.move_group.retime_trajectory(
+            self.robot.get_current_state(),
+            copy.deepcopy(plan),
+            velocity_scaling_factor=velocity_scaling,
+            acceleration_scaling_factor=acceleration_scaling,
+            algorithm="time_optimal_trajectory_generation",
+        )
+
+        # Slow down the plan if the controller splines exceed the limits
+        joint_names = plan.joint_trajectory.joint_names
+        velocity_ratio, acceleration_ratio = get_spline_limit_ratios(
+            retimed_plan,
+            velocity_scaling
+            * np.array([self._max_joint_velocities[joint] for joint in joint_names]),
+            acceleration_scaling
+            * np.array([self._max_joint_accelerations[joint] for joint in joint_names]),
+        )
+        slowdown = max(velocity_ratio, np.sqrt(acceleration_ratio))
+        if slowdown > 1.0:
+            rospy.logdebug(
+                "Retimed plan exceeds the joint limits (velocity: %.2f, "
+                "acceleration: %.2f). Slowing it down by a factor %.2f."
+                % (velocity_ratio, acceleration_ratio, slowdown)
+            )
+            retimed_plan = scale_trajectory_time(retimed_plan, slowdown)
+        rospy.logdebug(
+            "Retimed plan from %.3f s to %.3f s."
+            % (get_plan_duration(plan), get_plan_duration(retimed_plan))
+        )
+        return retimed_plan
+
+    def _plan_cartesian_segments(self, waypoints, motion_types, start_state=None):
+        """Plan a cartesian path one waypoint at a time and join the resulting
+        trajectories.
+
+        Parameters
+        ----------
+        waypoints : :py:obj:`list`
+            List containing the :py:obj:`!geometry_msgs.msg.Pose` waypoints.
+        motion_types : :py:obj:`list`
+            List containing the motion type of the motion towards each waypoint.
+        start_state : :py:obj:`!moveit_msgs.msg.RobotState`, optional
+            The state the path starts from, by default None (the current state).
+
+        Returns
+        -------
+        :py:obj:`tuple`
+            The joined plan, the fraction of the path that was planned and a list
+            containing the ``(end_index, motion_type)`` of each motion in the plan.
+        """
+
+        # Plan each path segment
+        plan = RobotTrajectory()
+        plan_motion_types = []
+        fraction = 0.0
+        if start_state is not None:
+            self.move_group.set_start_state(start_state)
+        for waypoint, motion_type in zip(waypoints, motion_types):
+            segment, segment_fraction = self.move_group.compute_cartesian_path(
+                [waypoint], EEF_STEP, JUMP_THRESHOLD
+            )
+            if not plan_exists(segment):
+                break
+            fraction += segment_fraction / len(waypoints)
+
+            # Append segment to the plan
+            if not plan_exists(plan):
+                plan = segment
+            else:
+                time_offset = plan.joint_trajectory.points[-1].time_from_start
+                for point in segment.joint_trajectory.points[1:]:
+                    point.time_from_start += time_offset
+                    plan.joint_trajectory.points.append(point)
+            plan_motion_types.append(
+                (len(plan.joint_trajectory.points) - 1, motion_type)
+            )
+            if segment_fraction < 1.0:
+                break
+
+            # Plan the next segment from the end of this segment
+            self.move_group.set_start_state(self._get_plan_end_state(plan))
+
+        # Reset start state
+        self.move_group.set_start_state_to_current_state()
+
+        # Return plan
+        return plan, fraction, plan_motion_types
+
+    def _publish_display_trajectory(self, display_trajectory):
+        """Publish a display trajectory while making sure that RViz is not flooded
+        with visualizations. When the last visualization was published less than
+        ``min_interval`` seconds ago the trajectory is published when this
+        interval has passed. Only the latest of these delayed trajectories is
+        published.
+
+        Parameters
+        ----------
+        display_trajectory : :py:obj:`!moveit_msgs.msg.DisplayTrajectory`
+            The trajectory you want to display.
+
+        Returns
+        -------
+        :py:obj:`float`
+            The time in seconds after which the trajectory will be published.
+        """
+
+        # Publish trajectory or schedule it for publishing
+        with self._visualization_lock:
+            delay = (
+                self._last_visualization_time + VISUALIZATION_MIN_INTERVAL - time.time()
+            )
+            if delay <= 0.0:
+                self._display_trajectory_publisher.publish(display_trajectory)
+                self._last_visualization_time = time.time()
+                self._pending_display_trajectory = None
+                return 0.0
+            schedule = self._pending_display_trajectory is None
+            self._pending_display_trajectory = display_trajectory
+        if schedule:
+            rospy.Timer(
+                rospy.Duration(delay),
+                self._publish_pending_display_trajectory,
+                oneshot=True,
+            )
+        return delay
+
+    def _publish_pending_display_trajectory(self, event=None):
+        """Publish the display trajectory that was delayed by the visualization rate
+        limit.
+
+        Parameters
+        ----------
+        event : :py:obj:`!rospy.timer.TimerEvent`, optional
+            Structure passed in by the rospy timer, by default None.
+        """
+        with self._visualization_lock:
+            if self._pending_display_trajectory is not None:
+                self._display_trajectory_publisher.publish(
+                    self._pending_display_trajectory
+                )
+                self._last_visualization_time = time.time()
+                self._pending_display_trajectory = None
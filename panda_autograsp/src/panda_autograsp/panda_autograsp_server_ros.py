@@ -21,6 +21,8 @@ import cv2.aruco as aruco
 import matplotlib.pyplot as plt
 import os
 import copy
+import time
+import threading
 from pyquaternion import Quaternion
 import pickle
 from autolab_core import YamlConfig
@@ -36,7 +38,8 @@ import sensor_msgs
 from tf2_geometry_msgs import PoseStamped  # Needed because we use tf2
 from geometry_msgs.msg import TransformStamped
 from std_msgs.msg import Header
-from std_srvs.srv import Empty
+from std_srvs.srv import Empty, SetBool, SetBoolResponse
+from dynamic_reconfigure.msg import Config
 
 from gqcnn.msg import BoundingBox
 from gqcnn.srv import GQCNNGraspPlanner, GQCNNGraspPlannerBoundingBox
@@ -46,6 +49,7 @@ from panda_autograsp.srv import (
     ComputeGrasp,
     PlanGrasp,
     PlanToPoint,
+    PlanToGrasp,
     VisualizePlan,
     VisualizeGrasp,
     ExecutePlan,
@@ -57,10 +61,27 @@ from panda_autograsp.srv import (
     SetGripperClosed,
     PlanPlace,
     PlanToPath,
+    PlanGripper,
+    ExecuteGripperPlan,
+    ExecutePlanWithGripper,
+    CloseGripper,
+    OpenGripper,
+    PickAndPlace,
+    PickAndPlaceResponse,
+    ComputeGraspResponse,
+    HasPlan,
 )
+from panda_autograsp.msg import PickAndPlacePhase
 
 # Panda_autograsp modules, msgs and srvs
 from panda_autograsp.functions import draw_axis
+from panda_autograsp.functions.conversions import (
+    transform_stamped_2_matrix,
+    transform_pose_msgs,
+    pose_msgs_2_matrices,
+)
+from panda_autograsp.functions.moveit import create_collision_objects
+from panda_autograsp.planning import ReachabilityMap, GraspChecker
 
 # Set right matplotlib backend
 # Needed in order to show images inside imported modules
@@ -81,12 +102,44 @@ MAIN_CFG = YamlConfig(
 
 # Get important parameters
 POSE_CALIB_METHOD = MAIN_CFG["calibration"]["pose_estimation_calib_board"]
+PIPELINE_CFG = MAIN_CFG["main"]["pipeline"]
+PIPELINE_ENABLED = bool(PIPELINE_CFG["enabled"])
+REACHABILITY_CFG = MAIN_CFG["planning"]["reachability"]
+GRASP_CHECK_CFG = MAIN_CFG["planning"]["grasp_check"]
+REACHABILITY_DIR = os.path.abspath(
+    os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "../..",
+        REACHABILITY_CFG["dir"],
+    )
+)
+
+# Open collision object configuration file
+COLLISION_OBJ_CFG = YamlConfig(
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(os.path.realpath(__file__)),
+            "../../cfg/moveit_scene_constraints.yaml",
+        )
+    )
+)
 
 #################################################
 # Script settings ###############################
 #################################################
 CALIB_TRY_DURATION = MAIN_CFG["calibration"]["calib_try_duration"]  # [s]
 CABLIB_METHODS = ["chessboard", "aruco_board"]
+PICK_AND_PLACE_PHASES = [
+    "compute_grasp",
+    "plan_grasp",
+    "visualize_grasp",
+    "execute_grasp",
+    "close_gripper",
+    "plan_place",
+    "visualize_place",
+    "execute_place",
+    "open_gripper",
+]
 
 ###############################
 # Chessboard settings #########
@@ -137,6 +190,13 @@ class PandaAutograspServer:
         The rotation vector of the camera/world calibration.
     tvec : :py:obj:`list`
         The translation vector of the camera/world calibration.
+    grasp : :py:obj:`!gqcnn.srv.GQCNNGraspPlannerResponse`
+        The last computed grasp.
+    grasp_pose_msg : :py:obj:`!geometry_msgs.msg.PoseStamped`
+        The pose of the last computed grasp expressed in the camera frame.
+    pipeline_time_saved : :py:obj:`float`
+        The total cycle time [s] that was saved by computing the next grasp while
+        the previous object was being placed.
     """
 
     def __init__(
@@ -144,6 +204,7 @@ class PandaAutograspServer:
         pose_calib_method=POSE_CALIB_METHOD,
         gazebo=False,
         bounding_box_enabled=False,
+        pipelined=PIPELINE_ENABLED,
     ):
         """
         Parameters
@@ -154,6 +215,10 @@ class PandaAutograspServer:
             Specifies whether you want to use a gazebo simulation, by default false.
         bounding_box_enabled : :py:obj:`bool`, optional
             Specifies whether you want to use a bounding box for the grasp detection.
+        pipelined : :py:obj:`bool`, optional
+            Specifies whether the next grasp should be computed and planned while
+            the current object is being placed, by default read from
+            main_config.yaml.
         """
 
         # Get pose calib method from input
@@ -167,6 +232,7 @@ class PandaAutograspServer:
         # Get input variables
         self.gazebo = gazebo
         self.bounding_box_enabled = bounding_box_enabled
+        self.pipelined = pipelined
 
         # Get  bounding box values out of config
         self.bounding_box = BoundingBox()
@@ -181,6 +247,34 @@ class PandaAutograspServer:
         # Setup member variables
         self.rvec = None
         self.tvec = None
+        self.grasp = None
+        self.grasp_pose_msg = None
+        self.pipeline_time_saved = 0.0
+        self._place_planned = False  # Whether the current arm plan is a place plan
+        self._arm_plan_handle = 0  # Handle of the arm plan that is executed next
+        self._gripper_plan_handle = 0  # Handle of the gripper plan
+        self._pre_planned_grasp_handle = 0  # Handle of the grasp planned in advance
+        self._pipeline_thread = None
+        self._pipeline_result = None
+        self._place_execution_end_time = None
+        self.reachability_map = None
+        self.grasp_checker = None  # Created when the first grasp is checked
+
+        # Load the precomputed reachability map
+        # NOTE: Used to discard unreachable grasps before any planning is done.
+        if REACHABILITY_CFG["enabled"]:
+            try:
+                self.reachability_map = ReachabilityMap.load(REACHABILITY_DIR)
+                rospy.loginfo(
+                    "Reachability map with %d voxels loaded."
+                    % np.prod(self.reachability_map.shape)
+                )
+            except (IOError, OSError, ValueError, KeyError) as e:
+                rospy.logwarn(
+                    "Reachability map could not be loaded from %s: %s. Run the "
+                    "'build_reachability_map.py' script to create it."
+                    % (REACHABILITY_DIR, e)
+                )
 
         # Setup opencv termination criteria
         self._criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
@@ -260,6 +354,28 @@ class PandaAutograspServer:
             rospy.logerr(shutdown_msg)
             sys.exit(0)
 
+        # Initialize plan to grasp service
+        rospy.logdebug("Connecting to 'moveit_planner_server/plan_to_grasp' service...")
+        rospy.wait_for_service("moveit_planner_server/plan_to_grasp")
+        try:
+            self._plan_to_grasp_srv = rospy.ServiceProxy(
+                "moveit_planner_server/plan_to_grasp", PlanToGrasp
+            )
+            rospy.logdebug(
+                "Connected to 'moveit_planner_server/plan_to_grasp' service."
+            )
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/plan_to_grasp' service "
+                "initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._plan_to_grasp_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
         # Initialize random cartesian path service
         rospy.logdebug("Connecting to 'moveit_planner_server/plan_to_path' service...")
         rospy.wait_for_service("moveit_planner_server/plan_to_path")
@@ -416,6 +532,149 @@ class PandaAutograspServer:
             rospy.logerr(shutdown_msg)
             sys.exit(0)
 
+        # Initialize plan gripper service
+        rospy.logdebug(
+            "Connecting to 'moveit_planner_server/plan_gripper' " "service..."
+        )
+        rospy.wait_for_service("moveit_planner_server/plan_gripper")
+        try:
+            self._plan_gripper_srv = rospy.ServiceProxy(
+                "moveit_planner_server/plan_gripper", PlanGripper
+            )
+            rospy.logdebug(
+                "Connected to 'moveit_planner_server/plan_gripper' " "service."
+            )
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/plan_gripper' service "
+                "initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._plan_gripper_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
+        # Initialize execute gripper plan service
+        rospy.logdebug(
+            "Connecting to 'moveit_planner_server/execute_gripper_plan' " "service..."
+        )
+        rospy.wait_for_service("moveit_planner_server/execute_gripper_plan")
+        try:
+            self._execute_gripper_plan_srv = rospy.ServiceProxy(
+                "moveit_planner_server/execute_gripper_plan", ExecuteGripperPlan
+            )
+            rospy.logdebug(
+                "Connected to 'moveit_planner_server/execute_gripper_plan' " "service."
+            )
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/execute_gripper_plan' service "
+                "initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._execute_gripper_plan_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
+        # Initialize moveit_planner_server/execute_plan_with_gripper service
+        rospy.logdebug(
+            "Connecting to 'moveit_planner_server/execute_plan_with_gripper' "
+            "service..."
+        )
+        rospy.wait_for_service("moveit_planner_server/execute_plan_with_gripper")
+        try:
+            self._execute_plan_with_gripper_srv = rospy.ServiceProxy(
+                "moveit_planner_server/execute_plan_with_gripper",
+                ExecutePlanWithGripper,
+            )
+            rospy.logdebug(
+                "Connected to 'moveit_planner_server/execute_plan_with_gripper' "
+                "service."
+            )
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/execute_plan_with_gripper' "
+                "service initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._execute_plan_with_gripper_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
+        # Initialize moveit_planner_server/has_plan service
+        rospy.logdebug("Connecting to 'moveit_planner_server/has_plan' service...")
+        rospy.wait_for_service("moveit_planner_server/has_plan")
+        try:
+            self._has_plan_srv = rospy.ServiceProxy(
+                "moveit_planner_server/has_plan", HasPlan
+            )
+            rospy.logdebug("Connected to 'moveit_planner_server/has_plan' service.")
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/has_plan' service "
+                "initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._has_plan_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
+        # Initialize close gripper service
+        rospy.logdebug(
+            "Connecting to 'moveit_planner_server/close_gripper' " "service..."
+        )
+        rospy.wait_for_service("moveit_planner_server/close_gripper")
+        try:
+            self._close_gripper_srv = rospy.ServiceProxy(
+                "moveit_planner_server/close_gripper", CloseGripper
+            )
+            rospy.logdebug(
+                "Connected to 'moveit_planner_server/close_gripper' " "service."
+            )
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/close_gripper' service "
+                "initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._close_gripper_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
+        # Initialize open gripper service
+        rospy.logdebug(
+            "Connecting to 'moveit_planner_server/open_gripper' " "service..."
+        )
+        rospy.wait_for_service("moveit_planner_server/open_gripper")
+        try:
+            self._open_gripper_srv = rospy.ServiceProxy(
+                "moveit_planner_server/open_gripper", OpenGripper
+            )
+            rospy.logdebug(
+                "Connected to 'moveit_planner_server/open_gripper' " "service."
+            )
+        except rospy.ServiceException as e:
+            rospy.logerr(
+                "Panda_autograsp 'moveit_planner_server/open_gripper' service "
+                "initialization failed: %s" % e
+            )
+            shutdown_msg = (
+                "Shutting down %s node because %s service connection failed."
+                % (rospy.get_name(), self._open_gripper_srv.resolved_name)
+            )
+            rospy.logerr(shutdown_msg)
+            sys.exit(0)
+
         # Initialize reset octomap service
         rospy.logdebug("Connecting to '/clear_octomap/' service...")
         rospy.wait_for_service("/clear_octomap")
@@ -478,6 +737,18 @@ class PandaAutograspServer:
             "plan_place", PlanPlace, self.plan_place_service
         )
 
+        # Pick and place service
+        rospy.logdebug("Initializing 'pick_and_place' service...")
+        self._confirm_event = threading.Event()
+        self._confirm_result = False
+        self._confirm_phase = None
+        self._pick_and_place_srv = rospy.Service(
+            "pick_and_place", PickAndPlace, self.pick_and_place_service
+        )
+        self._pick_and_place_confirm_srv = rospy.Service(
+            "pick_and_place/confirm", SetBool, self.pick_and_place_confirm_service
+        )
+
         # Service initiation success message
         rospy.loginfo(
             "'%s' services initialized successfully. Waiting for requests.",
@@ -532,6 +803,16 @@ class PandaAutograspServer:
         self._tf2_buffer = tf2_ros.Buffer()
         self._tf2_listener = tf2_ros.TransformListener(self._tf2_buffer)
 
+        # Create calibration change subscriber
+        # NOTE: The camera is static relative to the robot. We therefore cache the
+        # camera to robot transform and only refresh it when the calibration is
+        # changed through the tf2_broadcaster dynamic reconfigure server.
+        self._robot_frame_transforms = {}
+        self._calib_update_time = rospy.Time(0)
+        self._calib_update_sub = rospy.Subscriber(
+            "tf2_broadcaster/parameter_updates", Config, self.calib_update_callback
+        )
+
         # Create publisher to publish the place pose
         rospy.logdebug("Creating place pose publisher...")
         self._place_pose_pub = rospy.Publisher(
@@ -539,27 +820,6 @@ class PandaAutograspServer:
         )
         rospy.logdebug("Place pose publisher created.")
 
-        # Create pose subscriber
-        rospy.logdebug("Creating grasp pose subscriber...")
-        self._pose_sub = rospy.Subscriber(
-            "gqcnn_grasp/pose", PoseStamped, self.get_pose_callback
-        )
-        rospy.logdebug("Grasp pose subscriber created.")
-
-    def get_pose_callback(self, pose_msg):
-        """Callback function of the 'gqcnn_graps/pose' subscriber. This function updates the
-        self.pose_msg member variable.
-
-        Parameters
-        ----------
-        pose_msg : :py:obj:`!geometry_msgs.PosedStamed`
-            Grasp pose msgs.
-        """
-
-        # Update pose_msg
-        rospy.loginfo("Received grasp pose.")
-        self.pose_msg = pose_msg
-
     def msg_filter_callback(
         self,
         color_image,
@@ -600,7 +860,8 @@ class PandaAutograspServer:
         """This service is used for computing a vallid grasp out of the
         sensor data. This is done by calling the main grasp computation service
         of the :py:obj:`grasp_planner_server.py` module with the sensor data as
-        its input.
+        its input. When the server is pipelined, the grasp that was computed while
+        the previous object was being placed is used instead.
 
         Parameters
         ----------
@@ -609,26 +870,74 @@ class PandaAutograspServer:
 
         Returns
         -------
-        bool
-            Returns a bool to specify whether the plan was executed successfully.
+        :py:obj:`panda_autograsp.msg.ComputeGraspResponse`
+            The success bool, the computed grasp and the grasp pose expressed in
+            the camera frame.
         """
 
+        # Use the grasp that was computed during the last place motion
+        if self._pipeline_thread is not None:
+            if self._use_pipeline_result():
+                return ComputeGraspResponse(
+                    success=True,
+                    grasp=self.grasp.grasp,
+                    grasp_pose=self.grasp_pose_msg,
+                )
+            rospy.logwarn(
+                "Pipelined grasp computation failed. Computing a new grasp instead."
+            )
+
+        # Call grasp computation service
+        self.grasp, self.grasp_pose_msg = self._compute_grasp()
+
+        # Test if successful
+        if self.grasp:
+            return ComputeGraspResponse(
+                success=True, grasp=self.grasp.grasp, grasp_pose=self.grasp_pose_msg
+            )
+        else:
+            return ComputeGraspResponse(success=False)
+
+    def _compute_grasp(self):
+        """Compute a grasp out of the latest sensor data.
+
+        Returns
+        -------
+        :py:obj:`!gqcnn.srv.GQCNNGraspPlannerResponse`
+            The grasp planner service response.
+        :py:obj:`!geometry_msgs.msg.PoseStamped`
+            The grasp pose expressed in the camera frame.
+        """
+
+        # Retrieve the latest sensor data
+        # Done so that the message filter can not change it during the computation.
+        color_image_rect = self.color_image_rect
+        depth_image_rect = self.depth_image_rect
+        camera_info = self.camera_info_sd
+
         # Call grasp computation service
         if not self.bounding_box_enabled:
-            self.grasp = self._gqcnn_grasp_planning_srv(
-                self.color_image_rect, self.depth_image_rect, self.camera_info_sd
+            grasp = self._gqcnn_grasp_planning_srv(
+                color_image_rect, depth_image_rect, camera_info
             )
         else:
-            self.grasp = self._gqcnn_grasp_planning_bounding_box_srv(
-                self.color_image_rect,
-                self.depth_image_rect,
-                self.camera_info_sd,
+            grasp = self._gqcnn_grasp_planning_bounding_box_srv(
+                color_image_rect,
+                depth_image_rect,
+                camera_info,
                 self.bounding_box,
             )
 
+        # Create grasp pose msg
+        # NOTE: The grasp planner expresses the pose in the camera info frame.
+        grasp_pose_msg = PoseStamped()
+        grasp_pose_msg.header.stamp = camera_info.header.stamp
+        grasp_pose_msg.header.frame_id = camera_info.header.frame_id
+        grasp_pose_msg.pose = grasp.grasp.pose
+
         # Print grasp
-        position = self.grasp.grasp.pose.position
-        orientation = self.grasp.grasp.pose.orientation
+        position = grasp.grasp.pose.position
+        orientation = grasp.grasp.pose.orientation
         pose_array = [
             position.x,
             position.y,
@@ -643,11 +952,8 @@ class PandaAutograspServer:
             "q1={3}, q2={4}, q3={5} and q4={6}".format(*pose_array)
         )
 
-        # Test if successful
-        if self.grasp:
-            return True
-        else:
-            return False
+        # Return grasp
+        return grasp, grasp_pose_msg
 
     def plan_grasp_service(self, req):
         """This service can be used to plan for the by the
@@ -664,23 +970,52 @@ class PandaAutograspServer:
             Returns a bool to specify whether the plan was executed successfully.
         """
 
+        # Use the plan that was computed during the last place motion
+        # NOTE: The plan store of the moveit_planner_server may have dropped the
+        # plan in the meantime. The grasp is planned again in that case.
+        self._place_planned = False
+        if self._pre_planned_grasp_handle:
+            pre_planned_grasp_handle = self._pre_planned_grasp_handle
+            self._pre_planned_grasp_handle = 0
+            if self._plan_is_stored(pre_planned_grasp_handle):
+                self._arm_plan_handle = pre_planned_grasp_handle
+                rospy.loginfo("Using the grasp plan that was computed in advance.")
+                return True
+            rospy.logwarn(
+                "Grasp plan that was computed in advance is no longer available. "
+                "Planning the grasp again."
+            )
+
+        # Plan for the grasp pose
+        if self.grasp_pose_msg is None:
+            rospy.logwarn("No grasp available. Please compute a grasp first.")
+            return False
+        self._arm_plan_handle = self._plan_grasp(self.grasp_pose_msg)
+        return bool(self._arm_plan_handle)
+
+    def _plan_grasp(self, grasp_pose_msg, start_at_plan_end=False):
+        """Plan the arm movement towards a grasp pose.
+
+        Parameters
+        ----------
+        grasp_pose_msg : :py:obj:`!geometry_msgs.msg.PoseStamped`
+            The grasp pose.
+        start_at_plan_end : :py:obj:`bool`, optional
+            Plan from the end state of the arm plan that is currently being executed,
+            by default False.
+
+        Returns
+        -------
+        :py:obj:`int`
+            The handle of the computed plan. 0 if the planning failed.
+        """
+
         # Get pose expressed in the panda_link0 frame
         # Needed since the panda_link0 is the reference frame
         # of the move group.
-        try:
-            grasp_pose_msg = copy.copy(self.pose_msg)  # Create copy
-            grasp_pose_msg.header.stamp = (
-                rospy.Time.now()
-            )  # As we use the default tf buffer we will set the time to be now
-            pose_msg = self._tf2_buffer.transform(
-                grasp_pose_msg, "panda_link0", rospy.Duration(1)
-            )
-        except (
-            tf2_ros.LookupException,
-            tf2_ros.ConnectivityException,
-            tf2_ros.ExtrapolationException,
-        ):
-            return False
+        pose_msg = self._transform_to_robot_frame(grasp_pose_msg)
+        if pose_msg is None:
+            return 0
 
         # Display pose in panda_link0 frame
         position = pose_msg.pose.position
@@ -699,14 +1034,205 @@ class PandaAutograspServer:
             "q3={5} and q4={6}".format(*pose_array)
         )
 
-        # Call grasp plan to pose service
-        result = self._plan_to_pose_srv(pose_msg.pose)
+        # Discard grasps that the robot can not reach or that are infeasible
+        if not self._grasp_is_reachable(pose_msg):
+            return 0
+        if not self._grasp_is_feasible(pose_msg):
+            return 0
+
+        # Call plan to grasp service
+        # NOTE: Plans to the equivalent (parallel-jaw symmetric) grasp pose that
+        # requires the least wrist rotation.
+        result = self._plan_to_grasp_srv(
+            target=pose_msg.pose,
+            start_at_plan_end=start_at_plan_end,
+            motion_type="approach",
+        )
+        if result.success and result.symmetry_index > 0:
+            rospy.loginfo(
+                "Planned to the symmetric grasp pose (estimated motion time %.2f s)."
+                % result.motion_cost
+            )
 
-        # Test if successful
-        if result.success:
+        # Return plan handle
+        return result.plan_handle if result.success else 0
+
+    def _grasp_is_reachable(self, pose_msg):
+        """Check whether a grasp pose is reachable using the precomputed
+        reachability map. Grasps are considered reachable when no map is loaded.
+
+        Parameters
+        ----------
+        pose_msg : :py:obj:`!geometry_msgs.msg.PoseStamped`
+            The grasp pose expressed in the panda_link0 frame.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the grasp is reachable.
+        """
+        if self.reachability_map is None:
             return True
-        else:
+        score = self.reachability_map.score(pose_msgs_2_matrices([pose_msg]))[0]
+        if score < REACHABILITY_CFG["min_score"]:
+            rospy.logwarn(
+                "Grasp discarded as it is not reachable (reachability score %.2f)."
+                % score
+            )
             return False
+        return True
+
+    def _grasp_is_feasible(self, pose_msg):
+        """Check whether the gripper collides with the static collision objects at
+        a grasp pose.
+
+        Parameters
+        ----------
+        pose_msg : :py:obj:`!geometry_msgs.msg.PoseStamped`
+            The grasp pose expressed in the panda_link0 frame.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the grasp is feasible.
+        """
+
+        # Check if the grasp check is enabled
+        if not GRASP_CHECK_CFG["enabled"]:
+            return True
+        if self.grasp_checker is None:
+            self.grasp_checker = self._create_grasp_checker()
+
+        # Check grasp
+        if self.grasp_checker.collides(pose_msgs_2_matrices([pose_msg]))[0]:
+            rospy.logwarn(
+                "Grasp discarded as the gripper would collide with the scene."
+            )
+            return False
+        return True
+
+    def _create_grasp_checker(self):
+        """Create the geometric grasp checker out of the static collision objects
+        of the ``moveit_scene_constraints.yaml`` file.
+
+        Returns
+        -------
+        :py:obj:`~panda_autograsp.planning.GraspChecker`
+            The grasp checker.
+        """
+        grasp_checker = GraspChecker(
+            MAIN_CFG["robot"]["gripper_width"], clearance=GRASP_CHECK_CFG["clearance"]
+        )
+        for collision_obj in create_collision_objects(COLLISION_OBJ_CFG):
+            frame_id = collision_obj.pose.header.frame_id
+            H = None
+            if frame_id != "panda_link0":
+                H = self._get_robot_frame_transform(frame_id)
+                if H is None:
+                    rospy.logwarn(
+                        "Collision object %s is not used in the grasp check as the "
+                        "%s frame is not available." % (collision_obj.name, frame_id)
+                    )
+                    continue
+            grasp_checker.add_collision_object(collision_obj, H)
+        if grasp_checker.ignored_objects:
+            rospy.logdebug(
+                "Collision objects %s are not supported by the grasp check."
+                % grasp_checker.ignored_objects
+            )
+        return grasp_checker
+
+    def _transform_to_robot_frame(self, pose_msg):
+        """Express a pose in the panda_link0 frame.
+
+        Parameters
+        ----------
+        pose_msg : :py:obj:`!geometry_msgs.msg.PoseStamped`
+            The pose you want to transform.
+
+        Returns
+        -------
+        :py:obj:`!geometry_msgs.msg.PoseStamped`
+            The pose expressed in the panda_link0 frame. None if the transform
+            is not available.
+        """
+
+        # Retrieve (cached) transform
+        H = self._get_robot_frame_transform(pose_msg.header.frame_id)
+        if H is None:
+            return None
+
+        # Transform pose
+        robot_pose_msg = PoseStamped()
+        robot_pose_msg.header.stamp = rospy.Time.now()
+        robot_pose_msg.header.frame_id = "panda_link0"
+        robot_pose_msg.pose = transform_pose_msgs(H, [pose_msg.pose])[0]
+        return robot_pose_msg
+
+    def _get_robot_frame_transform(self, frame_id):
+        """Retrieve the transform from a static frame to the panda_link0 frame. The
+        transform is looked up once and then cached until the calibration changes.
+
+        Parameters
+        ----------
+        frame_id : :py:obj:`str`
+            The frame of which you want to retrieve the transform.
+
+        Returns
+        -------
+        :py:obj:`numpy.array`
+            Homogeneous 4x4 transformation matrix. None if the transform is not
+            available.
+        """
+
+        # Return cached transform if available
+        if frame_id in self._robot_frame_transforms:
+            return self._robot_frame_transforms[frame_id]
+
+        # Lookup transform
+        # NOTE: Wait till the transform was broadcasted after the last calibration
+        # change so that we do not cache the old calibration.
+        calib_update_time = self._calib_update_time
+        timeout = rospy.Time.now() + rospy.Duration(1)
+        while True:
+            try:
+                transform_msg = self._tf2_buffer.lookup_transform(
+                    "panda_link0", frame_id, rospy.Time(0), rospy.Duration(1)
+                )
+            except (
+                tf2_ros.LookupException,
+                tf2_ros.ConnectivityException,
+                tf2_ros.ExtrapolationException,
+            ):
+                return None
+            if (
+                transform_msg.header.stamp > calib_update_time
+                or rospy.Time.now() > timeout
+            ):
+                break
+            rospy.sleep(0.05)
+
+        # Cache and return transform
+        H = transform_stamped_2_matrix(transform_msg)
+        if calib_update_time == self._calib_update_time:
+            self._robot_frame_transforms[frame_id] = H
+        return H
+
+    def calib_update_callback(self, config_msg):
+        """Callback function of the tf2_broadcaster ``parameter_updates`` topic. It
+        invalidates the cached robot frame transforms when the calibration changes.
+
+        Parameters
+        ----------
+        config_msg : :py:obj:`!dynamic_reconfigure.msg.Config`
+            The new tf2_broadcaster configuration.
+        """
+        self._clear_robot_frame_transforms()
+
+    def _clear_robot_frame_transforms(self):
+        """Clear the cached robot frame transforms."""
+        self._calib_update_time = rospy.Time.now()
+        self._robot_frame_transforms = {}
 
     def plan_place_service(self, req):
         """This service computes the movement plan for placing the
@@ -726,19 +1252,11 @@ class PandaAutograspServer:
         """
 
         # Retrieve the starting grasp pose (as expressed in the panda_link0 frame
-        try:
-            grasp_pose_msg = copy.copy(self.pose_msg)  # Create copy
-            grasp_pose_msg.header.stamp = (
-                rospy.Time.now()
-            )  # As we use the default tf buffer we will set the time to be now
-            grasp_pose_msg = self._tf2_buffer.transform(
-                self.pose_msg, "panda_link0", rospy.Duration(1)
-            )
-        except (
-            tf2_ros.LookupException,
-            tf2_ros.ConnectivityException,
-            tf2_ros.ExtrapolationException,
-        ):
+        if self.grasp_pose_msg is None:
+            rospy.logwarn("No grasp available. Please compute a grasp first.")
+            return False
+        grasp_pose_msg = self._transform_to_robot_frame(self.grasp_pose_msg)
+        if grasp_pose_msg is None:
             return False
 
         # Generate place pose relative to the panda_link0 frame
@@ -798,13 +1316,17 @@ class PandaAutograspServer:
 
         # Call grasp plan to pose service
         result = self._plan_to_path_srv(
-            [self.pickup_pose_msg.pose, self.place_pose_msg.pose]
+            waypoints=[self.pickup_pose_msg.pose, self.place_pose_msg.pose],
+            motion_types=["lift", "transport"],
         )
 
         # Test if successful
         if result.success:
+            self._arm_plan_handle = result.plan_handle
+            self._place_planned = True
             return True
         else:
+            self._arm_plan_handle = 0
             return False
 
     def visualize_grasp_service(self, req):
@@ -821,7 +1343,10 @@ class PandaAutograspServer:
             Returns a bool to specify whether the plan was executed successfully.
         """
         # Call grasp computation service
-        result = self._visualize_plan_srv()
+        result = self._visualize_plan_srv(
+            plan_handle=self._arm_plan_handle,
+            gripper_plan_handle=self._gripper_plan_handle,
+        )
 
         # Test if successful
         if result.success:
@@ -843,8 +1368,16 @@ class PandaAutograspServer:
             Returns a bool to specify whether the plan was executed successfully.
         """
 
+        # Compute the next grasp while the object is being placed
+        placing = self._place_planned
+        self._place_planned = False
+        if self.pipelined and placing:
+            self._start_pipeline()
+
         # Call grasp computation service
-        result = self._execute_plan_srv()
+        result = self._execute_plan_srv(plan_handle=self._arm_plan_handle)
+        if placing:
+            self._place_execution_end_time = time.time()
 
         # Test if successful
         if result.success:
@@ -852,6 +1385,417 @@ class PandaAutograspServer:
         else:
             return False
 
+    def pick_and_place_service(self, req):
+        """This service runs a full pick and place cycle. It computes, plans and
+        executes the grasp, closes the gripper and plans and executes the place
+        motion. Before each phase that is listed in the request its confirm_phases
+        field the server waits for a confirmation through the
+        :py:meth:`pick_and_place_confirm_service`.
+
+        Parameters
+        ----------
+        req : :py:obj:`panda_autograsp.msg.PickAndPlace`
+            The service request message containing the visualization and
+            confirmation settings.
+
+        Returns
+        -------
+        :py:obj:`panda_autograsp.msg.PickAndPlaceResponse`
+            The outcome and duration of each of the executed phases.
+        """
+
+        # Validate confirmation phases
+        for phase_name in req.confirm_phases:
+            if phase_name not in PICK_AND_PLACE_PHASES:
+                rospy.logwarn(
+                    "Pick and place phase '%s' does not exist and can therefore not "
+                    "be confirmed." % phase_name
+                )
+
+        # Create phase sequence
+        # NOTE: Visualizations only block when the motion is executed without
+        # operator confirmation so that the preview is shown before the robot moves.
+        phases = [
+            ("compute_grasp", lambda: self.compute_grasp_service(None).success),
+            ("plan_grasp", self._pick_and_place_plan_grasp),
+            (
+                "visualize_grasp",
+                lambda: self._visualize_plan_srv(
+                    wait="execute_grasp" not in req.confirm_phases,
+                    plan_handle=self._arm_plan_handle,
+                    gripper_plan_handle=self._gripper_plan_handle,
+                ).success,
+            ),
+            ("execute_grasp", self._pick_and_place_execute_grasp),
+            ("close_gripper", self._pick_and_place_close_gripper),
+            ("plan_place", lambda: self.plan_place_service(None)),
+            (
+                "visualize_place",
+                lambda: self._visualize_plan_srv(
+                    wait="execute_place" not in req.confirm_phases,
+                    plan_handle=self._arm_plan_handle,
+                ).success,
+            ),
+            ("execute_place", lambda: self.execute_grasp_service(None)),
+            ("open_gripper", lambda: self._open_gripper_srv().success),
+        ]
+        if not req.visualize:
+            phases = [phase for phase in phases if not phase[0].startswith("visual")]
+
+        # Run phases
+        rospy.loginfo("Starting pick and place cycle.")
+        response = PickAndPlaceResponse()
+        start_time = time.time()
+        for phase_name, phase in phases:
+
+            # Wait for operator confirmation
+            if phase_name in req.confirm_phases:
+                if not self._wait_for_confirmation(phase_name, req.confirm_timeout):
+                    rospy.logwarn(
+                        "Pick and place cycle aborted before the '%s' phase."
+                        % phase_name
+                    )
+                    response.failed_phase = phase_name
+                    break
+
+            # Execute phase
+            rospy.loginfo("Pick and place phase '%s' started.", phase_name)
+            phase_start_time = time.time()
+            try:
+                success = bool(phase())
+            except rospy.ServiceException as e:
+                rospy.logwarn("Pick and place phase '%s' failed: %s" % (phase_name, e))
+                success = False
+            response.phases.append(
+                PickAndPlacePhase(
+                    name=phase_name,
+                    success=success,
+                    duration=time.time() - phase_start_time,
+                )
+            )
+            if not success:
+                rospy.logwarn("Pick and place phase '%s' failed." % phase_name)
+                response.failed_phase = phase_name
+                break
+        else:
+            response.success = True
+
+        # Return result
+        response.total_duration = time.time() - start_time
+        rospy.loginfo(
+            "Pick and place cycle %s after %.2f s.",
+            "finished" if response.success else "failed",
+            response.total_duration,
+        )
+        return response
+
+    def pick_and_place_confirm_service(self, req):
+        """This service is used to confirm or abort the pick and place phase the
+        :py:meth:`pick_and_place_service` is waiting on.
+
+        Parameters
+        ----------
+        req : :py:obj:`!std_srvs.srv.SetBool`
+            True to continue with the phase and False to abort the cycle.
+
+        Returns
+        -------
+        :py:obj:`!std_srvs.srv.SetBoolResponse`
+            Whether a phase was waiting for a confirmation.
+        """
+
+        # Check if a phase is waiting
+        if self._confirm_phase is None:
+            return SetBoolResponse(
+                success=False, message="No phase is waiting for a confirmation."
+            )
+
+        # Release waiting phase
+        self._confirm_result = req.data
+        self._confirm_event.set()
+        return SetBoolResponse(
+            success=True,
+            message="Phase '%s' %s."
+            % (self._confirm_phase, "confirmed" if req.data else "aborted"),
+        )
+
+    def _wait_for_confirmation(self, phase_name, timeout=0.0):
+        """Wait till a pick and place phase is confirmed through the
+        :py:meth:`pick_and_place_confirm_service`.
+
+        Parameters
+        ----------
+        phase_name : :py:obj:`str`
+            The name of the phase that has to be confirmed.
+        timeout : :py:obj:`float`, optional
+            The maximum time [s] to wait for a confirmation, by default 0.0 (Wait
+            forever).
+
+        Returns
+        -------
+        bool
+            Returns a bool to specify whether the phase was confirmed.
+        """
+
+        # Wait for confirmation
+        rospy.loginfo("Waiting for confirmation of the '%s' phase...", phase_name)
+        self._confirm_result = False
+        self._confirm_event.clear()
+        self._confirm_phase = phase_name
+        start_time = time.time()
+        while not self._confirm_event.wait(0.1):
+            if rospy.is_shutdown() or (
+                timeout > 0.0 and time.time() - start_time > timeout
+            ):
+                break
+        self._confirm_phase = None
+
+        # Return confirmation result
+        return self._confirm_result
+
+    def _pick_and_place_plan_grasp(self):
+        """Plan the gripper and arm motion of the pick and place grasp phase.
+
+        Returns
+        -------
+        bool
+            Returns a bool to specify whether the planning was successful.
+        """
+
+        # Plan gripper opening and arm motion
+        if not self._set_gripper_open_srv().success:
+            return False
+        result = self._plan_gripper_srv()
+        if not result.success:
+            return False
+        self._gripper_plan_handle = result.plan_handle
+        return self.plan_grasp_service(None)
+
+    def _pick_and_place_execute_grasp(self):
+        """Execute the gripper and arm plans of the pick and place grasp phase.
+
+        Returns
+        -------
+        bool
+            Returns a bool to specify whether the execution was successful.
+        """
+
+        # Execute arm plan while opening the gripper
+        return self._execute_plan_with_gripper_srv(
+            trigger_time=0.0, plan_handle=self._arm_plan_handle
+        ).success
+
+    def _pick_and_place_close_gripper(self):
+        """Close the gripper and check whether the object was grasped. The grasp
+        width of the computed grasp is used as the upper bound of the object width.
+
+        Returns
+        -------
+        bool
+            Returns a bool to specify whether the object was grasped.
+        """
+
+        # Close gripper and check grasp
+        result = self._close_gripper_srv()
+        if not result.success and result.grasp_state:
+            rospy.logwarn(
+                "Object was not grasped (state: %s). Aborting the pick and place "
+                "cycle." % result.grasp_state
+            )
+        return result.success
+
+    def _start_pipeline(self):
+        """Start computing and planning the next grasp in a background thread. This
+        is done while the current object is placed so that the next grasp is
+        available when the arm returns.
+        """
+
+        # Wait for the previous pipeline run to finish
+        if self._pipeline_thread is not None:
+            self._pipeline_thread.join()
+
+        # Start pipeline thread
+        rospy.loginfo("Computing next grasp while placing the object...")
+        self._pipeline_result = None
+        self._place_execution_end_time = None
+        self._pipeline_thread = threading.Thread(target=self._pipeline_worker)
+        self._pipeline_thread.daemon = True
+        self._pipeline_thread.start()
+
+    def _pipeline_worker(self):
+        """Compute and plan the next grasp. Used as the target of the pipeline
+        thread.
+        """
+
+        # Wait till the arm has left the camera view
+        if not self._wait_for_clear_view(PIPELINE_CFG["view_clear_timeout"]):
+            rospy.logwarn(
+                "Arm did not leave the camera view within %.1f s. Skipping the "
+                "pipelined grasp computation." % PIPELINE_CFG["view_clear_timeout"]
+            )
+            return
+        start_time = time.time()
+
+        # Compute grasp on the latest frame
+        try:
+            grasp, grasp_pose_msg = self._compute_grasp()
+        except rospy.ServiceException as e:
+            rospy.logwarn("Pipelined grasp computation failed: %s" % e)
+            return
+
+        # Plan towards the grasp starting from the expected post-place state
+        try:
+            plan_handle = self._plan_grasp(grasp_pose_msg, start_at_plan_end=True)
+        except rospy.ServiceException as e:
+            rospy.logwarn("Pipelined grasp planning failed: %s" % e)
+            plan_handle = 0
+
+        # Check whether the grasp plan is still stored
+        if plan_handle and not self._plan_is_stored(plan_handle):
+            rospy.logwarn("Pipelined grasp plan is no longer available.")
+            plan_handle = 0
+
+        # Store result
+        self._pipeline_result = {
+            "grasp": grasp,
+            "pose_msg": grasp_pose_msg,
+            "plan_handle": plan_handle,
+            "start_time": start_time,
+            "end_time": time.time(),
+        }
+
+    def _wait_for_clear_view(self, timeout):
+        """Wait till the arm has left the camera view and a camera frame has been
+        received after that.
+
+        Parameters
+        ----------
+        timeout : :py:obj:`float`
+            Maximum time to wait [s].
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the view became clear within the timeout.
+        """
+        end_time = time.time() + timeout
+        clear_stamp = None
+        while not rospy.is_shutdown() and time.time() < end_time:
+            camera_info = self.camera_info_sd
+            if clear_stamp is None:
+                if self._arm_in_camera_view(camera_info) is False:
+                    clear_stamp = rospy.Time.now()
+            elif camera_info.header.stamp > clear_stamp:
+                return True
+            rospy.sleep(0.05)
+        return False
+
+    def _arm_in_camera_view(self, camera_info):
+        """Check whether the arm is visible in the camera image. The origins of the
+        view check links are looked up in the camera frame and projected onto the
+        image. A link is visible when the sphere with the link radius around its
+        origin overlaps the image.
+
+        Parameters
+        ----------
+        camera_info : :py:obj:`!sensor_msgs.msg.CameraInfo`
+            The camera info of the image.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the arm is in view. None if the link transforms
+            are not available.
+        """
+        K = np.array(camera_info.K, dtype=np.float64).reshape(3, 3)
+        radius = PIPELINE_CFG["link_radius"]
+        for link in PIPELINE_CFG["view_check_links"]:
+
+            # Express the link origin in the camera frame
+            try:
+                translation = self._tf2_buffer.lookup_transform(
+                    camera_info.header.frame_id,
+                    link,
+                    rospy.Time(0),
+                    rospy.Duration(0.1),
+                ).transform.translation
+            except (
+                tf2_ros.LookupException,
+                tf2_ros.ConnectivityException,
+                tf2_ros.ExtrapolationException,
+            ):
+                return None
+
+            # Check whether the link overlaps the image
+            if translation.z <= -radius:
+                continue  # Behind the camera
+            if translation.z <= radius:
+                return True  # Close to the camera
+            u = K[0, 0] * translation.x / translation.z + K[0, 2]
+            v = K[1, 1] * translation.y / translation.z + K[1, 2]
+            margin_u = K[0, 0] * radius / translation.z
+            margin_v = K[1, 1] * radius / translation.z
+            if (
+                -margin_u <= u <= camera_info.width + margin_u
+                and -margin_v <= v <= camera_info.height + margin_v
+            ):
+                return True
+        return False
+
+    def _plan_is_stored(self, plan_handle):
+        """Check whether a plan is still stored in the moveit_planner_server.
+
+        Parameters
+        ----------
+        plan_handle : :py:obj:`int`
+            The plan handle.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the plan is still available.
+        """
+        try:
+            return self._has_plan_srv(plan_handle=plan_handle).exists
+        except rospy.ServiceException as e:
+            rospy.logwarn("Plan availability could not be checked: %s" % e)
+            return False
+
+    def _use_pipeline_result(self):
+        """Wait for the pipeline thread and use the grasp it computed.
+
+        Returns
+        -------
+        bool
+            Returns a bool to specify whether a pipelined grasp is available.
+        """
+
+        # Wait for pipeline thread
+        self._pipeline_thread.join()
+        self._pipeline_thread = None
+        result = self._pipeline_result
+        self._pipeline_result = None
+        if result is None or not result["grasp"]:
+            return False
+
+        # Use pipelined grasp
+        self.grasp = result["grasp"]
+        self.grasp_pose_msg = result["pose_msg"]
+        self._pre_planned_grasp_handle = result["plan_handle"]
+
+        # Compute the time that overlapped with the place motion
+        overlap_end_time = result["end_time"]
+        if self._place_execution_end_time is not None:
+            overlap_end_time = min(overlap_end_time, self._place_execution_end_time)
+        time_saved = max(0.0, overlap_end_time - result["start_time"])
+        self.pipeline_time_saved += time_saved
+        rospy.loginfo(
+            "Pipelining saved %.2f s of cycle time (%.2f s in total).",
+            time_saved,
+            self.pipeline_time_saved,
+        )
+        return True
+
     def calibrate_sensor_service(self, req):
         """This service can be used to perform the sensor/world
         calibration. To do this you need to place a chessboard/aruco
@@ -1186,8 +2130,9 @@ class PandaAutograspServer:
             # Communicate sensor_frame_pose to the tf2_broadcaster node
             result = self._set_sensor_pose_srv(sensor_frame_tf_msg)
 
-            # Reset the octomap if pose was succesfully set
+            # Reset the octomap and transform cache if pose was succesfully set
             if result.success:
+                self._clear_robot_frame_transforms()
                 # Wait some time to give tf2_broadcaster the time to broadcast
                 rospy.sleep(MAIN_CFG["calibration"]["octomap_reset_wait_Time"])
                 self._clear_octomap_srv()
@@ -1241,8 +2186,9 @@ class PandaAutograspServer:
             # Communicate sensor_frame_pose to the tf2_broadcaster node
             result = self._set_sensor_pose_srv(sensor_frame_tf_msg)
 
-            # Reset the octomap if pose was succesfully set
+            # Reset the octomap and transform cache if pose was succesfully set
             if result.success:
+                self._clear_robot_frame_transforms()
 
                 # Wait some time to give tf2_broadcaster the time to broadcast
                 rospy.sleep(MAIN_CFG["calibration"]["octomap_reset_wait_Time"])
@@ -0,0 +1,28 @@
+"""Module containing a number of classes that are used to speed up the motion
+planning of the ``panda_autograsp`` package.
+
+.. autosummary::
+   :toctree: _autosummary
+
+   trajectory
+   trajectory_cache
+   ik_cache
+   roadmap
+   reachability_map
+   grasp_checker
+   grasp_monitor
+   plan_store
+   trajectory_smoother
+   planner_selector
+"""
+
+from .trajectory import Trajectory
+from .trajectory_cache import TrajectoryCache
+from .ik_cache import IKCache
+from .roadmap import Roadmap
+from .reachability_map import ReachabilityMap
+from .grasp_checker import GraspChecker
+from .grasp_monitor import GraspMonitor
+from .plan_store import PlanStore
+from .trajectory_smoother import TrajectorySmoother
+from .planner_selector import PlannerSelector
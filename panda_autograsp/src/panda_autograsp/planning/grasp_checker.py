@@ -0,0 +1,308 @@
+"""Module containing a fast geometric grasp checker. It models the Panda hand and
+fingers as oriented boxes and checks a batch of grasp poses against the static
+collision objects of the planning scene, so that infeasible grasps are rejected
+before any motion planning is done.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import numpy as np
+
+# Panda_autograsp modules, msgs and srvs
+from ..functions.conversions import pose_msgs_2_matrices
+
+# Panda hand model
+# NOTE: Expressed in the grasp frame (origin between the finger tips, z-axis along
+# the approach direction and y-axis along the finger closing direction). Given as
+# (center, size) in meters. The finger centers are set from the gripper width.
+PANDA_HAND_SIZE = (0.06, 0.21, 0.07)
+PANDA_HAND_CENTER_Z = -0.08
+PANDA_FINGER_SIZE = (0.02, 0.02, 0.05)
+PANDA_FINGER_CENTER_Z = -0.02
+
+
+#################################################
+# GraspChecker class ############################
+#################################################
+class GraspChecker(object):
+    """Geometric grasp checker. The gripper is modelled as a number of oriented
+    boxes which are checked against the box, plane, cylinder and sphere collision
+    objects using vectorized separating axis tests. The fingers are modelled in
+    their fully opened position as the gripper is opened before the grasp is
+    approached.
+
+    Cylinders are checked using their inscribed box so that the checker never
+    rejects a grasp that is collision free. Mesh objects are not supported and are
+    ignored.
+
+    Attributes
+    ----------
+    gripper_width : :py:obj:`float`
+        The maximum opening width of the gripper in meters.
+    clearance : :py:obj:`float`
+        The minimum distance between the gripper and the collision objects in
+        meters.
+    gripper_boxes : :py:obj:`numpy.ndarray`
+        (B, 2, 3) array containing the center and half extents of each gripper box
+        expressed in the grasp frame.
+    ignored_objects : :py:obj:`list`
+        The names of the collision objects that are not supported.
+    """
+
+    def __init__(self, gripper_width, clearance=0.0):
+        """
+        Parameters
+        ----------
+        gripper_width : :py:obj:`float`
+            The maximum opening width of the gripper in meters.
+        clearance : :py:obj:`float`, optional
+            The minimum distance between the gripper and the collision objects in
+            meters, by default 0.0.
+        """
+
+        # Set class attributes
+        self.gripper_width = gripper_width
+        self.clearance = clearance
+        self.ignored_objects = []
+        self._boxes = []  # (center, rotation, half extents) of the box objects
+        self._spheres = []  # (center, radius) of the sphere objects
+        self._planes = []  # (normal, offset) of the plane objects
+
+        # Create gripper model
+        finger_offset = (gripper_width + PANDA_FINGER_SIZE[1]) / 2.0
+        self.gripper_boxes = np.array(
+            [
+                [[0.0, 0.0, PANDA_HAND_CENTER_Z], PANDA_HAND_SIZE],
+                [[0.0, finger_offset, PANDA_FINGER_CENTER_Z], PANDA_FINGER_SIZE],
+                [[0.0, -finger_offset, PANDA_FINGER_CENTER_Z], PANDA_FINGER_SIZE],
+            ],
+            dtype=np.float64,
+        )
+        self.gripper_boxes[:, 1] /= 2.0
+
+    def __len__(self):
+        """Returns the number of supported collision objects."""
+        return len(self._boxes) + len(self._spheres) + len(self._planes)
+
+    def add_collision_object(self, collision_obj, transform=None):
+        """Add a collision object.
+
+        Parameters
+        ----------
+        collision_obj : :py:obj:`moveit_collision_objects`
+            The :py:mod:`panda_autograsp.moveit_collision_objects` collision object.
+        transform : :py:obj:`numpy.ndarray`, optional
+            4x4 homogeneous transformation matrix from the collision object
+            reference frame to the grasp pose frame, by default None (identity).
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the collision object type is supported.
+        """
+
+        # Express the collision object pose in the grasp pose frame
+        H = pose_msgs_2_matrices([collision_obj.pose])[0]
+        if transform is not None:
+            H = np.asarray(transform).dot(H)
+        center, rotation = H[:3, 3], H[:3, :3]
+
+        # Add collision object
+        collision_type = collision_obj.type.lower()
+        if collision_type == "box":
+            half_extents = np.asarray(collision_obj.size, dtype=np.float64) / 2.0
+            self._boxes.append((center, rotation, half_extents))
+        elif collision_type == "cylinder":
+            # NOTE: Use the box inscribed in the cylinder.
+            half_width = collision_obj.radius / np.sqrt(2.0)
+            half_extents = np.array(
+                [half_width, half_width, collision_obj.height / 2.0]
+            )
+            self._boxes.append((center, rotation, half_extents))
+        elif collision_type == "sphere":
+            self._spheres.append((center, collision_obj.radius))
+        elif collision_type == "plane":
+            # NOTE: The plane (n . p + d = 0) is expressed in the object frame.
+            normal = np.asarray(collision_obj.normal, dtype=np.float64)
+            norm = np.linalg.norm(normal)
+            normal_world = rotation.dot(normal / norm)
+            offset = collision_obj.offset / norm - normal_world.dot(center)
+            self._planes.append((normal_world, offset))
+        else:
+            self.ignored_objects.append(collision_obj.name)
+            return False
+        return True
+
+    def check(self, poses):
+        """Check whether a batch of grasps is feasible.
+
+        Parameters
+        ----------
+        poses : :py:obj:`numpy.ndarray`
+            (N, 4, 4) array of homogeneous transformation matrices containing the
+            grasp poses.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (N,) bool array specifying which grasps are feasible.
+        """
+        return ~self.collides(poses)
+
+    def collides(self, poses):
+        """Check whether the gripper collides with the collision objects for a batch
+        of grasp poses.
+
+        Parameters
+        ----------
+        poses : :py:obj:`numpy.ndarray`
+            (N, 4, 4) array of homogeneous transformation matrices containing the
+            grasp poses.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (N,) bool array specifying which grasps are in collision.
+        """
+
+        # Compute the gripper boxes in the grasp pose frame
+        # NOTE: All boxes of a grasp share the grasp orientation.
+        poses = np.asarray(poses, dtype=np.float64).reshape(-1, 4, 4)
+        rotations = poses[:, :3, :3]  # (N, 3, 3)
+        centers = (
+            np.einsum("nij,bj->nbi", rotations, self.gripper_boxes[:, 0])
+            + poses[:, None, :3, 3]
+        )  # (N, B, 3)
+        half_extents = self.gripper_boxes[:, 1]  # (B, 3)
+
+        # Check the collision objects
+        collides = np.zeros((len(poses), len(self.gripper_boxes)), dtype=bool)
+        for center, rotation, object_half_extents in self._boxes:
+            collides |= self._box_box_overlap(
+                centers, rotations, half_extents, center, rotation, object_half_extents
+            )
+        for center, radius in self._spheres:
+            collides |= self._box_sphere_overlap(
+                centers, rotations, half_extents, center, radius
+            )
+        for normal, offset in self._planes:
+            collides |= self._box_plane_overlap(
+                centers, rotations, half_extents, normal, offset
+            )
+        return np.any(collides, axis=1)
+
+    def _box_box_overlap(
+        self, centers, rotations, half_extents, center, rotation, object_half_extents
+    ):
+        """Separating axis test between the gripper boxes and a box object.
+
+        Parameters
+        ----------
+        centers : :py:obj:`numpy.ndarray`
+            (N, B, 3) array containing the gripper box centers.
+        rotations : :py:obj:`numpy.ndarray`
+            (N, 3, 3) array containing the gripper orientations.
+        half_extents : :py:obj:`numpy.ndarray`
+            (B, 3) array containing the gripper box half extents.
+        center : :py:obj:`numpy.ndarray`
+            The center of the box object.
+        rotation : :py:obj:`numpy.ndarray`
+            3x3 rotation matrix of the box object.
+        object_half_extents : :py:obj:`numpy.ndarray`
+            The half extents of the box object.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (N, B) bool array specifying which gripper boxes overlap the object.
+        """
+
+        # Create candidate separating axes
+        # NOTE: The 3 gripper axes, the 3 object axes and their 9 cross products.
+        gripper_axes = np.swapaxes(rotations, 1, 2)  # (N, 3, 3) rows are axes
+        object_axes = np.broadcast_to(rotation.T, gripper_axes.shape)
+        cross_axes = np.cross(
+            gripper_axes[:, :, None, :], object_axes[:, None, :, :]
+        ).reshape(-1, 9, 3)
+        axes = np.concatenate([gripper_axes, object_axes, cross_axes], axis=1)
+        norms = np.linalg.norm(axes, axis=2)
+        valid = norms > 1e-9  # Parallel edges result in degenerate cross axes
+        axes = axes / np.where(valid, norms, 1.0)[:, :, None]  # (N, 15, 3)
+
+        # Project the boxes on the axes
+        gripper_radii = np.einsum(
+            "bk,nak->nba",
+            half_extents,
+            np.abs(np.einsum("nkj,naj->nak", gripper_axes, axes)),
+        )  # (N, B, 15)
+        object_radii = np.abs(np.einsum("kj,naj->nak", rotation.T, axes)).dot(
+            object_half_extents
+        )  # (N, 15)
+        distances = np.abs(
+            np.einsum("nbj,naj->nba", center - centers, axes)
+        )  # (N, B, 15)
+
+        # Boxes overlap if they are not separated along any axis
+        separated = (
+            distances > gripper_radii + object_radii[:, None, :] + self.clearance
+        ) & valid[:, None, :]
+        return ~np.any(separated, axis=2)
+
+    def _box_sphere_overlap(self, centers, rotations, half_extents, center, radius):
+        """Check whether the gripper boxes overlap a sphere object.
+
+        Parameters
+        ----------
+        centers : :py:obj:`numpy.ndarray`
+            (N, B, 3) array containing the gripper box centers.
+        rotations : :py:obj:`numpy.ndarray`
+            (N, 3, 3) array containing the gripper orientations.
+        half_extents : :py:obj:`numpy.ndarray`
+            (B, 3) array containing the gripper box half extents.
+        center : :py:obj:`numpy.ndarray`
+            The center of the sphere.
+        radius : :py:obj:`float`
+            The radius of the sphere.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (N, B) bool array specifying which gripper boxes overlap the sphere.
+        """
+        local = np.einsum("nji,nbj->nbi", rotations, center - centers)
+        closest = np.clip(local, -half_extents, half_extents)
+        return np.linalg.norm(local - closest, axis=2) <= radius + self.clearance
+
+    def _box_plane_overlap(self, centers, rotations, half_extents, normal, offset):
+        """Check whether the gripper boxes intersect a plane object.
+
+        Parameters
+        ----------
+        centers : :py:obj:`numpy.ndarray`
+            (N, B, 3) array containing the gripper box centers.
+        rotations : :py:obj:`numpy.ndarray`
+            (N, 3, 3) array containing the gripper orientations.
+        half_extents : :py:obj:`numpy.ndarray`
+            (B, 3) array containing the gripper box half extents.
+        normal : :py:obj:`numpy.ndarray`
+            The unit plane normal.
+        offset : :py:obj:`float`
+            The plane offset.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (N, B) bool array specifying which gripper boxes intersect the plane.
+        """
+        radii = np.abs(np.einsum("nji,j->ni", rotations, normal)).dot(half_extents.T)
+        distances = np.abs(centers.dot(normal) + offset)
+        return distances <= radii + self.clearance
@@ -0,0 +1,209 @@
+"""Module containing a grasp monitor. It uses the finger joint states to detect
+empty grasps after the gripper has been closed and to detect when the object slips
+out of the gripper while it is being lifted and transported.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import time
+import threading
+
+# Grasp states
+IDLE = "idle"  # No grasp is being monitored
+UNKNOWN = "unknown"  # The gripper did not settle or no joint states were received
+HOLDING = "holding"  # The fingers are resting on an object
+EMPTY = "empty"  # The fingers closed without an object between them
+SLIPPED = "slipped"  # The object slipped out of the gripper after it was grasped
+
+
+#################################################
+# GraspMonitor class ############################
+#################################################
+class GraspMonitor(object):
+    """Monitors the grasp state using the finger width and effort reported by the
+    gripper joint states. After the gripper has been closed :py:meth:`check` waits
+    till the fingers settle and classifies the grasp. When an object is held the
+    monitor keeps checking every joint state update for slip till :py:meth:`stop`
+    is called.
+
+    Attributes
+    ----------
+    min_width : :py:obj:`float`
+        Finger widths below this value are treated as an empty grasp [m].
+    slip_tolerance : :py:obj:`float`
+        Decrease of the finger width, with respect to the settled width, at which
+        the object is considered to have slipped [m].
+    min_effort : :py:obj:`float`
+        Minimum total finger effort that indicates contact with an object. Not used
+        when zero or when the joint states contain no efforts.
+    settle_time : :py:obj:`float`
+        Time the finger width has to stay within the settle tolerance before the
+        gripper is considered settled [s].
+    settle_tolerance : :py:obj:`float`
+        Finger width changes below this value are not treated as motion [m].
+    on_slip : :py:obj:`function`
+        Function that is called with the finger width when a slip is detected.
+    """
+
+    def __init__(
+        self,
+        min_width=0.002,
+        slip_tolerance=0.003,
+        min_effort=0.0,
+        settle_time=0.1,
+        settle_tolerance=0.0005,
+        on_slip=None,
+    ):
+        """
+        Parameters
+        ----------
+        min_width : :py:obj:`float`, optional
+            Finger widths below this value are treated as an empty grasp [m], by
+            default 0.002.
+        slip_tolerance : :py:obj:`float`, optional
+            Decrease of the finger width at which the object is considered to have
+            slipped [m], by default 0.003.
+        min_effort : :py:obj:`float`, optional
+            Minimum total finger effort that indicates contact with an object, by
+            default 0.0 (Not used).
+        settle_time : :py:obj:`float`, optional
+            Time the finger width has to stay constant before the gripper is
+            considered settled [s], by default 0.1.
+        settle_tolerance : :py:obj:`float`, optional
+            Finger width changes below this value are not treated as motion [m], by
+            default 0.0005.
+        on_slip : :py:obj:`function`, optional
+            Function that is called with the finger width when a slip is detected,
+            by default None.
+        """
+
+        # Set class attributes
+        self.min_width = min_width
+        self.slip_tolerance = slip_tolerance
+        self.min_effort = min_effort
+        self.settle_time = settle_time
+        self.settle_tolerance = settle_tolerance
+        self.on_slip = on_slip
+        self._state = IDLE
+        self._width = None  # Latest finger width
+        self._effort = None  # Latest total finger effort
+        self._stamp = None  # Latest joint state time stamp
+        self._anchor_width = None  # Finger width at the last detected motion
+        self._motion_stamp = None  # Time stamp of the last detected motion
+        self._held_width = None  # Settled finger width of the monitored grasp
+        self._condition = threading.Condition()
+
+    @property
+    def state(self):
+        """Returns the current grasp state."""
+        with self._condition:
+            return self._state
+
+    @property
+    def width(self):
+        """Returns the latest finger width [m] (None if no joint states were
+        received)."""
+        with self._condition:
+            return self._width
+
+    def update(self, width, effort=None, stamp=None):
+        """Process a finger joint state update.
+
+        Parameters
+        ----------
+        width : :py:obj:`float`
+            The distance between the fingers [m].
+        effort : :py:obj:`float`, optional
+            The total finger effort, by default None (Not available).
+        stamp : :py:obj:`float`, optional
+            The time stamp of the joint state [s], by default the current time.
+        """
+        stamp = time.time() if stamp is None else stamp
+        slip_width = None
+        with self._condition:
+
+            # Store finger state and detect finger motion
+            self._width, self._effort, self._stamp = width, effort, stamp
+            if (
+                self._anchor_width is None
+                or abs(width - self._anchor_width) > self.settle_tolerance
+            ):
+                self._anchor_width, self._motion_stamp = width, stamp
+
+            # Check for slip while an object is held
+            if self._state == HOLDING and (
+                width < self._held_width - self.slip_tolerance
+                or width < self.min_width
+                or not self._has_contact_effort(effort)
+            ):
+                self._state = SLIPPED
+                slip_width = width
+            self._condition.notify_all()
+
+        # Report slip
+        # NOTE: Called outside the lock so that the callback can use the monitor.
+        if slip_width is not None and self.on_slip is not None:
+            self.on_slip(slip_width)
+
+    def check(self, timeout=1.0):
+        """Wait till the fingers have settled and classify the grasp. When an
+        object is held slip monitoring is started.
+
+        Parameters
+        ----------
+        timeout : :py:obj:`float`, optional
+            Maximum time to wait for the fingers to settle [s], by default 1.0.
+
+        Returns
+        -------
+        :py:obj:`str`
+            The grasp state (``holding``, ``empty`` or ``unknown``).
+        """
+        end_time = time.time() + timeout
+        with self._condition:
+
+            # Wait till the finger width stopped changing
+            while not self._settled():
+                remaining = end_time - time.time()
+                if remaining <= 0.0:
+                    self._state = UNKNOWN
+                    return self._state
+                self._condition.wait(remaining)
+
+            # Classify grasp
+            if self._width < self.min_width or not self._has_contact_effort(
+                self._effort
+            ):
+                self._state = EMPTY
+            else:
+                self._state = HOLDING
+                self._held_width = self._width
+            return self._state
+
+    def stop(self):
+        """Stop monitoring the grasp. Call this before the gripper is opened."""
+        with self._condition:
+            self._state = IDLE
+            self._held_width = None
+
+    def _settled(self):
+        """Returns whether the finger width stayed constant for the settle time."""
+        return (
+            self._stamp is not None
+            and self._stamp - self._motion_stamp >= self.settle_time
+        )
+
+    def _has_contact_effort(self, effort):
+        """Returns whether the finger effort indicates contact with an object.
+        Always true when the effort check is disabled or no efforts are
+        available."""
+        return self.min_effort <= 0.0 or effort is None or effort >= self.min_effort
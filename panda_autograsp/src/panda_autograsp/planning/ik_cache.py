@@ -0,0 +1,223 @@
+"""Module containing a Least Recently Used (LRU) inverse kinematics cache. It stores
+the joint solutions of end effector poses that are requested often (for example the
+place pose) so that the planner can plan directly to a joint goal.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+#################################################
+# IKCache class #################################
+#################################################
+class IKCache(object):
+    """Least Recently Used (LRU) cache for inverse kinematics solutions. Each entry
+    can contain multiple joint solutions for the same end effector pose.
+
+    Attributes
+    ----------
+    max_size : :py:obj:`int`
+        The maximum number of poses in the cache.
+    max_solutions : :py:obj:`int`
+        The maximum number of joint solutions that are stored for each pose.
+    pose_resolution : :py:obj:`float`
+        The resolution used for discretizing the end effector poses.
+    seed_resolution : :py:obj:`float`
+        The resolution used for discretizing the seed joint values in radians.
+    hits : :py:obj:`int`
+        The number of cache hits.
+    misses : :py:obj:`int`
+        The number of cache misses.
+    rejections : :py:obj:`int`
+        The number of cached solutions that were rejected because they were no
+        longer valid.
+    """
+
+    def __init__(
+        self, max_size=100, max_solutions=5, pose_resolution=0.001, seed_resolution=0.5
+    ):
+        """
+        Parameters
+        ----------
+        max_size : :py:obj:`int`, optional
+            The maximum number of poses in the cache, by default 100.
+        max_solutions : :py:obj:`int`, optional
+            The maximum number of joint solutions that are stored for each pose, by
+            default 5.
+        pose_resolution : :py:obj:`float`, optional
+            The resolution used for discretizing the end effector poses, by default
+            0.001.
+        seed_resolution : :py:obj:`float`, optional
+            The resolution used for discretizing the seed joint values in radians,
+            by default 0.5.
+        """
+
+        # Set class attributes
+        self.max_size = max_size
+        self.max_solutions = max_solutions
+        self.pose_resolution = pose_resolution
+        self.seed_resolution = seed_resolution
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of poses in the cache."""
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        """Returns the fraction of the cache lookups that resulted in a hit."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def make_key(self, pose, frame_id, seed_joint_values):
+        """Create a cache key.
+
+        Parameters
+        ----------
+        pose : :py:obj:`!geometry_msgs.msg.Pose`
+            The end effector pose.
+        frame_id : :py:obj:`str`
+            The frame in which the pose is expressed.
+        seed_joint_values : :py:obj:`list`
+            The joint values from which the motion starts.
+
+        Returns
+        -------
+        :py:obj:`tuple`
+            The cache key.
+        """
+
+        # Discretize the pose and seed joint values
+        pose_key = tuple(
+            np.round(
+                np.array(
+                    [
+                        pose.position.x,
+                        pose.position.y,
+                        pose.position.z,
+                        pose.orientation.x,
+                        pose.orientation.y,
+                        pose.orientation.z,
+                        pose.orientation.w,
+                    ]
+                )
+                / self.pose_resolution
+            )
+            .astype(int)
+            .tolist()
+        )
+        seed_key = tuple(
+            np.round(np.asarray(seed_joint_values) / self.seed_resolution)
+            .astype(int)
+            .tolist()
+        )
+
+        # Return key
+        return (pose_key, frame_id, seed_key)
+
+    def get(self, key, joint_values, is_valid=None):
+        """Retrieve the cached joint solution that is closest to the given joint
+        values.
+
+        Parameters
+        ----------
+        key : :py:obj:`tuple`
+            The cache key.
+        joint_values : :py:obj:`list`
+            The current joint values.
+        is_valid : :py:obj:`function`, optional
+            Function that is used to check whether a cached solution is still
+            valid. Invalid solutions are removed from the cache.
+
+        Returns
+        -------
+        :py:obj:`list`
+            The joint solution. None if no (valid) solution was found.
+        """
+
+        # Retrieve solutions
+        with self._lock:
+            solutions = self._entries.get(key)
+            if solutions is not None:
+                self._entries.pop(key)
+                self._entries[key] = solutions  # Mark as most recently used
+                solutions = solutions.copy()
+        if solutions is None:
+            self.misses += 1
+            return None
+
+        # Return the closest valid solution
+        distances = np.linalg.norm(solutions - np.asarray(joint_values), axis=1)
+        for i in np.argsort(distances):
+            solution = solutions[i].tolist()
+            if is_valid is None or is_valid(solution):
+                self.hits += 1
+                return solution
+            self._remove_solution(key, solutions[i])
+            self.rejections += 1
+        self.misses += 1
+        return None
+
+    def put(self, key, solution):
+        """Add a joint solution to the cache.
+
+        Parameters
+        ----------
+        key : :py:obj:`tuple`
+            The cache key.
+        solution : :py:obj:`list`
+            The joint solution.
+        """
+
+        # Add solution and remove least recently used entries
+        solution = np.asarray(solution, dtype=np.float64)[None, :]
+        with self._lock:
+            solutions = self._entries.pop(key, None)
+            if solutions is None:
+                solutions = solution
+            elif not np.any(np.all(np.isclose(solutions, solution), axis=1)):
+                solutions = np.vstack([solution, solutions])[: self.max_solutions]
+            self._entries[key] = solutions
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all solutions from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def _remove_solution(self, key, solution):
+        """Remove a joint solution from the cache.
+
+        Parameters
+        ----------
+        key : :py:obj:`tuple`
+            The cache key.
+        solution : :py:obj:`numpy.array`
+            The joint solution.
+        """
+        with self._lock:
+            solutions = self._entries.get(key)
+            if solutions is None:
+                return
+            solutions = solutions[~np.all(np.isclose(solutions, solution), axis=1)]
+            if len(solutions) > 0:
+                self._entries[key] = solutions
+            else:
+                self._entries.pop(key)
@@ -0,0 +1,183 @@
+"""Module containing a bounded plan store. It keeps the plans that were computed by
+the :py:class:`MoveitPlannerServer` so that multiple clients can plan concurrently
+and execute or visualize their plans later using the returned plan handle.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import threading
+from collections import OrderedDict
+
+
+#################################################
+# PlanStore class ###############################
+#################################################
+class PlanStore(object):
+    """Thread safe store containing the computed plans keyed by plan handle. When
+    the store is full the least recently used plan is removed.
+
+    Plan handles are positive integers. The handle ``0`` refers to the latest plan
+    that was computed for a given move group so that clients that do not keep
+    track of their plan handles keep working.
+
+    Attributes
+    ----------
+    max_size : :py:obj:`int`
+        The maximum number of plans in the store.
+    """
+
+    def __init__(self, max_size=20):
+        """
+        Parameters
+        ----------
+        max_size : :py:obj:`int`, optional
+            The maximum number of plans in the store, by default 20.
+        """
+
+        # Set class attributes
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._latest = {}  # Latest plan handle of each move group
+        self._next_handle = 1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Returns the number of plans in the store."""
+        return len(self._entries)
+
+    def add(self, plan, group, motion_types=None, goal=None):
+        """Add a plan to the store and mark it as the latest plan of its move group.
+
+        Parameters
+        ----------
+        plan : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The plan.
+        group : :py:obj:`str`
+            The name of the move group the plan was computed for.
+        motion_types : :py:obj:`list`, optional
+            List containing the ``(end_index, motion_type)`` of each motion in the
+            plan, by default None (no motion types).
+        goal : :py:obj:`!geometry_msgs.msg.Pose` or :py:obj:`list`, optional
+            The goal the plan was computed for, by default None.
+
+        Returns
+        -------
+        :py:obj:`int`
+            The plan handle.
+        """
+
+        # Add plan and remove least recently used plans
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 1
+            self._entries[handle] = {
+                "handle": handle,
+                "plan": plan,
+                "group": group,
+                "motion_types": motion_types if motion_types is not None else [],
+                "goal": goal,
+            }
+            self._latest[group] = handle
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        # Return plan handle
+        return handle
+
+    def get(self, handle, group):
+        """Retrieve a plan from the store.
+
+        Parameters
+        ----------
+        handle : :py:obj:`int`
+            The plan handle. ``0`` retrieves the latest plan of the move group.
+        group : :py:obj:`str`
+            The name of the move group the plan should belong to.
+
+        Returns
+        -------
+        :py:obj:`dict`
+            Dictionary containing the ``handle``, ``plan``, ``group``,
+            ``motion_types`` and ``goal`` of the plan. None if the plan is not (or
+            no longer) stored.
+        """
+        with self._lock:
+            handle = self._resolve_handle(handle, group)
+            entry = self._entries.get(handle)
+            if entry is None or entry["group"] != group:
+                return None
+            self._entries.pop(handle)
+            self._entries[handle] = entry  # Mark as most recently used
+            return entry
+
+    def remove(self, handle, group):
+        """Remove a plan from the store.
+
+        Parameters
+        ----------
+        handle : :py:obj:`int`
+            The plan handle. ``0`` removes the latest plan of the move group.
+        group : :py:obj:`str`
+            The name of the move group the plan should belong to.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether a plan was removed.
+        """
+        with self._lock:
+            handle = self._resolve_handle(handle, group)
+            entry = self._entries.get(handle)
+            if entry is None or entry["group"] != group:
+                return False
+            self._entries.pop(handle)
+            if self._latest.get(group) == handle:
+                self._latest.pop(group)
+            return True
+
+    def reset_latest(self, group):
+        """Make sure the handle ``0`` no longer refers to a plan of a move group. Used
+        when planning fails so that older plans are not executed by accident.
+
+        Parameters
+        ----------
+        group : :py:obj:`str`
+            The name of the move group.
+        """
+        with self._lock:
+            self._latest.pop(group, None)
+
+    def clear(self):
+        """Remove all plans from the store."""
+        with self._lock:
+            self._entries.clear()
+            self._latest.clear()
+
+    def _resolve_handle(self, handle, group):
+        """Replace the handle ``0`` with the handle of the latest plan of a move
+        group. Should be called while holding the lock.
+
+        Parameters
+        ----------
+        handle : :py:obj:`int`
+            The plan handle.
+        group : :py:obj:`str`
+            The name of the move group.
+
+        Returns
+        -------
+        :py:obj:`int`
+            The resolved plan handle. None if the move group has no latest plan.
+        """
+        if handle == 0:
+            return self._latest.get(group)
+        return handle
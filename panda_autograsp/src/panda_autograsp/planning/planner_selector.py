@@ -0,0 +1,313 @@
+"""Module containing an adaptive planner selector. It records the outcome of the
+planning queries per planner and goal region and uses these statistics to select
+the planner and planning time that solve similar queries the fastest.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import os
+import json
+import threading
+import numpy as np
+
+# ROS python packages
+import rospy
+
+# Statistics file format version
+STATS_FILE_VERSION = 1
+
+
+#################################################
+# PlannerSelector class #########################
+#################################################
+class PlannerSelector(object):
+    """Selects the planner and planning time of a planning query based on the
+    outcome of previous queries with a goal in the same region. Uses an
+    epsilon-greedy strategy so that the other planners keep being explored.
+
+    Attributes
+    ----------
+    planners : :py:obj:`list`
+        The planner ids that can be selected.
+    default_planner : :py:obj:`str`
+        The planner that is used when no statistics are available.
+    default_planning_time : :py:obj:`float`
+        The planning time in seconds that is used when no statistics are
+        available. Also used as the maximum planning time.
+    stats_file : :py:obj:`str`
+        The file the statistics are saved to.
+    exploration : :py:obj:`float`
+        The probability that a random planner is selected.
+    min_samples : :py:obj:`int`
+        The minimum number of attempts before the statistics of a planner are used.
+    region_size : :py:obj:`float`
+        The size of the goal position regions in meters.
+    joint_region_size : :py:obj:`float`
+        The size of the joint goal regions in radians.
+    time_factor : :py:obj:`float`
+        The planning time budget is set to this factor times the 95th percentile
+        of the successful planning times.
+    min_planning_time : :py:obj:`float`
+        The minimum planning time budget in seconds.
+    window_size : :py:obj:`int`
+        The number of recent planning times that are kept per planner and region.
+    """
+
+    def __init__(
+        self,
+        planners,
+        default_planner,
+        default_planning_time,
+        stats_file=None,
+        exploration=0.1,
+        min_samples=3,
+        region_size=0.2,
+        joint_region_size=1.0,
+        time_factor=2.0,
+        min_planning_time=0.5,
+        window_size=50,
+        seed=None,
+    ):
+        """
+        Parameters
+        ----------
+        planners : :py:obj:`list`
+            The planner ids that can be selected.
+        default_planner : :py:obj:`str`
+            The planner that is used when no statistics are available.
+        default_planning_time : :py:obj:`float`
+            The planning time in seconds that is used when no statistics are
+            available.
+        stats_file : :py:obj:`str`, optional
+            The file the statistics are saved to and loaded from, by default None
+            (not persistent).
+        exploration : :py:obj:`float`, optional
+            The probability that a random planner is selected, by default 0.1.
+        min_samples : :py:obj:`int`, optional
+            The minimum number of attempts before the statistics of a planner are
+            used, by default 3.
+        region_size : :py:obj:`float`, optional
+            The size of the goal position regions in meters, by default 0.2.
+        joint_region_size : :py:obj:`float`, optional
+            The size of the joint goal regions in radians, by default 1.0.
+        time_factor : :py:obj:`float`, optional
+            The planning time budget is set to this factor times the 95th
+            percentile of the successful planning times, by default 2.0.
+        min_planning_time : :py:obj:`float`, optional
+            The minimum planning time budget in seconds, by default 0.5.
+        window_size : :py:obj:`int`, optional
+            The number of recent planning times that are kept per planner and
+            region, by default 50.
+        seed : :py:obj:`int`, optional
+            Seed of the random number generator used for exploration, by default
+            None.
+        """
+
+        # Set class attributes
+        self.planners = list(planners)
+        if default_planner not in self.planners:
+            self.planners.insert(0, default_planner)
+        self.default_planner = default_planner
+        self.default_planning_time = default_planning_time
+        self.stats_file = stats_file
+        self.exploration = exploration
+        self.min_samples = min_samples
+        self.region_size = region_size
+        self.joint_region_size = joint_region_size
+        self.time_factor = time_factor
+        self.min_planning_time = min_planning_time
+        self.window_size = window_size
+        self._stats = {}  # region -> planner -> statistics
+        self._latencies = []  # Recent successful planning times
+        self._random = np.random.RandomState(seed)
+        self._lock = threading.Lock()
+
+        # Load statistics
+        if self.stats_file is not None and os.path.isfile(self.stats_file):
+            self.load()
+
+    @property
+    def median_latency(self):
+        """Returns the median of the recent successful planning times in seconds."""
+        with self._lock:
+            return float(np.median(self._latencies)) if self._latencies else 0.0
+
+    def make_region(self, goal_type, values):
+        """Create the region key of a goal.
+
+        Parameters
+        ----------
+        goal_type : :py:obj:`str`
+            The goal type (``pose`` or ``joint``).
+        values : :py:obj:`list`
+            The goal position (pose goals) or the goal joint values (joint goals).
+
+        Returns
+        -------
+        :py:obj:`str`
+            The region key.
+        """
+        size = self.region_size if goal_type == "pose" else self.joint_region_size
+        cell = np.floor(np.asarray(values, dtype=np.float64) / size).astype(int)
+        return "%s:%s" % (goal_type, ",".join(str(i) for i in cell.tolist()))
+
+    def select(self, region):
+        """Select the planner and planning time for a query.
+
+        Parameters
+        ----------
+        region : :py:obj:`str`
+            The goal region key.
+
+        Returns
+        -------
+        :py:obj:`str`
+            The planner id.
+        :py:obj:`float`
+            The planning time budget in seconds.
+        """
+
+        # Explore a random planner
+        if self._random.rand() < self.exploration:
+            planner = self.planners[self._random.randint(len(self.planners))]
+            return planner, self.default_planning_time
+
+        # Select the planner with the lowest expected planning time
+        # NOTE: The expected planning time is the median planning time divided by
+        # the success rate.
+        with self._lock:
+            region_stats = self._stats.get(region, {})
+            best_planner, best_score, best_times = None, float("inf"), None
+            for planner in self.planners:
+                stats = region_stats.get(planner)
+                if (
+                    stats is None
+                    or stats["attempts"] < self.min_samples
+                    or not stats["times"]
+                ):
+                    continue
+                success_rate = stats["successes"] / stats["attempts"]
+                score = np.median(stats["times"]) / success_rate
+                if score < best_score:
+                    best_planner, best_score, best_times = (
+                        planner,
+                        score,
+                        stats["times"],
+                    )
+
+        # Use the default planner if no statistics are available
+        if best_planner is None:
+            return self.default_planner, self.default_planning_time
+
+        # Compute planning time budget
+        planning_time = float(
+            np.clip(
+                self.time_factor * np.percentile(best_times, 95),
+                self.min_planning_time,
+                self.default_planning_time,
+            )
+        )
+        return best_planner, planning_time
+
+    def record(self, region, planner, success, planning_time):
+        """Record the outcome of a planning attempt.
+
+        Parameters
+        ----------
+        region : :py:obj:`str`
+            The goal region key.
+        planner : :py:obj:`str`
+            The planner id.
+        success : :py:obj:`bool`
+            Whether a plan was found.
+        planning_time : :py:obj:`float`
+            The planning time in seconds.
+        """
+        with self._lock:
+            stats = self._stats.setdefault(region, {}).setdefault(
+                planner, {"attempts": 0, "successes": 0, "times": []}
+            )
+            stats["attempts"] += 1
+            if success:
+                stats["successes"] += 1
+                stats["times"] = (stats["times"] + [planning_time])[-self.window_size :]
+                self._latencies = (self._latencies + [planning_time])[
+                    -self.window_size :
+                ]
+
+    def summary(self):
+        """Returns the statistics of each planner in each region.
+
+        Returns
+        -------
+        :py:obj:`list`
+            List containing a ``(region, planner, attempts, successes,
+            median_planning_time)`` tuple for each planner and region.
+        """
+        with self._lock:
+            return [
+                (
+                    region,
+                    planner,
+                    stats["attempts"],
+                    stats["successes"],
+                    float(np.median(stats["times"])) if stats["times"] else 0.0,
+                )
+                for region, region_stats in sorted(self._stats.items())
+                for planner, stats in sorted(region_stats.items())
+            ]
+
+    def save(self):
+        """Save the statistics to the statistics file."""
+
+        # Check if statistics file was set
+        if self.stats_file is None:
+            return
+
+        # Save statistics
+        stats_dir = os.path.dirname(self.stats_file)
+        if stats_dir and not os.path.isdir(stats_dir):
+            os.makedirs(stats_dir)
+        with self._lock:
+            data = {
+                "version": STATS_FILE_VERSION,
+                "stats": self._stats,
+                "latencies": self._latencies,
+            }
+            with open(self.stats_file, "w") as stats_file:
+                json.dump(data, stats_file, indent=2, sort_keys=True)
+        rospy.logdebug("Saved planner statistics to %s." % self.stats_file)
+
+    def load(self):
+        """Load the statistics from the statistics file."""
+        try:
+            with open(self.stats_file, "r") as stats_file:
+                data = json.load(stats_file)
+        except (IOError, OSError, ValueError) as e:
+            rospy.logwarn(
+                "Planner statistics could not be loaded from %s: %s"
+                % (self.stats_file, e)
+            )
+            return
+        if not isinstance(data, dict) or data.get("version") != STATS_FILE_VERSION:
+            rospy.logwarn(
+                "Planner statistics file %s has an outdated format and is ignored."
+                % self.stats_file
+            )
+            return
+        with self._lock:
+            self._stats = data["stats"]
+            self._latencies = data["latencies"]
+        rospy.logdebug(
+            "Loaded planner statistics of %d regions from %s."
+            % (len(self._stats), self.stats_file)
+        )
@@ -0,0 +1,279 @@
+"""Module containing a precomputed reachability map of the robot workspace. It can
+be used to quickly discard grasp poses that the robot can not reach before any
+(expensive) motion planning is done. The map is stored as a compact numpy array
+that is memory-mapped when the map is loaded.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import os
+import json
+import numpy as np
+
+# Reachability map file names
+SCORES_FILE = "scores.npy"
+METADATA_FILE = "metadata.json"
+
+
+#################################################
+# ReachabilityMap class #########################
+#################################################
+class ReachabilityMap(object):
+    """Voxelized reachability map of the end effector workspace. For each voxel
+    and each approach direction it stores the fraction of the end effector
+    rotations around the approach direction for which an IK solution was found.
+    The scores are stored as ``uint8`` values (0-255).
+
+    Attributes
+    ----------
+    scores : :py:obj:`numpy.ndarray`
+        (X, Y, Z, K) uint8 array containing the reachability score of each voxel
+        and approach direction.
+    origin : :py:obj:`numpy.ndarray`
+        The position of the corner of the first voxel in meters.
+    voxel_size : :py:obj:`float`
+        The size of the voxels in meters.
+    directions : :py:obj:`numpy.ndarray`
+        (K, 3) array containing the unit approach directions (end effector z-axis)
+        expressed in the map frame.
+    frame_id : :py:obj:`str`
+        The frame the map is expressed in.
+    """
+
+    def __init__(self, scores, origin, voxel_size, directions, frame_id="panda_link0"):
+        """
+        Parameters
+        ----------
+        scores : :py:obj:`numpy.ndarray`
+            (X, Y, Z, K) uint8 array containing the reachability score of each
+            voxel and approach direction.
+        origin : :py:obj:`list`
+            The position of the corner of the first voxel in meters.
+        voxel_size : :py:obj:`float`
+            The size of the voxels in meters.
+        directions : :py:obj:`list`
+            (K, 3) list containing the approach directions expressed in the map
+            frame.
+        frame_id : :py:obj:`str`, optional
+            The frame the map is expressed in, by default 'panda_link0'.
+        """
+        self.scores = scores
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.voxel_size = float(voxel_size)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        self.directions = directions / np.linalg.norm(directions, axis=1)[:, None]
+        self.frame_id = frame_id
+
+    @property
+    def shape(self):
+        """Returns the number of voxels along each axis."""
+        return self.scores.shape[:3]
+
+    @classmethod
+    def create(cls, workspace_min, workspace_max, voxel_size, directions, **kwargs):
+        """Create an empty reachability map that covers a workspace.
+
+        Parameters
+        ----------
+        workspace_min : :py:obj:`list`
+            The minimum x, y and z coordinate of the workspace in meters.
+        workspace_max : :py:obj:`list`
+            The maximum x, y and z coordinate of the workspace in meters.
+        voxel_size : :py:obj:`float`
+            The size of the voxels in meters.
+        directions : :py:obj:`list`
+            (K, 3) list containing the approach directions.
+        **kwargs
+            Additional keyword arguments passed to the constructor.
+
+        Returns
+        -------
+        :py:obj:`ReachabilityMap`
+            The reachability map (all scores zero).
+        """
+        workspace_min = np.asarray(workspace_min, dtype=np.float64)
+        workspace_max = np.asarray(workspace_max, dtype=np.float64)
+        shape = np.maximum(
+            np.ceil((workspace_max - workspace_min) / voxel_size).astype(int), 1
+        )
+        n_directions = len(np.asarray(directions).reshape(-1, 3))
+        return cls(
+            np.zeros(tuple(shape) + (n_directions,), dtype=np.uint8),
+            workspace_min,
+            voxel_size,
+            directions,
+            **kwargs
+        )
+
+    @staticmethod
+    def approach_directions(tilt_angles, n_azimuths):
+        """Create approach directions that point downwards (along the negative
+        z-axis) and are tilted by the given angles.
+
+        Parameters
+        ----------
+        tilt_angles : :py:obj:`list`
+            The tilt angles with respect to the negative z-axis in degrees. A tilt
+            angle of zero results in a single top-down direction.
+        n_azimuths : :py:obj:`int`
+            The number of directions that are created for each non-zero tilt angle.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (K, 3) array containing the unit approach directions.
+        """
+        directions = []
+        for tilt in np.radians(tilt_angles):
+            azimuths = (
+                [0.0]
+                if np.isclose(tilt, 0.0)
+                else np.linspace(0.0, 2.0 * np.pi, n_azimuths, endpoint=False)
+            )
+            for azimuth in azimuths:
+                directions.append(
+                    [
+                        np.sin(tilt) * np.cos(azimuth),
+                        np.sin(tilt) * np.sin(azimuth),
+                        -np.cos(tilt),
+                    ]
+                )
+        return np.array(directions)
+
+    def voxel_centers(self):
+        """Returns the centers of all voxels.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (X, Y, Z, 3) array containing the voxel centers in meters.
+        """
+        grid = np.stack(
+            np.meshgrid(*[np.arange(n) for n in self.shape], indexing="ij"), axis=-1
+        )
+        return self.origin + (grid + 0.5) * self.voxel_size
+
+    def approach_frames(self, direction_index, yaws):
+        """Create the end effector orientations that approach along a map
+        direction.
+
+        Parameters
+        ----------
+        direction_index : :py:obj:`int`
+            The index of the approach direction.
+        yaws : :py:obj:`list`
+            The rotation angles around the approach direction in radians.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (M, 3, 3) array containing the rotation matrices. The z-axis of each
+            rotation is the approach direction.
+        """
+
+        # Create an orthonormal frame around the approach direction
+        z = self.directions[direction_index]
+        helper = np.array([1.0, 0.0, 0.0]) if abs(z[0]) < 0.9 else np.eye(3)[1]
+        x = np.cross(helper, z)
+        x /= np.linalg.norm(x)
+        y = np.cross(z, x)
+
+        # Rotate the frame around the approach direction
+        yaws = np.asarray(yaws, dtype=np.float64)[:, None]
+        x_axes = np.cos(yaws) * x + np.sin(yaws) * y
+        y_axes = np.cross(np.broadcast_to(z, x_axes.shape), x_axes)
+        return np.stack([x_axes, y_axes, np.broadcast_to(z, x_axes.shape)], axis=-1)
+
+    def score(self, poses):
+        """Look up the reachability scores of a batch of end effector poses.
+
+        Parameters
+        ----------
+        poses : :py:obj:`numpy.ndarray`
+            (N, 4, 4) array of homogeneous transformation matrices expressed in the
+            map frame.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (N,) array containing the reachability scores (0-1). Poses outside the
+            map get a score of zero.
+        """
+
+        # Compute voxel indices
+        poses = np.asarray(poses, dtype=np.float64).reshape(-1, 4, 4)
+        indices = np.floor((poses[:, :3, 3] - self.origin) / self.voxel_size).astype(
+            int
+        )
+        inside = np.all((indices >= 0) & (indices < np.array(self.shape)), axis=1)
+        indices[~inside] = 0
+
+        # Find the closest approach direction
+        direction_indices = np.argmax(poses[:, :3, 2].dot(self.directions.T), axis=1)
+
+        # Look up the scores
+        scores = self.scores[
+            indices[:, 0], indices[:, 1], indices[:, 2], direction_indices
+        ]
+        return np.where(inside, scores / 255.0, 0.0)
+
+    def save(self, map_dir):
+        """Save the reachability map.
+
+        Parameters
+        ----------
+        map_dir : :py:obj:`str`
+            The directory the map is saved to.
+        """
+        if not os.path.isdir(map_dir):
+            os.makedirs(map_dir)
+        np.save(os.path.join(map_dir, SCORES_FILE), np.asarray(self.scores))
+        with open(os.path.join(map_dir, METADATA_FILE), "w") as metadata_file:
+            json.dump(
+                {
+                    "origin": self.origin.tolist(),
+                    "voxel_size": self.voxel_size,
+                    "directions": self.directions.tolist(),
+                    "frame_id": self.frame_id,
+                },
+                metadata_file,
+                indent=4,
+            )
+
+    @classmethod
+    def load(cls, map_dir):
+        """Load a reachability map. The scores array is memory-mapped.
+
+        Parameters
+        ----------
+        map_dir : :py:obj:`str`
+            The directory the map was saved to.
+
+        Returns
+        -------
+        :py:obj:`ReachabilityMap`
+            The reachability map.
+
+        Raises
+        ------
+        :py:obj:`IOError`
+            If the map files could not be found.
+        """
+        with open(os.path.join(map_dir, METADATA_FILE), "r") as metadata_file:
+            metadata = json.load(metadata_file)
+        return cls(
+            np.load(os.path.join(map_dir, SCORES_FILE), mmap_mode="r"),
+            metadata["origin"],
+            metadata["voxel_size"],
+            metadata["directions"],
+            metadata["frame_id"],
+        )
@@ -0,0 +1,492 @@
+"""Module containing a precomputed joint space roadmap. It can be used to answer
+motion planning queries inside a fixed workspace much faster than planning from
+scratch. The roadmap is stored as a number of numpy arrays that are memory-mapped
+when the roadmap is loaded.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import os
+import json
+import heapq
+import numpy as np
+
+# Panda_autograsp modules, msgs and srvs
+from ..functions.trajectories import states_are_valid
+
+# Roadmap file names
+NODES_FILE = "nodes.npy"
+INDPTR_FILE = "indptr.npy"
+INDICES_FILE = "indices.npy"
+WEIGHTS_FILE = "weights.npy"
+METADATA_FILE = "metadata.json"
+
+
+#################################################
+# Roadmap class #################################
+#################################################
+class Roadmap(object):
+    """Joint space roadmap of collision-free configurations. The edges are stored in
+    Compressed Sparse Row (CSR) format. Roadmap edges are checked again (lazily)
+    during the queries so that collision objects which were not present while the
+    roadmap was built are also taken into account.
+
+    Attributes
+    ----------
+    nodes : :py:obj:`numpy.ndarray`
+        (N, D) array containing the joint configurations.
+    indptr : :py:obj:`numpy.ndarray`
+        (N+1,) array containing the start index of the edges of each node.
+    indices : :py:obj:`numpy.ndarray`
+        (E,) array containing the node index each edge connects to.
+    weights : :py:obj:`numpy.ndarray`
+        (E,) array containing the joint space length of each edge.
+    joint_names : :py:obj:`list`
+        The names of the joints.
+    scene_hash : :py:obj:`str`
+        Hash of the static collision objects the roadmap was built for.
+    resolution : :py:obj:`float`
+        The joint space resolution used for checking the edges in radians.
+    batch_size : :py:obj:`int`
+        The number of edge configurations that are checked for collisions at once.
+    """
+
+    def __init__(
+        self,
+        nodes,
+        indptr,
+        indices,
+        weights,
+        joint_names,
+        scene_hash,
+        resolution=0.05,
+        batch_size=10,
+    ):
+        """
+        Parameters
+        ----------
+        nodes : :py:obj:`numpy.ndarray`
+            (N, D) array containing the joint configurations.
+        indptr : :py:obj:`numpy.ndarray`
+            (N+1,) array containing the start index of the edges of each node.
+        indices : :py:obj:`numpy.ndarray`
+            (E,) array containing the node index each edge connects to.
+        weights : :py:obj:`numpy.ndarray`
+            (E,) array containing the joint space length of each edge.
+        joint_names : :py:obj:`list`
+            The names of the joints.
+        scene_hash : :py:obj:`str`
+            Hash of the static collision objects the roadmap was built for.
+        resolution : :py:obj:`float`, optional
+            The joint space resolution used for checking the edges in radians, by
+            default 0.05.
+        batch_size : :py:obj:`int`, optional
+            The number of edge configurations that are checked for collisions at
+            once, by default 10.
+        """
+
+        # Set class attributes
+        self.nodes = nodes
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.joint_names = list(joint_names)
+        self.scene_hash = scene_hash
+        self.resolution = resolution
+        self.batch_size = batch_size
+
+    def __len__(self):
+        """Returns the number of nodes in the roadmap."""
+        return self.nodes.shape[0]
+
+    @property
+    def n_edges(self):
+        """Returns the number of (undirected) edges in the roadmap."""
+        return self.indices.shape[0] // 2
+
+    @classmethod
+    def build(
+        cls,
+        nodes,
+        joint_names,
+        scene_hash,
+        is_valid,
+        n_neighbors=10,
+        resolution=0.05,
+        batch_size=10,
+    ):
+        """Build a roadmap by connecting each configuration to its nearest
+        neighbours.
+
+        Parameters
+        ----------
+        nodes : :py:obj:`numpy.ndarray`
+            (N, D) array containing the (collision-free) joint configurations.
+        joint_names : :py:obj:`list`
+            The names of the joints.
+        scene_hash : :py:obj:`str`
+            Hash of the static collision objects.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns
+            a (M,) bool array specifying which configurations are collision free.
+        n_neighbors : :py:obj:`int`, optional
+            The number of neighbours each node is connected to, by default 10.
+        resolution : :py:obj:`float`, optional
+            The joint space resolution used for checking the edges in radians, by
+            default 0.05.
+        batch_size : :py:obj:`int`, optional
+            The number of edge configurations that are checked for collisions at
+            once, by default 10.
+
+        Returns
+        -------
+        :py:obj:`Roadmap`
+            The roadmap.
+        """
+
+        # Find the nearest neighbours of each node
+        nodes = np.asarray(nodes, dtype=np.float64)
+        roadmap = cls(
+            nodes,
+            np.zeros(len(nodes) + 1, dtype=np.int64),
+            np.zeros(0, dtype=np.int64),
+            np.zeros(0, dtype=np.float64),
+            joint_names,
+            scene_hash,
+            resolution,
+            batch_size,
+        )
+        candidate_edges = set()
+        for i in range(len(nodes)):
+            for j in roadmap.nearest(nodes[i], n_neighbors + 1):
+                if i != j:
+                    candidate_edges.add((min(i, j), max(i, j)))
+
+        # Check the edges for collisions
+        edges = np.array(
+            [
+                (i, j)
+                for i, j in sorted(candidate_edges)
+                if roadmap.edge_is_valid(nodes[i], nodes[j], is_valid)
+            ],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+
+        # Store edges in both directions in CSR format
+        sources = np.concatenate([edges[:, 0], edges[:, 1]])
+        targets = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.lexsort((targets, sources))
+        sources, targets = sources[order], targets[order]
+        roadmap.indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(sources, minlength=len(nodes)))]
+        ).astype(np.int64)
+        roadmap.indices = targets
+        roadmap.weights = np.linalg.norm(nodes[targets] - nodes[sources], axis=1)
+
+        # Return roadmap
+        return roadmap
+
+    def save(self, roadmap_dir):
+        """Save the roadmap.
+
+        Parameters
+        ----------
+        roadmap_dir : :py:obj:`str`
+            The directory the roadmap is saved to.
+        """
+        if not os.path.isdir(roadmap_dir):
+            os.makedirs(roadmap_dir)
+        np.save(os.path.join(roadmap_dir, NODES_FILE), np.asarray(self.nodes))
+        np.save(os.path.join(roadmap_dir, INDPTR_FILE), np.asarray(self.indptr))
+        np.save(os.path.join(roadmap_dir, INDICES_FILE), np.asarray(self.indices))
+        np.save(os.path.join(roadmap_dir, WEIGHTS_FILE), np.asarray(self.weights))
+        with open(os.path.join(roadmap_dir, METADATA_FILE), "w") as metadata_file:
+            json.dump(
+                {
+                    "joint_names": self.joint_names,
+                    "scene_hash": self.scene_hash,
+                    "resolution": self.resolution,
+                },
+                metadata_file,
+                indent=4,
+            )
+
+    @classmethod
+    def load(cls, roadmap_dir, batch_size=10):
+        """Load a roadmap. The roadmap arrays are memory-mapped.
+
+        Parameters
+        ----------
+        roadmap_dir : :py:obj:`str`
+            The directory the roadmap was saved to.
+        batch_size : :py:obj:`int`, optional
+            The number of edge configurations that are checked for collisions at
+            once, by default 10.
+
+        Returns
+        -------
+        :py:obj:`Roadmap`
+            The roadmap.
+
+        Raises
+        ------
+        :py:obj:`IOError`
+            If the roadmap files could not be found.
+        """
+        with open(os.path.join(roadmap_dir, METADATA_FILE), "r") as metadata_file:
+            metadata = json.load(metadata_file)
+        return cls(
+            np.load(os.path.join(roadmap_dir, NODES_FILE), mmap_mode="r"),
+            np.load(os.path.join(roadmap_dir, INDPTR_FILE), mmap_mode="r"),
+            np.load(os.path.join(roadmap_dir, INDICES_FILE), mmap_mode="r"),
+            np.load(os.path.join(roadmap_dir, WEIGHTS_FILE), mmap_mode="r"),
+            metadata["joint_names"],
+            metadata["scene_hash"],
+            metadata["resolution"],
+            batch_size,
+        )
+
+    def nearest(self, q, k):
+        """Find the nodes that are closest to a given joint configuration.
+
+        Parameters
+        ----------
+        q : :py:obj:`numpy.ndarray`
+            The joint configuration.
+        k : :py:obj:`int`
+            The number of nodes.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            The indices of the nearest nodes sorted by distance.
+        """
+        distances = np.linalg.norm(self.nodes - np.asarray(q), axis=1)
+        k = min(k, len(distances))
+        nearest = np.argpartition(distances, k - 1)[:k]
+        return nearest[np.argsort(distances[nearest])]
+
+    def interpolate(self, q1, q2):
+        """Interpolate between two joint configurations at the roadmap resolution.
+
+        Parameters
+        ----------
+        q1 : :py:obj:`numpy.ndarray`
+            The start configuration.
+        q2 : :py:obj:`numpy.ndarray`
+            The end configuration.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (M, D) array containing the interpolated configurations (including
+            the end configuration but excluding the start configuration).
+        """
+        q1, q2 = np.asarray(q1), np.asarray(q2)
+        n_steps = max(int(np.ceil(np.max(np.abs(q2 - q1)) / self.resolution)), 1)
+        steps = np.arange(1, n_steps + 1)[:, None] / n_steps
+        return q1[None, :] + steps * (q2 - q1)[None, :]
+
+    def edge_is_valid(self, q1, q2, is_valid):
+        """Check whether the straight joint space motion between two configurations
+        is collision free. The interpolated configurations are checked from coarse
+        to fine in batches so that collisions are found early.
+
+        Parameters
+        ----------
+        q1 : :py:obj:`numpy.ndarray`
+            The start configuration.
+        q2 : :py:obj:`numpy.ndarray`
+            The end configuration.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns
+            a (M,) bool array specifying which configurations are collision free.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the motion is collision free.
+        """
+        return states_are_valid(
+            self.interpolate(q1, q2), is_valid, batch_size=self.batch_size
+        )
+
+    def query(self, start, goal, is_valid, n_neighbors=10, max_iterations=20):
+        """Find a collision-free path between two joint configurations using the
+        roadmap. Roadmap edges on the found path are checked for collisions and
+        removed when in collision, after which the search is repeated.
+
+        Parameters
+        ----------
+        start : :py:obj:`list`
+            The start configuration.
+        goal : :py:obj:`list`
+            The goal configuration.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns
+            a (M,) bool array specifying which configurations are collision free.
+        n_neighbors : :py:obj:`int`, optional
+            The number of roadmap nodes the start and goal are connected to, by
+            default 10.
+        max_iterations : :py:obj:`int`, optional
+            The maximum number of searches, by default 20.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (M, D) array containing the path waypoints. None if no path was found.
+        """
+        start = np.asarray(start, dtype=np.float64)
+        goal = np.asarray(goal, dtype=np.float64)
+
+        # Try the direct connection
+        if self.edge_is_valid(start, goal, is_valid):
+            return np.array([start, goal])
+
+        # Connect the start and goal to the roadmap
+        start_nodes = self._connect(start, is_valid, n_neighbors)
+        goal_nodes = self._connect(goal, is_valid, n_neighbors)
+        if not start_nodes or not goal_nodes:
+            return None
+
+        # Search roadmap and lazily check the edges on the path
+        invalid_edges = set()
+        checked_edges = set()
+        for _ in range(max_iterations):
+            node_path = self._search(start_nodes, goal_nodes, goal, invalid_edges)
+            if node_path is None:
+                return None
+            path_valid = True
+            for i, j in zip(node_path[:-1], node_path[1:]):
+                edge = (min(i, j), max(i, j))
+                if edge in checked_edges:
+                    continue
+                if not self.edge_is_valid(self.nodes[i], self.nodes[j], is_valid):
+                    invalid_edges.add(edge)
+                    path_valid = False
+                    break
+                checked_edges.add(edge)
+            if path_valid:
+                return np.vstack([start, self.nodes[node_path], goal])
+        return None
+
+    def shortcut(self, path, is_valid):
+        """Smooth a path by greedily connecting each waypoint to the furthest
+        waypoint it can reach with a collision-free straight joint space motion.
+
+        Parameters
+        ----------
+        path : :py:obj:`numpy.ndarray`
+            (M, D) array containing the path waypoints.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns
+            a (M,) bool array specifying which configurations are collision free.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            The smoothed path.
+        """
+        shortcut_path = [path[0]]
+        i = 0
+        while i < len(path) - 1:
+            j = len(path) - 1
+            while j > i + 1 and not self.edge_is_valid(path[i], path[j], is_valid):
+                j -= 1
+            shortcut_path.append(path[j])
+            i = j
+        return np.array(shortcut_path)
+
+    def _connect(self, q, is_valid, n_neighbors):
+        """Find the roadmap nodes a joint configuration can be connected to.
+
+        Parameters
+        ----------
+        q : :py:obj:`numpy.ndarray`
+            The joint configuration.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns
+            a (M,) bool array specifying which configurations are collision free.
+        n_neighbors : :py:obj:`int`
+            The number of nearest nodes that are tried.
+
+        Returns
+        -------
+        :py:obj:`dict`
+            Dictionary containing the connected node indices and their distances.
+        """
+        connections = {}
+        for i in self.nearest(q, n_neighbors).tolist():
+            if self.edge_is_valid(q, self.nodes[i], is_valid):
+                connections[i] = float(np.linalg.norm(self.nodes[i] - q))
+        return connections
+
+    def _search(self, start_nodes, goal_nodes, goal, invalid_edges):
+        """Find the shortest roadmap path between the start and goal nodes using
+        A*.
+
+        Parameters
+        ----------
+        start_nodes : :py:obj:`dict`
+            The nodes connected to the start configuration and their distances.
+        goal_nodes : :py:obj:`dict`
+            The nodes connected to the goal configuration and their distances.
+        goal : :py:obj:`numpy.ndarray`
+            The goal configuration (used for the heuristic).
+        invalid_edges : :py:obj:`set`
+            Edges that should not be used.
+
+        Returns
+        -------
+        :py:obj:`list`
+            The node indices of the path. None if no path was found.
+        """
+
+        # Initialize search
+        heuristic = np.linalg.norm(self.nodes - goal, axis=1)
+        costs = {}
+        parents = {}
+        open_list = []
+        for i, cost in start_nodes.items():
+            costs[i] = cost
+            parents[i] = None
+            heapq.heappush(open_list, (cost + heuristic[i], i))
+
+        # Search graph
+        best_goal, best_cost = None, float("inf")
+        closed = set()
+        while open_list:
+            f, i = heapq.heappop(open_list)
+            if f >= best_cost:
+                break
+            if i in closed:
+                continue
+            closed.add(i)
+            if i in goal_nodes and costs[i] + goal_nodes[i] < best_cost:
+                best_goal, best_cost = i, costs[i] + goal_nodes[i]
+            for e in range(self.indptr[i], self.indptr[i + 1]):
+                j = int(self.indices[e])
+                if j in closed or (min(i, j), max(i, j)) in invalid_edges:
+                    continue
+                cost = costs[i] + self.weights[e]
+                if cost < costs.get(j, float("inf")):
+                    costs[j] = cost
+                    parents[j] = i
+                    heapq.heappush(open_list, (cost + heuristic[j], j))
+
+        # Retrieve path
+        if best_goal is None:
+            return None
+        node_path = [best_goal]
+        while parents[node_path[-1]] is not None:
+            node_path.append(parents[node_path[-1]])
+        return node_path[::-1]
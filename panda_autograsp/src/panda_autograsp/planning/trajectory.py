@@ -0,0 +1,295 @@
+"""Module containing a compact array-backed joint trajectory class. It is used to
+store, compare and analyse the plans of the :py:class:`MoveitPlannerServer` without
+walking the trajectory messages point by point.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import numpy as np
+
+# ROS python packages
+import rospy
+
+# ROS messages and services
+from moveit_msgs.msg import RobotTrajectory
+from trajectory_msgs.msg import JointTrajectoryPoint
+
+
+#################################################
+# Trajectory class ##############################
+#################################################
+class Trajectory(object):
+    """Joint trajectory that stores its waypoints as contiguous numpy arrays.
+
+    Attributes
+    ----------
+    joint_names : :py:obj:`list`
+        The names of the joints.
+    positions : :py:obj:`numpy.ndarray`
+        (N, D) array containing the joint positions of each waypoint.
+    velocities : :py:obj:`numpy.ndarray`
+        (N, D) array containing the joint velocities of each waypoint. None if the
+        trajectory has no velocities.
+    accelerations : :py:obj:`numpy.ndarray`
+        (N, D) array containing the joint accelerations of each waypoint. None if
+        the trajectory has no accelerations.
+    times : :py:obj:`numpy.ndarray`
+        (N,) array containing the time from start of each waypoint in seconds.
+    """
+
+    __slots__ = ("joint_names", "positions", "velocities", "accelerations", "times")
+
+    def __init__(
+        self, joint_names, positions, velocities=None, accelerations=None, times=None
+    ):
+        """
+        Parameters
+        ----------
+        joint_names : :py:obj:`list`
+            The names of the joints.
+        positions : :py:obj:`numpy.ndarray`
+            (N, D) array containing the joint positions of each waypoint.
+        velocities : :py:obj:`numpy.ndarray`, optional
+            (N, D) array containing the joint velocities of each waypoint, by
+            default None.
+        accelerations : :py:obj:`numpy.ndarray`, optional
+            (N, D) array containing the joint accelerations of each waypoint, by
+            default None.
+        times : :py:obj:`numpy.ndarray`, optional
+            (N,) array containing the time from start of each waypoint in seconds,
+            by default None (all zero).
+        """
+        self.joint_names = list(joint_names)
+        self.positions = np.ascontiguousarray(positions, dtype=np.float64).reshape(
+            -1, len(self.joint_names)
+        )
+        self.velocities = (
+            np.ascontiguousarray(velocities, dtype=np.float64)
+            if velocities is not None
+            else None
+        )
+        self.accelerations = (
+            np.ascontiguousarray(accelerations, dtype=np.float64)
+            if accelerations is not None
+            else None
+        )
+        self.times = (
+            np.ascontiguousarray(times, dtype=np.float64)
+            if times is not None
+            else np.zeros(len(self.positions))
+        )
+
+    def __len__(self):
+        """Returns the number of waypoints."""
+        return self.positions.shape[0]
+
+    def __getstate__(self):
+        """Returns the trajectory state (used for pickling)."""
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        """Sets the trajectory state (used for unpickling)."""
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+    @classmethod
+    def from_msg(cls, robot_trajectory):
+        """Create a trajectory from a moveit trajectory message.
+
+        Parameters
+        ----------
+        robot_trajectory : :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The moveit trajectory.
+
+        Returns
+        -------
+        :py:obj:`Trajectory`
+            The trajectory.
+        """
+        joint_names = robot_trajectory.joint_trajectory.joint_names
+        points = robot_trajectory.joint_trajectory.points
+        n_joints = len(joint_names)
+        velocities = accelerations = None
+        if points and all(len(point.velocities) == n_joints for point in points):
+            velocities = [point.velocities for point in points]
+        if points and all(len(point.accelerations) == n_joints for point in points):
+            accelerations = [point.accelerations for point in points]
+        return cls(
+            joint_names,
+            [point.positions for point in points],
+            velocities,
+            accelerations,
+            [point.time_from_start.to_sec() for point in points],
+        )
+
+    def to_msg(self):
+        """Convert the trajectory into a moveit trajectory message.
+
+        Returns
+        -------
+        :py:obj:`!moveit_msgs.msg.RobotTrajectory`
+            The moveit trajectory.
+        """
+        robot_trajectory = RobotTrajectory()
+        robot_trajectory.joint_trajectory.joint_names = list(self.joint_names)
+        velocities = self.velocities.tolist() if self.velocities is not None else None
+        accelerations = (
+            self.accelerations.tolist() if self.accelerations is not None else None
+        )
+        for i, (positions, time_from_start) in enumerate(
+            zip(self.positions.tolist(), self.times.tolist())
+        ):
+            point = JointTrajectoryPoint()
+            point.positions = positions
+            if velocities is not None:
+                point.velocities = velocities[i]
+            if accelerations is not None:
+                point.accelerations = accelerations[i]
+            point.time_from_start = rospy.Duration.from_sec(time_from_start)
+            robot_trajectory.joint_trajectory.points.append(point)
+        return robot_trajectory
+
+    def copy(self):
+        """Returns a deep copy of the trajectory."""
+        return Trajectory(
+            self.joint_names,
+            self.positions.copy(),
+            self.velocities.copy() if self.velocities is not None else None,
+            self.accelerations.copy() if self.accelerations is not None else None,
+            self.times.copy(),
+        )
+
+    @property
+    def is_empty(self):
+        """Returns whether the trajectory contains no waypoints."""
+        return len(self) == 0
+
+    @property
+    def duration(self):
+        """Returns the duration of the trajectory in seconds."""
+        return float(self.times[-1]) if len(self) > 0 else 0.0
+
+    @property
+    def path_length(self):
+        """Returns the summed euclidean joint space distance between the waypoints
+        in radians."""
+        if len(self) < 2:
+            return 0.0
+        return float(np.sum(np.linalg.norm(np.diff(self.positions, axis=0), axis=1)))
+
+    @property
+    def max_velocities(self):
+        """Returns the maximum absolute velocity of each joint. The velocities are
+        computed from the positions if the trajectory has no velocities."""
+        if len(self) < 2:
+            return np.zeros(len(self.joint_names))
+        if self.velocities is not None:
+            return np.max(np.abs(self.velocities), axis=0)
+        return np.max(np.abs(self._derivative(self.positions)), axis=0)
+
+    @property
+    def max_jerks(self):
+        """Returns the maximum absolute jerk of each joint. The jerks are computed
+        using finite differences."""
+        if len(self) < 2:
+            return np.zeros(len(self.joint_names))
+        if self.accelerations is not None:
+            jerks = self._derivative(self.accelerations)
+        else:
+            velocities = (
+                self.velocities
+                if self.velocities is not None
+                else self._derivative(self.positions, pad=True)
+            )
+            jerks = self._derivative(self._derivative(velocities, pad=True))
+        return np.max(np.abs(jerks), axis=0)
+
+    def at_positions(self, positions, tolerance, index=-1):
+        """Check whether a waypoint lies within a tolerance of the given joint
+        positions.
+
+        Parameters
+        ----------
+        positions : :py:obj:`list`
+            The joint positions.
+        tolerance : :py:obj:`float` or :py:obj:`list`
+            The (per joint) tolerance in radians.
+        index : :py:obj:`int`, optional
+            The index of the waypoint, by default -1 (the last waypoint).
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the waypoint lies within the tolerance.
+        """
+        if len(self) == 0:
+            return False
+        return bool(
+            np.all(
+                np.abs(self.positions[index] - np.asarray(positions))
+                <= np.asarray(tolerance)
+            )
+        )
+
+    def within_limits(self, max_velocities, max_accelerations=None, tolerance=1e-3):
+        """Check whether the trajectory respects the joint velocity and
+        acceleration limits.
+
+        Parameters
+        ----------
+        max_velocities : :py:obj:`list`
+            The maximum velocity of each joint [rad/s].
+        max_accelerations : :py:obj:`list`, optional
+            The maximum acceleration of each joint [rad/s^2], by default None (not
+            checked).
+        tolerance : :py:obj:`float`, optional
+            Relative limit violation tolerance, by default 1e-3.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether the limits are respected.
+        """
+        if len(self) < 2:
+            return True
+        if np.any(self.max_velocities > np.asarray(max_velocities) * (1 + tolerance)):
+            return False
+        if max_accelerations is not None and self.accelerations is not None:
+            return bool(
+                np.all(
+                    np.max(np.abs(self.accelerations), axis=0)
+                    <= np.asarray(max_accelerations) * (1 + tolerance)
+                )
+            )
+        return True
+
+    def _derivative(self, values, pad=False):
+        """Compute the time derivative of waypoint values using finite differences.
+
+        Parameters
+        ----------
+        values : :py:obj:`numpy.ndarray`
+            (N, D) array containing the waypoint values.
+        pad : :py:obj:`bool`, optional
+            Whether the (N-1, D) result should be padded to (N, D) by repeating the
+            last row, by default False.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            The derivatives of the values.
+        """
+        dt = np.maximum(np.diff(self.times), 1e-9)[:, None]
+        derivative = np.diff(values, axis=0) / dt
+        if pad:
+            derivative = np.vstack([derivative, derivative[-1:]])
+        return derivative
@@ -0,0 +1,285 @@
+"""Module containing a Least Recently Used (LRU) trajectory cache. It can be used to
+reuse the trajectories of motions that are repeated often (for example the move to
+the fixed place pose).
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import os
+import pickle
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# ROS python packages
+import rospy
+
+# Panda_autograsp modules, msgs and srvs
+from .trajectory import Trajectory
+
+# Cache file format version
+CACHE_FILE_VERSION = 2
+
+
+#################################################
+# TrajectoryCache class #########################
+#################################################
+class TrajectoryCache(object):
+    """Least Recently Used (LRU) cache for moveit trajectories. Trajectories are
+    stored as :py:class:`~panda_autograsp.planning.Trajectory` objects which keeps
+    the cache compact both in memory and on disk.
+
+    Attributes
+    ----------
+    max_size : :py:obj:`int`
+        The maximum number of trajectories in the cache.
+    cache_file : :py:obj:`str`
+        The file the cache is saved to.
+    joint_resolution : :py:obj:`float`
+        The resolution used for discretizing the joint values in radians.
+    pose_resolution : :py:obj:`float`
+        The resolution used for discretizing the goal poses.
+    hits : :py:obj:`int`
+        The number of cache hits.
+    misses : :py:obj:`int`
+        The number of cache misses.
+    rejections : :py:obj:`int`
+        The number of cached trajectories that were rejected because they were no
+        longer valid.
+    saved_planning_time : :py:obj:`float`
+        The planning time in seconds that was saved by the cache hits.
+    """
+
+    def __init__(
+        self,
+        max_size=100,
+        cache_file=None,
+        joint_resolution=0.01,
+        pose_resolution=0.001,
+    ):
+        """
+        Parameters
+        ----------
+        max_size : :py:obj:`int`, optional
+            The maximum number of trajectories in the cache, by default 100.
+        cache_file : :py:obj:`str`, optional
+            The file the cache is saved to and loaded from, by default None (not
+            persistent).
+        joint_resolution : :py:obj:`float`, optional
+            The resolution used for discretizing the joint values in radians, by
+            default 0.01.
+        pose_resolution : :py:obj:`float`, optional
+            The resolution used for discretizing the goal poses, by default 0.001.
+        """
+
+        # Set class attributes
+        self.max_size = max_size
+        self.cache_file = cache_file
+        self.joint_resolution = joint_resolution
+        self.pose_resolution = pose_resolution
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        self.saved_planning_time = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Load cache from disk
+        if self.cache_file is not None and os.path.isfile(self.cache_file):
+            self.load()
+
+    def __len__(self):
+        """Returns the number of trajectories in the cache."""
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        """Returns the fraction of the cache lookups that resulted in a hit."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else 0.0
+
+    def make_key(self, start_joint_values, goal, planner_id, scene_hash):
+        """Create a cache key.
+
+        Parameters
+        ----------
+        start_joint_values : :py:obj:`list`
+            The joint values from which the trajectory starts.
+        goal : :py:obj:`!geometry_msgs.msg.Pose` or :py:obj:`list`
+            The goal pose or goal joint values.
+        planner_id : :py:obj:`str`
+            The planner that is used.
+        scene_hash : :py:obj:`str`
+            Hash of the planning scene.
+
+        Returns
+        -------
+        :py:obj:`tuple`
+            The cache key.
+        """
+
+        # Discretize the start joint values and goal
+        start_key = tuple(
+            np.round(np.asarray(start_joint_values) / self.joint_resolution)
+            .astype(int)
+            .tolist()
+        )
+        if hasattr(goal, "position"):
+            goal_key = (
+                "pose",
+                tuple(
+                    np.round(
+                        np.array(
+                            [
+                                goal.position.x,
+                                goal.position.y,
+                                goal.position.z,
+                                goal.orientation.x,
+                                goal.orientation.y,
+                                goal.orientation.z,
+                                goal.orientation.w,
+                            ]
+                        )
+                        / self.pose_resolution
+                    )
+                    .astype(int)
+                    .tolist()
+                ),
+            )
+        else:
+            goal_key = (
+                "joints",
+                tuple(
+                    np.round(np.asarray(goal) / self.joint_resolution)
+                    .astype(int)
+                    .tolist()
+                ),
+            )
+
+        # Return key
+        return (start_key, goal_key, planner_id, scene_hash)
+
+    def get(self, key, is_valid=None):
+        """Retrieve a trajectory from the cache.
+
+        Parameters
+        ----------
+        key : :py:obj:`tuple`
+            The cache key.
+        is_valid : :py:obj:`function`, optional
+            Function that is used to check whether a cached
+            :py:class:`~panda_autograsp.planning.Trajectory` is still valid.
+            Invalid trajectories are removed from the cache.
+
+        Returns
+        -------
+        :py:obj:`~panda_autograsp.planning.Trajectory`
+            A copy of the cached trajectory. None if no (valid) trajectory was
+            found.
+        """
+
+        # Retrieve entry
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.pop(key)
+                self._entries[key] = entry  # Mark as most recently used
+        if entry is None:
+            self.misses += 1
+            return None
+
+        # Validate trajectory
+        trajectory = entry["trajectory"].copy()
+        if is_valid is not None and not is_valid(trajectory):
+            with self._lock:
+                self._entries.pop(key, None)
+            self.rejections += 1
+            self.misses += 1
+            return None
+
+        # Return trajectory
+        self.hits += 1
+        self.saved_planning_time += entry["planning_time"]
+        return trajectory
+
+    def put(self, key, trajectory, planning_time=0.0):
+        """Add a trajectory to the cache.
+
+        Parameters
+        ----------
+        key : :py:obj:`tuple`
+            The cache key.
+        trajectory : :py:obj:`!moveit_msgs.msg.RobotTrajectory` or :py:obj:`Trajectory`
+            The trajectory.
+        planning_time : :py:obj:`float`, optional
+            The time in seconds it took to plan the trajectory, by default 0.0.
+        """
+
+        # Add entry and remove least recently used entries
+        if not isinstance(trajectory, Trajectory):
+            trajectory = Trajectory.from_msg(trajectory)
+        entry = {"trajectory": trajectory, "planning_time": planning_time}
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all trajectories from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def save(self):
+        """Save the cache to the cache file."""
+
+        # Check if cache file was set
+        if self.cache_file is None:
+            return
+
+        # Save cache
+        cache_dir = os.path.dirname(self.cache_file)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        with self._lock:
+            entries = list(self._entries.items())
+        with open(self.cache_file, "wb") as cache_file:
+            pickle.dump(
+                {"version": CACHE_FILE_VERSION, "entries": entries},
+                cache_file,
+                protocol=2,
+            )
+        rospy.logdebug("Saved %d trajectories to %s." % (len(entries), self.cache_file))
+
+    def load(self):
+        """Load the cache from the cache file."""
+        try:
+            with open(self.cache_file, "rb") as cache_file:
+                data = pickle.load(cache_file)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError) as e:
+            rospy.logwarn(
+                "Trajectory cache could not be loaded from %s: %s"
+                % (self.cache_file, e)
+            )
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_FILE_VERSION:
+            rospy.logwarn(
+                "Trajectory cache file %s has an outdated format and is ignored."
+                % self.cache_file
+            )
+            return
+        entries = data["entries"]
+        with self._lock:
+            self._entries = OrderedDict(entries[-self.max_size :])
+        rospy.logdebug(
+            "Loaded %d trajectories from %s." % (len(self._entries), self.cache_file)
+        )
@@ -0,0 +1,250 @@
+"""Module containing a trajectory post-processor that shortens and smooths the
+(often detouring) paths that are returned by the sampling-based moveit planners.
+"""
+
+# Make script both python2 and python3 compatible
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+try:
+    input = raw_input
+except NameError:
+    pass
+
+# Main python packages
+import time
+import numpy as np
+
+# Panda_autograsp modules, msgs and srvs
+from .trajectory import Trajectory
+from ..functions.trajectories import states_are_valid
+
+
+#################################################
+# TrajectorySmoother class ######################
+#################################################
+class TrajectorySmoother(object):
+    """Post-processor that shortens a joint trajectory using random shortcuts and
+    then smooths it using a cubic B-spline pass. All joint configurations that are
+    added or moved are checked for collisions in batches.
+
+    Attributes
+    ----------
+    resolution : :py:obj:`float`
+        The joint space resolution used for interpolating and collision checking
+        the shortcuts in radians.
+    max_iterations : :py:obj:`int`
+        The maximum number of shortcut attempts.
+    time_budget : :py:obj:`float`
+        The maximum time in seconds that is spent on post-processing a trajectory.
+    batch_size : :py:obj:`int`
+        The number of joint configurations that are checked for collisions at once.
+    smoothing_iterations : :py:obj:`int`
+        The number of B-spline smoothing passes.
+    """
+
+    def __init__(
+        self,
+        resolution=0.05,
+        max_iterations=50,
+        time_budget=0.5,
+        batch_size=10,
+        smoothing_iterations=10,
+        seed=None,
+    ):
+        """
+        Parameters
+        ----------
+        resolution : :py:obj:`float`, optional
+            The joint space resolution used for interpolating and collision checking
+            the shortcuts in radians, by default 0.05.
+        max_iterations : :py:obj:`int`, optional
+            The maximum number of shortcut attempts, by default 50.
+        time_budget : :py:obj:`float`, optional
+            The maximum time in seconds that is spent on post-processing a
+            trajectory, by default 0.5.
+        batch_size : :py:obj:`int`, optional
+            The number of joint configurations that are checked for collisions at
+            once, by default 10.
+        smoothing_iterations : :py:obj:`int`, optional
+            The number of B-spline smoothing passes, by default 10.
+        seed : :py:obj:`int`, optional
+            Seed of the random number generator used for selecting the shortcuts,
+            by default None.
+        """
+
+        # Set class attributes
+        self.resolution = resolution
+        self.max_iterations = max_iterations
+        self.time_budget = time_budget
+        self.batch_size = batch_size
+        self.smoothing_iterations = smoothing_iterations
+        self._random = np.random.RandomState(seed)
+
+    def process(self, trajectory, is_valid):
+        """Shortcut and smooth a trajectory. The start and end configuration are
+        not changed. The timing of the returned trajectory is not set and should be
+        computed by retiming it.
+
+        Parameters
+        ----------
+        trajectory : :py:obj:`~panda_autograsp.planning.Trajectory`
+            The trajectory you want to post-process.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns a
+            (M,) bool array specifying which configurations are collision free.
+
+        Returns
+        -------
+        :py:obj:`~panda_autograsp.planning.Trajectory`
+            The post-processed trajectory.
+        """
+        deadline = time.time() + self.time_budget
+        path = self.shortcut(trajectory.positions, is_valid, deadline)
+        path = self.smooth(self.densify(path), is_valid, deadline)
+        return Trajectory(trajectory.joint_names, path)
+
+    def shortcut(self, path, is_valid, deadline=None):
+        """Shorten a path by replacing the part between two random waypoints by a
+        straight joint space motion when this motion is collision free.
+
+        Parameters
+        ----------
+        path : :py:obj:`numpy.ndarray`
+            (N, D) array containing the path waypoints.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns a
+            (M,) bool array specifying which configurations are collision free.
+        deadline : :py:obj:`float`, optional
+            Time after which no more shortcuts are tried, by default None.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            The shortened path.
+        """
+        path = np.asarray(path, dtype=np.float64)
+        for _ in range(self.max_iterations):
+            if len(path) < 3 or (deadline is not None and time.time() > deadline):
+                break
+
+            # Select two random non-adjacent waypoints
+            i, j = np.sort(self._random.choice(len(path), 2, replace=False))
+            if j - i < 2:
+                continue
+
+            # Skip shortcuts that do not shorten the path
+            segment_length = np.sum(
+                np.linalg.norm(np.diff(path[i : j + 1], axis=0), axis=1)
+            )
+            if np.linalg.norm(path[j] - path[i]) >= segment_length - 1e-9:
+                continue
+
+            # Replace the path segment if the straight motion is collision free
+            states = self.interpolate(path[i], path[j])[:-1]
+            if self.states_are_valid(states, is_valid):
+                path = np.vstack([path[: i + 1], states, path[j:]])
+        return path
+
+    def smooth(self, path, is_valid, deadline=None):
+        """Smooth a path by repeatedly replacing each waypoint by the value of the
+        uniform cubic B-spline that uses the waypoints as control points. All
+        waypoints are processed at once. When the smoothed path is not collision
+        free the number of smoothing passes is halved.
+
+        Parameters
+        ----------
+        path : :py:obj:`numpy.ndarray`
+            (N, D) array containing the path waypoints.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns a
+            (M,) bool array specifying which configurations are collision free.
+        deadline : :py:obj:`float`, optional
+            Time after which smoothing is stopped, by default None.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            The smoothed path. The input path if no collision free smoothed path was
+            found.
+        """
+        n_iterations = self.smoothing_iterations
+        while len(path) > 2 and n_iterations > 0:
+            if deadline is not None and time.time() > deadline:
+                break
+
+            # Smooth all waypoints at once (start and end are fixed)
+            smoothed_path = path.copy()
+            for _ in range(n_iterations):
+                smoothed_path[1:-1] = (
+                    smoothed_path[:-2] + 4.0 * smoothed_path[1:-1] + smoothed_path[2:]
+                ) / 6.0
+
+            # Check the moved waypoints
+            moved = np.any(np.abs(smoothed_path - path) > 1e-9, axis=1)
+            if self.states_are_valid(smoothed_path[moved], is_valid):
+                return smoothed_path
+            n_iterations //= 2
+        return path
+
+    def densify(self, path):
+        """Interpolate a path such that the waypoints are at most one resolution
+        apart.
+
+        Parameters
+        ----------
+        path : :py:obj:`numpy.ndarray`
+            (N, D) array containing the path waypoints.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            The interpolated path.
+        """
+        if len(path) < 2:
+            return path
+        return np.vstack(
+            [path[:1]]
+            + [self.interpolate(q1, q2) for q1, q2 in zip(path[:-1], path[1:])]
+        )
+
+    def interpolate(self, q1, q2):
+        """Interpolate between two joint configurations at the smoother resolution.
+
+        Parameters
+        ----------
+        q1 : :py:obj:`numpy.ndarray`
+            The start configuration.
+        q2 : :py:obj:`numpy.ndarray`
+            The end configuration.
+
+        Returns
+        -------
+        :py:obj:`numpy.ndarray`
+            (M, D) array containing the interpolated configurations (including
+            the end configuration but excluding the start configuration).
+        """
+        n_steps = max(int(np.ceil(np.max(np.abs(q2 - q1)) / self.resolution)), 1)
+        steps = np.arange(1, n_steps + 1)[:, None] / n_steps
+        return q1[None, :] + steps * (q2 - q1)[None, :]
+
+    def states_are_valid(self, states, is_valid):
+        """Check whether joint configurations are collision free. The configurations
+        are checked from coarse to fine in batches so that collisions are found
+        early.
+
+        Parameters
+        ----------
+        states : :py:obj:`numpy.ndarray`
+            (M, D) array containing the joint configurations.
+        is_valid : :py:obj:`function`
+            Function that takes a (M, D) array of joint configurations and returns a
+            (M,) bool array specifying which configurations are collision free.
+
+        Returns
+        -------
+        :py:obj:`bool`
+            Bool specifying whether all configurations are collision free.
+        """
+        return states_are_valid(states, is_valid, batch_size=self.batch_size)